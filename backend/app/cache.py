@@ -1,32 +1,234 @@
-from cachetools import TTLCache
+from cachetools import Cache, TTLCache
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import wraps
+import asyncio
 import hashlib
 import json
-from typing import Any, Callable
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from app.config import settings
+from app.disk_cache import DiskCache, DEFAULT_PATH
+from app import metrics
+
+class AsyncTTLCache(TTLCache):
+    """TTLCache that tracks hit/miss/coalesced counts and in-flight loads for `cached`.
+
+    It also remembers the last value per key after it expires, so `cached`
+    can serve it stale (up to CACHE_MAX_STALE seconds) while refreshing.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_hits = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.last_good: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # Earlier-than-TTL expiry for entries promoted from the disk tier
+        self.deadlines: Dict[str, float] = {}
+        _registry.append(self)
+
+    def popitem(self):
+        # Only called when the cache is full of live entries: a capacity eviction
+        self.evictions += 1
+        return super().popitem()
+
+    def expire(self, time=None):
+        size = Cache.__len__(self)  # TTLCache.__len__ would call expire() again
+        result = super().expire(time)
+        self.expirations += size - Cache.__len__(self)
+        return result
+
+    def __getitem__(self, key):
+        deadline = self.deadlines.get(key)
+        if deadline is not None and not (self.timer() < deadline):
+            del self.deadlines[key]
+            super().pop(key, None)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.deadlines.pop(key, None)
+        self._remember(key, value, self.timer())
+
+    def _remember(self, key: str, value: Any, stored_at: float) -> None:
+        self.last_good[key] = (value, stored_at)
+        self.last_good.move_to_end(key)
+        while len(self.last_good) > self.maxsize:
+            self.last_good.popitem(last=False)
+
+    def promote(self, key: str, value: Any, age: float, remaining: float) -> None:
+        """Insert a value loaded from the disk tier, keeping its original expiry"""
+        if remaining > 0:
+            super().__setitem__(key, value)
+            self.deadlines[key] = self.timer() + min(remaining, self.ttl)
+            for k in [k for k in self.deadlines if k not in self]:
+                del self.deadlines[k]
+        self._remember(key, value, self.timer() - age)
+
+    def get_stale(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, value) for an expired entry still inside the stale window"""
+        entry = self.last_good.get(key)
+        if entry is None:
+            return False, None
+        value, stored_at = entry
+        if self.timer() - stored_at > self.ttl + settings.CACHE_MAX_STALE:
+            del self.last_good[key]
+            return False, None
+        return True, value
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stale_hits": self.stale_hits,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "inflight": len(self.inflight),
+            "size": len(self),
+        }
+
+# Every AsyncTTLCache, including ones defined outside this module (for metrics)
+_registry: List[AsyncTTLCache] = []
+
+def _cache_counts(field: str) -> Callable[[], Dict[Tuple, float]]:
+    return lambda: {(c.name,): getattr(c, field) for c in _registry}
+
+for _field, _help in (("hits", "hits"), ("misses", "misses (loads)"), ("coalesced", "requests that joined an in-flight load"),
+                      ("stale_hits", "expired values served while refreshing"), ("disk_hits", "misses served from the disk tier"),
+                      ("evictions", "entries evicted for capacity"), ("expirations", "entries expired by TTL")):
+    metrics.Counter(f"cache_{_field}_total", f"Cache {_help}", ("cache",), collect=_cache_counts(_field))
+metrics.Gauge("cache_entries", "Live entries per cache", ("cache",), collect=lambda: {(c.name,): len(c) for c in _registry})
 
 # Global caches with different TTLs
-quote_cache = TTLCache(maxsize=500, ttl=settings.CACHE_TTL_QUOTES)
-mover_cache = TTLCache(maxsize=100, ttl=settings.CACHE_TTL_MOVERS)
-breadth_cache = TTLCache(maxsize=10, ttl=settings.CACHE_TTL_BREADTH)
-sector_cache = TTLCache(maxsize=50, ttl=settings.CACHE_TTL_SECTORS)
-macro_cache = TTLCache(maxsize=50, ttl=settings.CACHE_TTL_MACRO)
+quote_cache = AsyncTTLCache("quotes", maxsize=500, ttl=settings.CACHE_TTL_QUOTES)
+mover_cache = AsyncTTLCache("movers", maxsize=100, ttl=settings.CACHE_TTL_MOVERS)
+breadth_cache = AsyncTTLCache("breadth", maxsize=10, ttl=settings.CACHE_TTL_BREADTH)
+sector_cache = AsyncTTLCache("sectors", maxsize=50, ttl=settings.CACHE_TTL_SECTORS)
+macro_cache = AsyncTTLCache("macro", maxsize=50, ttl=settings.CACHE_TTL_MACRO)
+sec_cache = AsyncTTLCache("sec", maxsize=10, ttl=settings.CACHE_TTL_SEC)
+
+ALL_CACHES = [quote_cache, mover_cache, breadth_cache, sector_cache, macro_cache, sec_cache]
+
+# Optional persistent tier shared by all caches (see CACHE_DISK_ENABLED)
+disk_cache: Optional[DiskCache] = None
+if settings.CACHE_DISK_ENABLED:
+    disk_cache = DiskCache(
+        path=Path(settings.CACHE_DISK_PATH) if settings.CACHE_DISK_PATH else DEFAULT_PATH,
+        max_bytes=settings.CACHE_DISK_MAX_BYTES,
+        flush_interval=settings.CACHE_DISK_FLUSH_INTERVAL,
+    )
+
+# Names of caches that served a stale value inside the current `track_stale()` block
+_stale_reads: ContextVar[Optional[List[str]]] = ContextVar("stale_reads", default=None)
+
+@contextmanager
+def track_stale() -> Iterator[List[str]]:
+    """Collect the names of caches that answered with stale data in this block"""
+    reads: List[str] = []
+    token = _stale_reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _stale_reads.reset(token)
+
+def _stable_default(obj: Any) -> str:
+    # Objects with the default repr (e.g. a service passed as `self`) embed their
+    # memory address; key them by type so keys match across processes.
+    cls = type(obj)
+    if cls.__repr__ is object.__repr__ and cls.__str__ is object.__str__:
+        return f"<{cls.__module__}.{cls.__qualname__}>"
+    return str(obj)
 
 def cache_key(*args, **kwargs) -> str:
-    """Generate cache key from function arguments"""
-    key_data = json.dumps({"args": args, "kwargs": kwargs}, sort_keys=True, default=str)
+    """Generate cache key from function arguments (stable across processes)"""
+    key_data = json.dumps({"args": args, "kwargs": kwargs}, sort_keys=True, default=_stable_default)
     return hashlib.md5(key_data.encode()).hexdigest()
 
-def cached(cache: TTLCache):
-    """Decorator for caching async function results"""
+def cached(cache: AsyncTTLCache):
+    """Decorator for caching async function results.
+
+    Concurrent misses on the same key share one in-flight call (single-flight).
+    The shared call runs as its own task, so a caller that gives up (e.g. a
+    summary budget timeout) does not cancel it for the others. Only successful
+    results are stored; an exception is raised to every waiter and not cached.
+
+    On a memory miss the disk tier (if enabled) is consulted first; fresh rows
+    are promoted, expired ones only seed the stale value. With
+    CACHE_STALE_WHILE_REVALIDATE, an expired entry is returned at once
+    while the shared call refreshes it in the background. The wrapper's
+    `refresh(*args, **kwargs)` forces a reload (used by the pre-warmer).
+    """
     def decorator(func: Callable) -> Callable:
+        def _load(key: str, args, kwargs) -> asyncio.Task:
+            task = cache.inflight.get(key)
+            if task is not None:
+                cache.coalesced += 1
+                return task
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            cache.inflight[key] = task
+
+            def _done(t: asyncio.Task) -> None:
+                cache.inflight.pop(key, None)
+                if t.cancelled():
+                    return
+                if t.exception() is None:
+                    cache[key] = t.result()
+                    if disk_cache is not None:
+                        disk_cache.put(cache.name, key, t.result(), cache.ttl)
+                else:
+                    print(f"[cache:{cache.name}] {func.__qualname__} failed: {t.exception()}")
+
+            task.add_done_callback(_done)
+            return task
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            key = cache_key(*args, **kwargs)
-            if key in cache:
-                return cache[key]
-            result = await func(*args, **kwargs)
-            cache[key] = result
-            return result
+            key = cache_key(func.__qualname__, *args, **kwargs)
+            try:
+                result = cache[key]
+            except KeyError:
+                pass
+            else:
+                cache.hits += 1
+                return result
+
+            if disk_cache is not None and key not in cache.inflight:
+                found, value, age, remaining = await disk_cache.get(cache.name, key)
+                if found:
+                    cache.promote(key, value, age, remaining)
+                    if remaining > 0:
+                        cache.disk_hits += 1
+                        return value
+
+            if settings.CACHE_STALE_WHILE_REVALIDATE:
+                found, stale = cache.get_stale(key)
+                if found:
+                    cache.stale_hits += 1
+                    _load(key, args, kwargs)
+                    reads = _stale_reads.get()
+                    if reads is not None:
+                        reads.append(cache.name)
+                    return stale
+
+            if key not in cache.inflight:
+                cache.misses += 1
+            return await asyncio.shield(_load(key, args, kwargs))
+
+        async def refresh(*args, **kwargs):
+            key = cache_key(func.__qualname__, *args, **kwargs)
+            return await asyncio.shield(_load(key, args, kwargs))
+
+        wrapper.refresh = refresh
+        wrapper.cache = cache
         return wrapper
     return decorator
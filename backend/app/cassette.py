@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+DEFAULT_PATH = Path(__file__).parent.parent / "data" / "cassettes.sqlite3"
+
+# Query parameters that carry credentials; never stored and not part of the match key
+SECRET_PARAMS = {"apikey", "api_key", "token"}
+# Response headers worth replaying (validators, content type, throttling hints)
+KEPT_HEADERS = ("content-type", "etag", "last-modified", "retry-after", "cache-control")
+_WIRE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+def request_key(request: httpx.Request) -> Tuple[str, str]:
+    """(match key, redacted URL): method + URL with sorted, credential-free query params"""
+    url = request.url
+    params = sorted((k, v) for k, v in url.params.multi_items() if k.lower() not in SECRET_PARAMS)
+    redacted = str(url.copy_with(query=None).copy_merge_params(params)) if params else str(url.copy_with(query=None))
+    return hashlib.sha1(f"{request.method} {redacted}".encode()).hexdigest(), redacted
+
+class CassetteStore:
+    """SQLite file of recorded provider responses.
+
+    Each request key maps to the ordered responses recorded for it (`seq`),
+    so a replay of repeated identical requests walks the same sequence the
+    recording saw; the last response repeats once the sequence runs out.
+    Bodies are zlib-compressed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._next_seq: Dict[str, int] = {}
+        self._entries: Optional[Dict[str, List[Tuple]]] = None
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT NOT NULL, seq INTEGER NOT NULL, method TEXT NOT NULL, url TEXT NOT NULL,"
+                " status INTEGER NOT NULL, headers TEXT NOT NULL, body BLOB NOT NULL,"
+                " elapsed REAL NOT NULL, recorded_at REAL NOT NULL,"
+                " PRIMARY KEY (key, seq))"
+            )
+            conn.commit()
+            self._next_seq = dict(conn.execute("SELECT key, MAX(seq) + 1 FROM responses GROUP BY key").fetchall())
+            self._conn = conn
+        return self._conn
+
+    # ---------- record ----------
+    def _insert(self, row: Tuple) -> None:
+        with self._lock:
+            conn = self._connect()
+            key = row[0]
+            seq = self._next_seq.get(key, 0)
+            self._next_seq[key] = seq + 1
+            conn.execute("INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", (key, seq, *row[1:]))
+            conn.commit()
+
+    async def record(self, request: httpx.Request, response: httpx.Response, body: bytes, elapsed: float) -> None:
+        key, url = request_key(request)
+        headers = {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS}
+        row = (key, request.method, url, response.status_code, json.dumps(headers), zlib.compress(body), elapsed, time.time())
+        try:
+            await asyncio.to_thread(self._insert, row)
+            self.recorded += 1
+        except Exception as e:
+            print(f"[cassette] record failed for {url}: {e}")
+
+    # ---------- replay ----------
+    def _load(self) -> Dict[str, List[Tuple]]:
+        with self._lock:
+            entries: Dict[str, List[Tuple]] = defaultdict(list)
+            if self.path.exists():
+                rows = self._connect().execute(
+                    "SELECT key, status, headers, body, elapsed FROM responses ORDER BY key, seq"
+                ).fetchall()
+                for key, status, headers, body, elapsed in rows:
+                    entries[key].append((status, json.loads(headers), body, elapsed))
+            return entries
+
+    async def lookup(self, request: httpx.Request) -> Optional[Tuple[int, Dict[str, str], bytes, float]]:
+        """Next recorded (status, headers, body, elapsed) for this request, or None"""
+        if self._entries is None:
+            self._entries = await asyncio.to_thread(self._load)
+            print(f"[cassette] Loaded {sum(map(len, self._entries.values()))} responses from {self.path}")
+        key, _ = request_key(request)
+        recorded = self._entries.get(key)
+        if not recorded:
+            self.misses += 1
+            return None
+        i = self._cursor[key]
+        self._cursor[key] = i + 1
+        status, headers, body, elapsed = recorded[min(i, len(recorded) - 1)]
+        self.replayed += 1
+        return status, headers, zlib.decompress(body), elapsed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict:
+        return {"path": str(self.path), "recorded": self.recorded, "replayed": self.replayed, "misses": self.misses}
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests to the network and stores every response in the cassette"""
+
+    def __init__(self, store: CassetteStore, inner: httpx.AsyncBaseTransport):
+        self.store = store
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        t0 = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        elapsed = time.perf_counter() - t0
+        await self.store.record(request, response, body, elapsed)
+        # The body is already decoded, so drop the headers that describe the wire encoding
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _WIRE_HEADERS]
+        return httpx.Response(response.status_code, headers=headers, content=body,
+                              extensions={k: v for k, v in response.extensions.items() if k != "network_stream"})
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves recorded responses; `speed` scales the recorded latency (0 = no delay)"""
+
+    def __init__(self, store: CassetteStore, speed: float = 1.0):
+        self.store = store
+        self.speed = speed
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        hit = await self.store.lookup(request)
+        if hit is None:
+            raise httpx.ConnectError(f"No cassette entry for {request.method} {request_key(request)[1]}", request=request)
+        status, headers, body, elapsed = hit
+        if self.speed > 0:
+            await asyncio.sleep(elapsed / self.speed)
+        return httpx.Response(status, headers=headers, content=body)
+
+_store: Optional[CassetteStore] = None
+
+def get_store(path: Optional[str] = None) -> CassetteStore:
+    global _store
+    if _store is None:
+        _store = CassetteStore(Path(path) if path else DEFAULT_PATH)
+    return _store
+
+def make_transport(mode: str, path: Optional[str], speed: float, **pool_kwargs) -> Optional[httpx.AsyncBaseTransport]:
+    """Transport for a provider client: None (httpx default) for live, else record/replay"""
+    if mode == "record":
+        return RecordingTransport(get_store(path), httpx.AsyncHTTPTransport(**pool_kwargs))
+    if mode == "replay":
+        return ReplayTransport(get_store(path), speed)
+    return None
+
+def close_store() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
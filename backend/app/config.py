@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     # API Keys
@@ -14,6 +14,20 @@ class Settings(BaseSettings):
     CACHE_TTL_BREADTH: int = 60
     CACHE_TTL_SECTORS: int = 90
     CACHE_TTL_MACRO: int = 300
+    CACHE_TTL_SEC: int = 300
+
+    # Serve expired entries while refreshing them in the background
+    CACHE_STALE_WHILE_REVALIDATE: bool = True
+    CACHE_MAX_STALE: int = 900
+    # Pre-warm summary sections every PREWARM_FRACTION * TTL seconds
+    CACHE_PREWARM: bool = True
+    CACHE_PREWARM_FRACTION: float = 0.8
+
+    # Optional SQLite tier behind the in-memory caches (survives restarts)
+    CACHE_DISK_ENABLED: bool = False
+    CACHE_DISK_PATH: str = ""  # default: backend/data/cache.sqlite3
+    CACHE_DISK_MAX_BYTES: int = 50_000_000
+    CACHE_DISK_FLUSH_INTERVAL: float = 2.0
 
     # Server
     BACKEND_PORT: int = 8000
@@ -23,6 +37,127 @@ class Settings(BaseSettings):
     HTTP_TIMEOUT: int = 3
     HTTP_RETRIES: int = 2
 
+    # Provider transport: live (network), record (network + save responses), replay (saved responses only)
+    TRANSPORT_MODE: str = "live"
+    CASSETTE_PATH: str = ""  # default: backend/data/cassettes.sqlite3
+    # Replay latency scale: 1.0 = recorded timing, 2.0 = twice as fast, 0 = no delay
+    REPLAY_SPEED: float = 1.0
+
+    # Connection pool (one pool per provider)
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2: bool = False
+
+    # Sparklines (/api/miniquotes)
+    SPARKLINE_INTERVAL: str = "5m"
+    SPARKLINE_POINTS: int = 50
+    SPARKLINE_TTL: int = 60
+    SPARKLINE_MAX_SYMBOLS: int = 2000
+    SPARKLINE_BATCH_SIZE: int = 20
+    # Refresh by appending bars only if the last stored bar is newer than this (seconds)
+    SPARKLINE_INCREMENTAL_WINDOW: int = 6 * 3600
+
+    # In-memory intraday bars: one ring buffer of this many rows per (symbol, interval)
+    INTRADAY_CAPACITY: int = 512
+    INTRADAY_MAX_SYMBOLS: int = 4000
+
+    # Breadth universe: CSV of `symbol,exchange` rows, quoted in chunks of this many symbols
+    UNIVERSE_PATH: str = ""  # default: backend/data/universe.csv
+    UNIVERSE_CHUNK_SIZE: int = 200
+    # Breadth and movers share one universe refresh if it finished within this many seconds
+    UNIVERSE_REFRESH_INTERVAL: float = 20.0
+    # Movers: entries kept per bucket (gainers / losers / most active)
+    MOVERS_TOP_K: int = 10
+
+    # SEC filings: feed entries requested per poll, filings kept locally, headlines in the summary
+    SEC_FEED_COUNT: int = 100
+    SEC_STORE_SIZE: int = 5000
+    SEC_SUMMARY_HEADLINES: int = 5
+    # Ticker -> CIK map refresh interval (seconds)
+    SEC_TICKER_TTL: int = 86400
+
+    # FRED series store: rows kept per series, series kept, persistence file, sync throttle (seconds)
+    FRED_CAPACITY: int = 8192
+    FRED_MAX_SERIES: int = 200
+    FRED_STORE_PATH: str = ""  # default: backend/data/fred_series.npz
+    FRED_SYNC_INTERVAL: float = 3600.0
+
+    # Watchlists: coalesce writes for this many seconds before persisting
+    WATCHLIST_FLUSH_DELAY: float = 1.0
+
+    # Posture inputs recorded per summary snapshot for /api/posture/history
+    POSTURE_HISTORY_SIZE: int = 20000
+
+    # Summary versions kept for ?since= delta responses
+    SUMMARY_HISTORY: int = 32
+    # The static (non-live) summary is rebuilt at least this often so its as_of moves (seconds, 0 = never)
+    SUMMARY_STATIC_TTL: float = 60.0
+
+    # /api/stream (server-sent events)
+    STREAM_INTERVAL: float = 5.0
+    STREAM_QUEUE_SIZE: int = 32
+    STREAM_HEARTBEAT: float = 15.0
+    # Each distinct symbol set polls upstream on its own: cap symbols per stream and live quote sets
+    STREAM_MAX_SYMBOLS: int = 50
+    STREAM_MAX_QUOTE_TOPICS: int = 32
+
+    # Per-provider rate limits (0 = unlimited), keyed by DataSource.name
+    RATE_LIMITS: Dict[str, Dict[str, int]] = {
+        "YahooFinance": {"per_minute": 120, "per_day": 0, "max_concurrency": 8},
+        "AlphaVantage": {"per_minute": 5, "per_day": 25, "max_concurrency": 1},
+        "Finnhub": {"per_minute": 60, "per_day": 0, "max_concurrency": 8},
+        "FRED": {"per_minute": 120, "per_day": 0, "max_concurrency": 4},
+        "SECEdgar": {"per_minute": 600, "per_day": 0, "max_concurrency": 4},
+    }
+
+    # Provider health tracking / adaptive fallback order
+    SOURCE_EWMA_ALPHA: float = 0.2
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_TIMEOUT: float = 30.0
+    # Hedged fallback: start the next provider after max(HEDGE_MIN_DELAY, p95 of the current one)
+    HEDGED_REQUESTS: bool = False
+    HEDGE_MIN_DELAY: float = 0.25
+    # Time allowed for merging quotes across providers before returning partial coverage
+    FALLBACK_BUDGET: float = 2.5
+
+    # Event-loop lag probe interval for /api/metrics (seconds, 0 = off)
+    METRICS_LOOP_LAG_INTERVAL: float = 0.5
+
+    # Cross-worker quote table: off | publisher | reader. One publisher process (python -m app.publisher)
+    # fetches upstream and publishes sections, quotes and posture; reader workers serve from it
+    SHARED_TABLE_MODE: str = "off"
+    SHARED_TABLE_PATH: str = ""  # default: /dev/shm/market-aggregator.table (demand socket at <path>.sock)
+    SHARED_TABLE_SIZE: int = 16 * 1024 * 1024
+    SHARED_TABLE_INTERVAL: float = 5.0
+    # Readers fetch for themselves while the table is older than this (seconds, 0 = never)
+    SHARED_TABLE_MAX_AGE: float = 60.0
+    # Symbols readers ask for stay published this long; a reader waits up to DEMAND_WAIT for new ones
+    SHARED_DEMAND_TTL: float = 300.0
+    SHARED_DEMAND_WAIT: float = 2.0
+    SHARED_MAX_SYMBOLS: int = 5000
+
+    # Per-request spans in a Server-Timing header (and in JSON bodies with ?debug=timing)
+    REQUEST_TIMING: bool = True
+    # Token for /api/debug/* (X-Admin-Token header); empty disables those endpoints
+    ADMIN_TOKEN: str = ""
+    # Sampling profiler: stack sample interval (seconds), requests per arm, profiles kept
+    PROFILE_INTERVAL: float = 0.005
+    PROFILE_MAX_REQUESTS: int = 50
+    PROFILE_KEEP: int = 20
+
+    # /api/summary?live=1 fan-out (seconds)
+    SUMMARY_DEADLINE: float = 5.0
+    SUMMARY_SECTION_BUDGETS: Dict[str, float] = {
+        "indices": 3.0,
+        "vix": 3.0,
+        "sectors": 3.0,
+        "breadth": 3.0,
+        "movers": 3.0,
+        "macro": 2.0,
+        "sec": 2.0,
+    }
+
     class Config:
         env_file = ".env"
         case_sensitive = True
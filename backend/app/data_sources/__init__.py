@@ -3,5 +3,7 @@ from .alpha_vantage import AlphaVantage
 from .finnhub import Finnhub
 from .fred import FRED
 from .sec import SECEdgar
+from .base import get_client, open_clients, close_clients
+from .stats import stats_snapshot
 
-__all__ = ["YahooFinance", "AlphaVantage", "Finnhub", "FRED", "SECEdgar"]
+__all__ = ["YahooFinance", "AlphaVantage", "Finnhub", "FRED", "SECEdgar", "get_client", "open_clients", "close_clients", "stats_snapshot"]
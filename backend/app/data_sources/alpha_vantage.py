@@ -1,7 +1,18 @@
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, List
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import numpy as np
 from .base import DataSource
+from app.timeseries import Bars, as_bars
 from app.config import settings
 
+def _zone(name: str):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        # No tz database (e.g. Windows without tzdata): assume US Eastern standard time
+        return timezone(timedelta(hours=-5))
+
 class AlphaVantage(DataSource):
     """Alpha Vantage data source"""
 
@@ -36,20 +47,32 @@ class AlphaVantage(DataSource):
         }
 
     async def fetch_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
-        quotes = {}
-        for symbol in symbols[:5]:
-            q = await self.fetch_quote(symbol)
-            if q:
-                quotes[symbol] = q
-        return quotes
+        if not self.api_key:
+            return {}
+        return await self.fetch_quotes_concurrently(symbols)
 
-    async def fetch_intraday(self, symbol: str) -> List[float]:
+    async def fetch_intraday_series(self, symbol: str, interval: str = "5min") -> Bars:
         if not self.api_key:
-            return []
-        params = {'function': 'TIME_SERIES_INTRADAY', 'symbol': symbol, 'interval': '5min', 'apikey': self.api_key}
+            return as_bars([], [])
+        params = {'function': 'TIME_SERIES_INTRADAY', 'symbol': symbol, 'interval': interval, 'apikey': self.api_key}
         data = await self.fetch_with_retry(self.BASE_URL, params=params)
-        if not data or 'Time Series (5min)' not in data:
-            return []
-        ts = data['Time Series (5min)']
-        closes = [float(v['4. close']) for k, v in list(ts.items())[:50]]
-        return list(reversed(closes))
+        key = f'Time Series ({interval})'
+        if not data or key not in data:
+            return as_bars([], [])
+        stamps = sorted(data[key])
+        if not stamps:
+            return as_bars([], [])
+        # Stamps are exchange-local wall time; one offset covers a single session
+        tz = _zone((data.get('Meta Data') or {}).get('6. Time Zone') or 'US/Eastern')
+        offset = datetime.strptime(stamps[-1], '%Y-%m-%d %H:%M:%S').replace(tzinfo=tz).utcoffset()
+        local = np.array([s.replace(' ', 'T') for s in stamps], dtype='datetime64[s]').astype(np.int64)
+        bars = [data[key][s] for s in stamps]
+        return as_bars(
+            local - int(offset.total_seconds()),
+            [b.get('4. close') for b in bars],
+            [b.get('5. volume') for b in bars],
+        )
+
+    async def fetch_intraday(self, symbol: str) -> List[float]:
+        _, closes, _ = await self.fetch_intraday_series(symbol)
+        return closes[-50:].tolist()
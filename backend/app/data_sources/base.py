@@ -1,8 +1,58 @@
 import httpx
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable
 import asyncio
+import time
 from app.config import settings
+from app.rate_limit import get_limiter, QuotaExceeded
+from app.cassette import make_transport, close_store
+from .stats import get_stats
+from app import metrics, timing
+
+# One long-lived connection pool per provider, keyed by DataSource.name
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+def _http2_enabled() -> bool:
+    if not settings.HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        print("[http] HTTP2 requested but 'h2' is not installed; using HTTP/1.1")
+        return False
+    return True
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """Return the shared AsyncClient for a provider, creating it on first use"""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        http2 = _http2_enabled()
+        transport = make_transport(settings.TRANSPORT_MODE, settings.CASSETTE_PATH, settings.REPLAY_SPEED,
+                                   limits=limits, http2=http2)
+        client = httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT, limits=limits, http2=http2, transport=transport)
+        _clients[name] = client
+    return client
+
+def open_clients(names: Iterable[str]) -> None:
+    """Eagerly create pools for the given providers (called from app lifespan)"""
+    for name in names:
+        get_client(name)
+
+async def close_clients() -> None:
+    """Close every pooled client (called from app lifespan on shutdown)"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"[http] Error closing client: {e}")
+    close_store()
 
 class DataSource(ABC):
     """Base class for all data sources"""
@@ -12,29 +62,71 @@ class DataSource(ABC):
         self.healthy = True
         self.timeout = settings.HTTP_TIMEOUT
         self.max_retries = settings.HTTP_RETRIES
+        self.limiter = get_limiter(name)
+        self.stats = get_stats(name)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_client(self.name)
 
     async def fetch_with_retry(self, url: str, headers: Optional[Dict] = None, 
                                params: Optional[Dict] = None) -> Optional[Dict]:
-        """Fetch with exponential backoff retry"""
+        """Fetch with exponential backoff retry (skipped while the circuit is open)"""
+        if not self.stats.allow():
+            self.healthy = False
+            return None
         for attempt in range(self.max_retries + 1):
+            t0 = time.perf_counter()
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.get(url, headers=headers, params=params)
-                    response.raise_for_status()
-                    self.healthy = True
-                    # Try JSON; fall back to text for XML callers
-                    try:
-                        return response.json()
-                    except Exception:
-                        return {"_text": response.text}
+                async with self.limiter:
+                    t0 = time.perf_counter()
+                    response = await self.client.get(url, headers=headers, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                self.stats.record_success(time.perf_counter() - t0)
+                timing.record(f"upstream.{self.name}", t0, f"attempt {attempt} ok")
+                self.healthy = True
+                # Try JSON; fall back to text for XML callers
+                try:
+                    return response.json()
+                except Exception:
+                    return {"_text": response.text}
+            except QuotaExceeded as e:
+                metrics.UPSTREAM_REQUESTS.inc(self.name, "quota")
+                print(f"[{self.name}] {e}")
+                return None
+            except asyncio.CancelledError:
+                self.stats.record_abandoned(time.perf_counter() - t0)
+                timing.record(f"upstream.{self.name}", t0, f"attempt {attempt} abandoned")
+                raise
             except Exception as e:
-                if attempt == self.max_retries:
+                self.stats.record_failure(time.perf_counter() - t0)
+                timing.record(f"upstream.{self.name}", t0, f"attempt {attempt} failed: {type(e).__name__}")
+                if attempt == self.max_retries or self.stats.state == self.stats.OPEN:
                     self.healthy = False
-                    print(f"[{self.name}] Failed after {self.max_retries} retries: {e}")
+                    print(f"[{self.name}] Failed after {attempt} retries: {e}")
                     return None
+                metrics.UPSTREAM_RETRIES.inc(self.name)
                 await asyncio.sleep(0.5 * (2 ** attempt))  # Exponential backoff
         return None
 
+    def quote_calls(self, symbols: int) -> int:
+        """Upstream requests one fetch_quotes call makes for this many symbols (one each by default)"""
+        return symbols
+
+    async def fetch_quotes_concurrently(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Fetch one quote per symbol in parallel; the limiter queues what the quota can't run yet"""
+        results = await asyncio.gather(*(self.fetch_quote(s) for s in symbols), return_exceptions=True)
+        quotes = {}
+        for symbol, q in zip(symbols, results):
+            if isinstance(q, Exception):
+                print(f"[{self.name}] {symbol}: {q}")
+            elif q:
+                quotes[symbol] = q
+        missing = len(symbols) - len(quotes)
+        if missing:
+            print(f"[{self.name}] No quote for {missing}/{len(symbols)} symbols")
+        return quotes
+
     @abstractmethod
     async def fetch_quote(self, symbol: str) -> Optional[Dict]:
         pass
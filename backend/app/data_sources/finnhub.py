@@ -32,9 +32,6 @@ class Finnhub(DataSource):
         }
 
     async def fetch_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
-        quotes = {}
-        for symbol in symbols:
-            q = await self.fetch_quote(symbol)
-            if q:
-                quotes[symbol] = q
-        return quotes
+        if not self.api_key:
+            return {}
+        return await self.fetch_quotes_concurrently(symbols)
@@ -1,6 +1,9 @@
 from typing import List, Dict, Optional
+import asyncio
+import numpy as np
 from .base import DataSource
 from app.config import settings
+from app.timeseries import Bars, as_bars
 from datetime import datetime, timedelta
 
 class FRED(DataSource):
@@ -22,6 +25,36 @@ class FRED(DataSource):
         # Placeholder for real FRED calendar integration
         return []
 
+    async def fetch_observations(self, series_id: str, start: Optional[str] = None) -> Bars:
+        """
+        Daily observations as bars (midnight-UTC epoch seconds, value, 0 volume).
+        `start` (YYYY-MM-DD) maps to observation_start; missing values ('.') are dropped.
+        """
+        if not self.api_key:
+            return as_bars([], [])
+        params = {'series_id': series_id, 'api_key': self.api_key, 'file_type': 'json'}
+        if start:
+            params['observation_start'] = start
+        data = await self.fetch_with_retry(f"{self.BASE_URL}/series/observations", params=params)
+        obs = (data or {}).get('observations') or []
+        if not obs:
+            return as_bars([], [])
+        dates = np.array([o.get('date') for o in obs], dtype='datetime64[D]')
+        values = np.array([v if (v := o.get('value')) not in (None, '.', '') else np.nan for o in obs], dtype=float)
+        return as_bars(dates.astype('datetime64[s]').astype(np.int64), values)
+
+    async def fetch_observations_many(self, starts: Dict[str, Optional[str]]) -> Dict[str, Bars]:
+        """Observations for several series at once ({series_id: observation_start}); paced by the limiter"""
+        ids = list(starts)
+        results = await asyncio.gather(*(self.fetch_observations(s, starts[s]) for s in ids), return_exceptions=True)
+        out = {}
+        for series_id, bars in zip(ids, results):
+            if isinstance(bars, Exception):
+                print(f"[FRED] {series_id}: {bars}")
+            else:
+                out[series_id] = bars
+        return out
+
     async def fetch_quote(self, symbol: str) -> Optional[Dict]:
         return None
 
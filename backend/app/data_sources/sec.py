@@ -1,42 +1,124 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from .base import DataSource
 import xml.etree.ElementTree as ET
-from datetime import datetime
 import httpx
+import asyncio
+import io
+import json
+import re
+import time
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+_CIK_RE = re.compile(r"\((\d{10})\)")
+
+def parse_atom(content: bytes) -> List[Dict]:
+    """
+    Stream-parse an EDGAR Atom feed into filing dicts (feed order, newest first).
+    Each entry element is cleared once read so memory stays flat on long feeds.
+    """
+    filings = []
+    for _, elem in ET.iterparse(io.BytesIO(content), events=("end",)):
+        if elem.tag != ATOM + "entry":
+            continue
+        title = (elem.findtext(ATOM + "title") or "").strip()
+        link = elem.find(ATOM + "link")
+        category = elem.find(ATOM + "category")
+        entry_id = (elem.findtext(ATOM + "id") or "").strip() or (link.get("href", "") if link is not None else "")
+        if title and entry_id:
+            cik = _CIK_RE.search(title)
+            form = category.get("term", "") if category is not None else title.split(" - ", 1)[0]
+            company = title.split(" - ", 1)[-1].split(" (", 1)[0].strip()
+            filings.append({
+                "id": entry_id,
+                "time": (elem.findtext(ATOM + "updated") or "").strip(),
+                "title": title,
+                "url": link.get("href", "") if link is not None else "",
+                "form": form,
+                "company": company,
+                "cik": cik.group(1) if cik else None,
+            })
+        elem.clear()
+    return filings
+
+def parse_ticker_map(content: bytes) -> Dict[str, str]:
+    """company_tickers.json -> {TICKER: zero-padded 10-digit CIK}"""
+    data = json.loads(content)
+    rows = data.values() if isinstance(data, dict) else data
+    return {str(r["ticker"]).upper(): f"{int(r['cik_str']):010d}" for r in rows if r.get("ticker") and r.get("cik_str") is not None}
 
 class SECEdgar(DataSource):
     """SEC EDGAR filings source"""
 
-    RSS_URL = "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=&company=&dateb=&owner=include&start=0&count=10&output=atom"
+    RSS_URL = "https://www.sec.gov/cgi-bin/browse-edgar"
+    TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+    HEADERS = {'User-Agent': 'Market Aggregator contact@example.com'}
 
     def __init__(self):
         super().__init__("SECEdgar")
+        # request URL -> (ETag, Last-Modified) from the last 200 response
+        self._validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
 
-    async def fetch_headlines(self) -> List[Dict]:
+    async def fetch_if_modified(self, url: str, params: Optional[Dict] = None) -> Optional[bytes]:
+        """
+        Conditional GET: sends If-None-Match/If-Modified-Since from the previous
+        response. Returns the body when it changed, None when unchanged (304) or on error.
+        """
+        if not self.stats.allow():
+            self.healthy = False
+            return None
+        key = str(httpx.URL(url, params=params))
+        headers = dict(self.HEADERS)
+        etag, modified = self._validators.get(key, (None, None))
+        if etag:
+            headers['If-None-Match'] = etag
+        if modified:
+            headers['If-Modified-Since'] = modified
+        t0 = time.perf_counter()
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                headers = {'User-Agent': 'Market Aggregator contact@example.com'}
-                response = await client.get(self.RSS_URL, headers=headers)
-                response.raise_for_status()
-                root = ET.fromstring(response.text)
-                ns = {'atom': 'http://www.w3.org/2005/Atom'}
-                headlines = []
-                for entry in root.findall('atom:entry', ns)[:5]:
-                    title_elem = entry.find('atom:title', ns)
-                    link_elem = entry.find('atom:link', ns)
-                    updated_elem = entry.find('atom:updated', ns)
-                    if title_elem is not None and link_elem is not None:
-                        headlines.append({
-                            'time': updated_elem.text if updated_elem is not None else datetime.now().isoformat(),
-                            'title': title_elem.text,
-                            'url': link_elem.get('href', '')
-                        })
+            async with self.limiter:
+                t0 = time.perf_counter()
+                response = await self.client.get(url, headers=headers, params=params, timeout=self.timeout)
+            if response.status_code == 304:
+                self.stats.record_success(time.perf_counter() - t0)
                 self.healthy = True
-                return headlines
+                return None
+            response.raise_for_status()
+            self.stats.record_success(time.perf_counter() - t0)
+            self.healthy = True
+            self._validators[key] = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return response.content
+        except asyncio.CancelledError:
+            self.stats.record_abandoned(time.perf_counter() - t0)
+            raise
         except Exception as e:
-            print(f"[SECEdgar] Error fetching headlines: {e}")
+            self.stats.record_failure(time.perf_counter() - t0)
+            print(f"[SECEdgar] Error fetching {url}: {e}")
             self.healthy = False
-            return []
+            return None
+
+    async def fetch_filings(self, count: int = 100) -> Optional[List[Dict]]:
+        """Latest filings from the current-events feed; None if unchanged since the last call"""
+        params = {'action': 'getcurrent', 'type': '', 'company': '', 'dateb': '', 'owner': 'include',
+                  'start': 0, 'count': count, 'output': 'atom'}
+        content = await self.fetch_if_modified(self.RSS_URL, params=params)
+        if content is None:
+            return None
+        try:
+            return await asyncio.to_thread(parse_atom, content)
+        except ET.ParseError as e:
+            print(f"[SECEdgar] Error parsing feed: {e}")
+            return None
+
+    async def fetch_ticker_map(self) -> Optional[Dict[str, str]]:
+        """Ticker -> CIK map; None if unchanged since the last call"""
+        content = await self.fetch_if_modified(self.TICKERS_URL)
+        if content is None:
+            return None
+        try:
+            return await asyncio.to_thread(parse_ticker_map, content)
+        except Exception as e:
+            print(f"[SECEdgar] Error parsing ticker map: {e}")
+            return None
 
     async def fetch_quote(self, symbol: str) -> Optional[Dict]:
         return None
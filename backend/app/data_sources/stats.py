@@ -0,0 +1,129 @@
+import time
+from collections import deque
+from typing import Deque, Dict
+from app.config import settings
+from app import metrics
+
+class SourceStats:
+    """Latency/error EWMA and a circuit breaker (closed -> open -> half_open) for one provider"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.alpha = settings.SOURCE_EWMA_ALPHA
+        self.failure_threshold = settings.BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = settings.BREAKER_RESET_TIMEOUT
+        self.latency_ewma = 0.0
+        self.error_ewma = 0.0
+        self.samples: Deque[float] = deque(maxlen=200)
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+
+    def _observe(self, latency: float, error: bool, outcome: str) -> None:
+        metrics.UPSTREAM_REQUESTS.inc(self.name, outcome)
+        metrics.UPSTREAM_LATENCY.observe(latency, self.name)
+        if self.samples:
+            self.latency_ewma += self.alpha * (latency - self.latency_ewma)
+            self.error_ewma += self.alpha * ((1.0 if error else 0.0) - self.error_ewma)
+        else:
+            self.latency_ewma = latency
+            self.error_ewma = 1.0 if error else 0.0
+        self.samples.append(latency)
+
+    def available(self) -> bool:
+        """Like allow() but without claiming the half-open probe (for ranking/filtering)"""
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            return now - self.opened_at >= self.reset_timeout
+        return not (self.probe_started and now - self.probe_started < self.reset_timeout)
+
+    def allow(self) -> bool:
+        """Whether a request may go out now (half-open lets one probe through at a time)"""
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                metrics.UPSTREAM_REQUESTS.inc(self.name, "rejected")
+                return False
+            self.state = self.HALF_OPEN
+        # Half-open: one probe per reset window; a stuck/cancelled probe frees up after the timeout
+        if self.probe_started and now - self.probe_started < self.reset_timeout:
+            metrics.UPSTREAM_REQUESTS.inc(self.name, "rejected")
+            return False
+        self.probe_started = now
+        return True
+
+    def record_success(self, latency: float) -> None:
+        self._observe(latency, error=False, outcome="success")
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.probe_started = 0.0
+
+    def record_abandoned(self, latency: float) -> None:
+        """A request cancelled mid-flight (e.g. it lost a hedge): its latency is at least this"""
+        self._observe(latency, error=False, outcome="abandoned")
+        self.probe_started = 0.0
+
+    def record_failure(self, latency: float) -> None:
+        self._observe(latency, error=True, outcome="error")
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                print(f"[{self.name}] Circuit open after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.probe_started = 0.0
+
+    def p95(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def score(self) -> float:
+        """
+        Lower is better: expected latency inflated by the recent error rate.
+        A source with no samples yet is assumed to take the full HTTP_TIMEOUT,
+        so it never outranks one that has answered.
+        """
+        if self.state == self.OPEN:
+            return float("inf")
+        if not self.samples:
+            return float(settings.HTTP_TIMEOUT)
+        return self.latency_ewma * (1.0 + 4.0 * self.error_ewma) + self.error_ewma
+
+    def snapshot(self) -> Dict:
+        return {
+            "state": self.state,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1),
+            "p95_ms": round(self.p95() * 1000, 1),
+            "error_rate": round(self.error_ewma, 3),
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+_stats: Dict[str, SourceStats] = {}
+
+def get_stats(name: str) -> SourceStats:
+    stats = _stats.get(name)
+    if stats is None:
+        stats = _stats[name] = SourceStats(name)
+    return stats
+
+def stats_snapshot() -> Dict[str, Dict]:
+    return {name: s.snapshot() for name, s in _stats.items()}
+
+_STATE_CODES = {SourceStats.CLOSED: 0, SourceStats.HALF_OPEN: 1, SourceStats.OPEN: 2}
+metrics.Gauge("upstream_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ("source",),
+              collect=lambda: {(n,): _STATE_CODES[s.state] for n, s in _stats.items()})
+metrics.Gauge("upstream_latency_ewma_seconds", "Smoothed provider latency", ("source",),
+              collect=lambda: {(n,): s.latency_ewma for n, s in _stats.items()})
+metrics.Gauge("upstream_error_ratio", "Smoothed provider error rate", ("source",),
+              collect=lambda: {(n,): s.error_ewma for n, s in _stats.items()})
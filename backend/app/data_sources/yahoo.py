@@ -1,5 +1,7 @@
+import time
 from typing import Optional, Dict, List
 from .base import DataSource
+from app.timeseries import Bars, as_bars
 
 class YahooFinance(DataSource):
     """Yahoo Finance data source (unofficial API)"""
@@ -28,6 +30,9 @@ class YahooFinance(DataSource):
             'volume': quote.get('regularMarketVolume')
         }
 
+    def quote_calls(self, symbols: int) -> int:
+        return 1  # one batch request
+
     async def fetch_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
         symbol_str = ','.join(symbols)
         url = f"{self.QUOTE_URL}?symbols={symbol_str}"
@@ -48,18 +53,49 @@ class YahooFinance(DataSource):
             }
         return quotes
 
-    async def fetch_sparkline(self, symbol: str, points: int = 50) -> List[float]:
-        url = f"{self.BASE_URL}/{symbol}?interval=5m&range=1d"
-        data = await self.fetch_with_retry(url)
-        if not data or 'chart' not in data:
-            return []
-        result = data['chart'].get('result', [])
+    SPARK_URL = "https://query1.finance.yahoo.com/v8/finance/spark"
+
+    @staticmethod
+    def _bars_from_chart(chart: Dict) -> Bars:
+        """Aligned timestamp/close/volume arrays from a chart result, without empty bars"""
+        quote = ((chart.get('indicators') or {}).get('quote') or [{}])[0]
+        return as_bars(
+            chart.get('timestamp') or [],
+            quote.get('close') or chart.get('close') or [],
+            quote.get('volume') or chart.get('volume'),
+        )
+
+    async def fetch_chart(self, symbol: str, interval: str = "5m", range_: str = "1d",
+                          since: Optional[int] = None) -> Bars:
+        """Intraday bars; with `since` (epoch seconds) only bars from then on are requested"""
+        if since is not None:
+            params = {'interval': interval, 'period1': since, 'period2': int(time.time())}
+        else:
+            params = {'interval': interval, 'range': range_}
+        data = await self.fetch_with_retry(f"{self.BASE_URL}/{symbol}", params=params)
+        result = (data or {}).get('chart', {}).get('result') or []
         if not result:
-            return []
-        indicators = result[0].get('indicators', {})
-        quotes = indicators.get('quote', [])
-        if not quotes:
-            return []
-        closes = quotes[0].get('close', [])
-        valid_closes = [c for c in closes if c is not None]
-        return valid_closes[-points:] if len(valid_closes) > points else valid_closes
+            return as_bars([], [])
+        return self._bars_from_chart(result[0])
+
+    async def fetch_spark(self, symbols: List[str], interval: str = "5m", range_: str = "1d") -> Dict[str, Bars]:
+        """Intraday bars for up to ~20 symbols in one request"""
+        params = {'symbols': ','.join(symbols), 'interval': interval, 'range': range_}
+        data = await self.fetch_with_retry(self.SPARK_URL, params=params)
+        if not data:
+            return {}
+        out = {}
+        if 'spark' in data:
+            for item in data['spark'].get('result') or []:
+                response = item.get('response') or []
+                if item.get('symbol') and response:
+                    out[item['symbol']] = self._bars_from_chart(response[0])
+        else:
+            for sym, chart in data.items():
+                if isinstance(chart, dict) and 'timestamp' in chart:
+                    out[sym] = self._bars_from_chart(chart)
+        return {sym: bars for sym, bars in out.items() if len(bars[0])}
+
+    async def fetch_sparkline(self, symbol: str, points: int = 50) -> List[float]:
+        _, closes, _ = await self.fetch_chart(symbol)
+        return closes[-points:].tolist()
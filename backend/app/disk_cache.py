@@ -0,0 +1,134 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PATH = Path(__file__).parent.parent / "data" / "cache.sqlite3"
+
+class DiskCache:
+    """SQLite second tier behind the in-memory caches.
+
+    Reads go straight to SQLite (off the event loop); writes are buffered and
+    flushed in batches by a background task (write-behind). When the file
+    grows past `max_bytes`, entries closest to expiry are evicted first.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, flush_interval: float):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, str], Tuple[str, float, float]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self.evictions = 0
+
+    def _connect(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " stored REAL NOT NULL, expires REAL NOT NULL, size INTEGER NOT NULL,"
+            " PRIMARY KEY (ns, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)")
+        conn.commit()
+        self._conn = conn
+
+    def _read(self, ns: str, key: str) -> Optional[Tuple[str, float, float]]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            return self._conn.execute(
+                "SELECT value, stored, expires FROM entries WHERE ns = ? AND key = ?", (ns, key)
+            ).fetchone()
+
+    async def get(self, ns: str, key: str) -> Tuple[bool, Any, float, float]:
+        """Return (found, value, age_seconds, remaining_ttl_seconds); remaining may be negative"""
+        row = self._pending.get((ns, key))
+        if row is None:
+            try:
+                row = await asyncio.to_thread(self._read, ns, key)
+            except Exception as e:
+                print(f"[disk_cache] read failed: {e}")
+                row = None
+        if row is None:
+            return False, None, 0.0, 0.0
+        payload, stored, expires = row
+        now = time.time()
+        return True, json.loads(payload), now - stored, expires - now
+
+    def put(self, ns: str, key: str, value: Any, ttl: float) -> None:
+        """Queue a value for the next batched flush"""
+        try:
+            payload = json.dumps(value)
+        except (TypeError, ValueError):
+            return
+        now = time.time()
+        self._pending[(ns, key)] = (payload, now, now + ttl)
+
+    def _write(self, batch: List[Tuple[str, str, str, float, float, int]]) -> None:
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (ns, key, value, stored, expires, size) VALUES (?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        doomed = []
+        for ns, key, size in self._conn.execute("SELECT ns, key, size FROM entries ORDER BY expires ASC"):
+            doomed.append((ns, key))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE ns = ? AND key = ?", doomed)
+        self.evictions += len(doomed)
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        batch = [
+            (ns, key, payload, stored, expires, len(payload))
+            for (ns, key), (payload, stored, expires) in pending.items()
+        ]
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except Exception as e:
+            print(f"[disk_cache] flush failed: {e}")
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def start(self) -> None:
+        if self._conn is None:
+            await asyncio.to_thread(self._connect)
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
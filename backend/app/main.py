@@ -1,9 +1,15 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+import numpy as np
 
+from app.config import settings
 from app.static_serve import mount_static
 
 from app.models import (
@@ -14,14 +20,62 @@ from app.models import (
     Mover,
     MacroEvent,
     SECHeadline,
+    Filing,
+    FredSeries,
     SessionPosture,
     PostureComponents,
     HealthStatus,
     BreadthData,
+    MiniQuote,
+    Watchlist,
+    PostureThresholds,
+    PostureBacktestRequest,
+    PostureHistorySeries,
 )
-from app.services import MarketService, WatchlistService, PostureService
+from app.services import MarketService, WatchlistService, PostureService, RefreshService, StreamHub, StreamLimitError
+from app.cache import track_stale, disk_cache
+from app.data_sources import open_clients, close_clients, stats_snapshot
+from app import metrics, shared_table
+from app.timing import TimingMiddleware, admin_allowed, profiler
+from app.rate_limit import quota_snapshot
+from app.snapshot import Snapshot, SnapshotStore, parse_since
 
-app = FastAPI(title="Market Aggregator API", version="1.0.0")
+market = MarketService()
+posture_svc = PostureService(sectors=list(MarketService.SECTORS), history_size=settings.POSTURE_HISTORY_SIZE)
+watchlists = WatchlistService()
+refresher = RefreshService(market)
+loop_lag = metrics.LoopLagMonitor(settings.METRICS_LOOP_LAG_INTERVAL)
+publisher = shared_table.SharedTablePublisher(market) if settings.SHARED_TABLE_MODE == "publisher" else None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    open_clients(s.name for s in market.all_sources())
+    await market.fred_series.load()
+    if disk_cache is not None:
+        await disk_cache.start()
+    # Readers get their sections from the publisher, so they have nothing to pre-warm
+    if settings.CACHE_PREWARM and shared_table.reader is None:
+        refresher.start()
+    if publisher is not None:
+        publisher.start()
+    loop_lag.start()
+    try:
+        yield
+    finally:
+        await loop_lag.stop()
+        if publisher is not None:
+            await publisher.stop()
+        if shared_table.reader is not None:
+            shared_table.reader.close()
+        await stream_hub.stop()
+        await watchlists.stop()
+        await refresher.stop()
+        await market.fred_series.save()
+        if disk_cache is not None:
+            await disk_cache.stop()
+        await close_clients()
+
+app = FastAPI(title="Market Aggregator API", version="1.0.0", lifespan=lifespan)
 mount_static(app)
 
 app.add_middleware(
@@ -30,10 +84,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
-
-market = MarketService()
-posture_svc = PostureService()
+app.add_middleware(TimingMiddleware)
 
 def _now_iso() -> str:
     return datetime.utcnow().isoformat()
@@ -44,18 +97,55 @@ async def root():
 
 @app.get("/api/health", response_model=HealthStatus)
 async def health():
+    """A source is up unless its last request failed or its circuit is open"""
+    sources = {src.name: src.healthy and src.stats.state != src.stats.OPEN for src in market.all_sources()}
+    quote_up = [sources[src.name] for src in market.sources]
+    status = "ok" if all(sources.values()) else ("degraded" if any(quote_up) else "down")
+    table = publisher or shared_table.reader
     return HealthStatus(
-        status="ok",
+        status=status,
         timestamp=_now_iso(),
-        sources={
-            "YahooFinance": True,
-            "AlphaVantage": True,
-            "Finnhub": True,
-            "FRED": True,
-            "SEC": True,
-        },
+        sources=sources,
+        quotas=quota_snapshot(),
+        providers=stats_snapshot(),
+        shared_table=table.stats() if table is not None else None,
     )
 
+@app.get("/api/metrics")
+async def prometheus_metrics():
+    """Prometheus text format: provider requests/latency, cache counters, rate limits, loop lag"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# ---------- admin: sampling profiler ----------
+def _require_admin(token: Optional[str]) -> None:
+    if not admin_allowed(token):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.post("/api/debug/profile")
+async def profile_arm(
+    requests: int = Query(1, ge=1, le=settings.PROFILE_MAX_REQUESTS, description="Profile the next N requests"),
+    interval: Optional[float] = Query(None, gt=0, le=1, description="Sample interval in seconds"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Attach the stack sampler to the next N requests"""
+    _require_admin(x_admin_token)
+    profiler.arm(requests, interval)
+    return {"armed": requests, "interval": profiler.interval}
+
+@app.get("/api/debug/profile")
+async def profile_list(x_admin_token: Optional[str] = Header(None)):
+    _require_admin(x_admin_token)
+    return profiler.listing()
+
+@app.get("/api/debug/profile/{profile_id}")
+async def profile_stacks(profile_id: int, x_admin_token: Optional[str] = Header(None)):
+    """Collapsed stacks (`frame;frame;frame count`) for flamegraph.pl / speedscope"""
+    _require_admin(x_admin_token)
+    result = profiler.get(profile_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(content=result["stacks"], media_type="text/plain")
+
 # ---------- helpers to coerce shapes safely ----------
 def _as_quote(item: Any) -> Quote:
     d = item if isinstance(item, dict) else {}
@@ -76,105 +166,125 @@ def _as_vix(obj: Any) -> VIXData:
         d = obj[0] if obj else {}
     return VIXData(price=float(d.get("price", 0) or 0), pct=float(d.get("pct", 0) or 0))
 
-# ---------- summary with optional live aggregation ----------
-@app.get("/api/summary", response_model=MarketSummary)
-async def summary(live: bool = Query(False, description="If true, try fetching live data with fallbacks")):
-    # Defaults (static placeholders)
-    indices: List[Quote] = []
-    vix = VIXData(price=0.0, pct=0.0)
-    breadth: Dict[str, BreadthData] = {"nyse": BreadthData(), "nasdaq": BreadthData()}
-    sectors: List[SectorData] = []
-    movers: Dict[str, List[Mover]] = {"gainers": [], "losers": [], "most_active": []}
-    macro: List[MacroEvent] = []
-    sec_headlines: List[SECHeadline] = []
-    sources: Dict[str, str] = {"indices": "static", "vix": "static", "sectors": "static", "breadth": "static", "movers": "static", "macro": "static", "sec": "static"}
-    latency_min: Dict[str, int] = {"indices": 0, "vix": 0, "sectors": 0, "breadth": 0, "movers": 0, "macro": 0, "sec": 0}
+# ---------- per-section fetchers (return (raw, source)) and builders (raw -> models; None keeps the default) ----------
+async def _fetch_macro():
+    return await market.get_macro_calendar(), "FRED"
 
-    if live:
-        # Try each fetcher, swallow errors, keep any wins
-        try:
-            idx_raw, s = await market.get_indices()
-            if isinstance(idx_raw, list):
-                indices = [_as_quote(i) for i in idx_raw]
-            sources["indices"] = s
-        except Exception:
-            pass
+async def _fetch_sec():
+    return await market.get_sec_headlines(), "SECEdgar"
 
-        try:
-            vix_raw, s = await market.get_vix()
-            vix = _as_vix(vix_raw)
-            sources["vix"] = s
-        except Exception:
-            pass
+def _build_indices(idx_raw):
+    return [_as_quote(i) for i in idx_raw] if isinstance(idx_raw, list) else None
 
+def _build_sectors(secs_raw):
+    if not isinstance(secs_raw, list):
+        return None
+    buf = []
+    for x in secs_raw:
+        if not isinstance(x, dict): 
+            continue
         try:
-            secs_raw, s = await market.get_sectors()
-            if isinstance(secs_raw, list):
-                buf = []
-                for x in secs_raw:
-                    if not isinstance(x, dict): 
-                        continue
-                    try:
-                        buf.append(SectorData(symbol=str(x.get("symbol","")), name=str(x.get("name","")), pct=float(x.get("pct",0) or 0)))
-                    except Exception:
-                        continue
-                sectors = buf
-            sources["sectors"] = s
+            buf.append(SectorData(symbol=str(x.get("symbol","")), name=str(x.get("name","")), pct=float(x.get("pct",0) or 0), source=x.get("source")))
         except Exception:
-            pass
+            continue
+    return buf
 
-        try:
-            br_raw, s = await market.get_breadth()
-            if isinstance(br_raw, dict):
-                breadth = {
-                    "nyse": BreadthData(**(br_raw.get("nyse") or {})),
-                    "nasdaq": BreadthData(**(br_raw.get("nasdaq") or {})),
-                }
-            sources["breadth"] = s
-        except Exception:
-            pass
+def _build_breadth(br_raw):
+    if not isinstance(br_raw, dict):
+        return None
+    return {
+        "nyse": BreadthData(**(br_raw.get("nyse") or {})),
+        "nasdaq": BreadthData(**(br_raw.get("nasdaq") or {})),
+    }
 
-        try:
-            mv_raw, s = await market.get_movers()
-            if isinstance(mv_raw, dict):
-                out: Dict[str, List[Mover]] = {"gainers": [], "losers": [], "most_active": []}
-                for bucket in out.keys():
-                    lst = mv_raw.get(bucket, []) or []
-                    safe = []
-                    for m in lst:
-                        if not isinstance(m, dict): 
-                            continue
-                        try:
-                            safe.append(Mover(symbol=str(m.get("symbol","")), price=float(m.get("price",0) or 0), pct=float(m.get("pct",0) or 0), vol=int(m.get("vol",0) or 0)))
-                        except Exception:
-                            continue
-                    out[bucket] = safe
-                movers = out
-            sources["movers"] = s
-        except Exception:
-            pass
+def _build_movers(mv_raw):
+    if not isinstance(mv_raw, dict):
+        return None
+    out: Dict[str, List[Mover]] = {"gainers": [], "losers": [], "most_active": []}
+    for bucket in out.keys():
+        lst = mv_raw.get(bucket, []) or []
+        safe = []
+        for m in lst:
+            if not isinstance(m, dict): 
+                continue
+            try:
+                safe.append(Mover(symbol=str(m.get("symbol","")), price=float(m.get("price",0) or 0), pct=float(m.get("pct",0) or 0), vol=int(m.get("vol",0) or 0)))
+            except Exception:
+                continue
+        out[bucket] = safe
+    return out
+
+def _build_macro(macro_raw):
+    return [MacroEvent(time=str(m.get("time","")), label=str(m.get("label","")), url=m.get("url")) for m in (macro_raw or []) if isinstance(m, dict)]
+
+def _build_sec(sec_raw):
+    return [SECHeadline(time=str(h.get("time","")), title=str(h.get("title","")), url=str(h.get("url",""))) for h in (sec_raw or []) if isinstance(h, dict)]
+
+# name -> (fetch, build); fetchers resolve `market` at call time
+SECTIONS = {
+    "indices": (lambda: market.get_indices(), _build_indices),
+    "vix": (lambda: market.get_vix(), _as_vix),
+    "sectors": (lambda: market.get_sectors(), _build_sectors),
+    "breadth": (lambda: market.get_breadth(), _build_breadth),
+    "movers": (lambda: market.get_movers(), _build_movers),
+    "macro": (_fetch_macro, _build_macro),
+    "sec": (_fetch_sec, _build_sec),
+}
 
+async def _run_section(name: str, budget: float) -> Tuple[Any, Optional[str], int, bool, bool]:
+    """Fetch one section under its budget -> (raw, source, latency_ms, timed_out, stale)"""
+    t0 = time.perf_counter()
+    raw, source, timed_out = None, None, False
+    with track_stale() as stale_reads:
         try:
-            macro_raw = await market.get_macro_calendar()
-            macro = [MacroEvent(time=str(m.get("time","")), label=str(m.get("label","")), url=m.get("url")) for m in (macro_raw or []) if isinstance(m, dict)]
-            sources["macro"] = "FRED"
-        except Exception:
-            pass
+            raw, source = await asyncio.wait_for(SECTIONS[name][0](), timeout=budget)
+        except asyncio.TimeoutError:
+            timed_out = True
+        except Exception as e:
+            print(f"[summary] {name} failed: {e}")
+    return raw, source, int((time.perf_counter() - t0) * 1000), timed_out, bool(stale_reads)
 
+def _build_summary(raw: Dict[str, Any], sources: Dict[str, str], latency_min: Dict[str, int],
+                   timed_out: List[str], stale: List[str]) -> MarketSummary:
+    # Defaults (static placeholders)
+    values: Dict[str, Any] = {
+        "indices": [],
+        "vix": VIXData(price=0.0, pct=0.0),
+        "breadth": {"nyse": BreadthData(), "nasdaq": BreadthData()},
+        "sectors": [],
+        "movers": {"gainers": [], "losers": [], "most_active": []},
+        "macro": [],
+        "sec": [],
+    }
+    sources = dict(sources)
+    for name, value in raw.items():
         try:
-            sec_raw = await market.get_sec_headlines()
-            sec_headlines = [SECHeadline(time=str(h.get("time","")), title=str(h.get("title","")), url=str(h.get("url",""))) for h in (sec_raw or []) if isinstance(h, dict)]
-            sources["sec"] = "SECEdgar"
-        except Exception:
-            pass
+            built = SECTIONS[name][1](value)
+        except Exception as e:
+            print(f"[summary] {name} malformed: {e}")
+            sources[name] = "static"
+            continue
+        if built is not None:
+            values[name] = built
+
+    indices: List[Quote] = values["indices"]
+    vix: VIXData = values["vix"]
+    breadth: Dict[str, BreadthData] = values["breadth"]
+    sectors: List[SectorData] = values["sectors"]
+    movers: Dict[str, List[Mover]] = values["movers"]
+    macro: List[MacroEvent] = values["macro"]
+    sec_headlines: List[SECHeadline] = values["sec"]
 
     # posture: compute from whatever we have (safe defaults if empty)
+    posture_inputs = dict(
+        breadth={k: v.model_dump() for k,v in breadth.items()},
+        sectors=[{"symbol": s.symbol, "pct": s.pct} for s in sectors if s.source is not None],
+        vix_data={"pct": vix.pct},
+    )
+    if raw:
+        posture_svc.record(**posture_inputs)
     try:
-        session_posture: SessionPosture = posture_svc.calculate(
-            breadth={k: v.model_dump() for k,v in breadth.items()},
-            sectors=[{"pct": s.pct} for s in sectors],
-            vix_data={"pct": vix.pct},
-        )
+        session_posture: SessionPosture = posture_svc.calculate(**posture_inputs)
     except Exception:
         session_posture = SessionPosture(
             score=0.0,
@@ -195,5 +305,269 @@ async def summary(live: bool = Query(False, description="If true, try fetching l
         macro=macro,
         sec_headlines=sec_headlines,
         session_posture=session_posture,
-        notes=[],
+        timed_out=timed_out,
+        stale=stale,
+        notes=[f"Timed out (static defaults used): {', '.join(timed_out)}"] if timed_out else [],
+    )
+
+# One versioned snapshot per mode (live / static). Reader workers each number their own
+# versions, so with several of them a delta needs the base's digest (its ETag) to be safe.
+_multi_worker = settings.SHARED_TABLE_MODE == "reader"
+summary_snapshots: Dict[bool, SnapshotStore] = {
+    True: SnapshotStore(history=settings.SUMMARY_HISTORY, require_digest=_multi_worker),
+    False: SnapshotStore(history=settings.SUMMARY_HISTORY, require_digest=_multi_worker),
+}
+
+async def summary_snapshot(live: bool) -> Snapshot:
+    """
+    Fetch every section, then rebuild/re-serialize the summary only if the
+    fetched data changed since the last snapshot. `as_of` and `latency_min`
+    describe the fetch that produced the snapshot. The static summary fetches
+    nothing, so it is rebuilt once per SUMMARY_STATIC_TTL window instead.
+    """
+    raw: Dict[str, Any] = {}
+    sources: Dict[str, str] = {name: "static" for name in SECTIONS}
+    latency_min: Dict[str, int] = {name: 0 for name in SECTIONS}
+    timed_out: List[str] = []
+    stale: List[str] = []
+
+    if live:
+        # Fan out all sections at once; each gets its own budget, capped by the overall deadline
+        deadline = settings.SUMMARY_DEADLINE
+        names = list(SECTIONS)
+        results = await asyncio.gather(*(
+            _run_section(name, min(settings.SUMMARY_SECTION_BUDGETS.get(name, deadline), deadline))
+            for name in names
+        ))
+        for name, (value, source, latency, late, was_stale) in zip(names, results):
+            latency_min[name] = latency
+            if late:
+                timed_out.append(name)
+                continue
+            if was_stale:
+                stale.append(name)
+            if source is not None:
+                sources[name] = source
+            if value is not None:
+                raw[name] = value
+
+    fingerprint = (raw, sources, timed_out, stale)
+    if not live and settings.SUMMARY_STATIC_TTL > 0:
+        fingerprint += (int(time.time() // settings.SUMMARY_STATIC_TTL),)
+    return summary_snapshots[live].get_or_build(
+        fingerprint, lambda: _build_summary(raw, sources, latency_min, timed_out, stale)
+    )
+
+# ---------- summary with optional live aggregation ----------
+@app.get("/api/summary", response_model=MarketSummary)
+async def summary(
+    request: Request,
+    live: bool = Query(False, description="If true, try fetching live data with fallbacks"),
+    since: Optional[str] = Query(None, description="ETag (or bare version) the client holds; returns a JSON merge patch from it (or the full document if it has expired or does not match)"),
+):
+    snap = await summary_snapshot(live)
+    headers = {"ETag": snap.etag, "Cache-Control": "no-cache", "X-Summary-Version": str(snap.version)}
+    if snap.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    if since is not None:
+        headers.pop("ETag")
+        try:
+            base, digest = parse_since(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="since must be a version or an ETag")
+        return Response(content=summary_snapshots[live].delta_since(base, digest), media_type="application/json", headers=headers)
+    return Response(content=snap.body, media_type="application/json", headers=headers)
+
+@app.get("/api/miniquotes", response_model=List[MiniQuote])
+async def miniquotes(
+    symbols: str = Query(..., description="Comma-separated symbols, e.g., AAPL,MSFT"),
+    interval: str = Query(settings.SPARKLINE_INTERVAL, description="Bar interval for sparklines, e.g., 5m"),
+):
+    syms = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    if not syms:
+        raise HTTPException(status_code=400, detail="No symbols provided")
+
+    # Quotes and all sparklines load concurrently
+    (quotes, _src), sparks = await asyncio.gather(
+        market.fetch_with_fallback(syms),
+        market.sparklines.get_many(syms, interval=interval),
+    )
+
+    results: List[MiniQuote] = []
+    for s in syms:
+        q = quotes.get(s, {"symbol": s, "price": 0.0, "pct": 0.0, "volume": None})
+        results.append(
+            MiniQuote(
+                symbol=s,
+                price=float(q.get("price", 0.0) or 0.0),
+                pct=float(q.get("pct", 0.0) or 0.0),
+                volume=q.get("volume"),
+                sparkline=[float(x) for x in sparks.get(s, [])],
+            )
+        )
+    return results
+
+# ---------- SEC filings ----------
+def _csv_param(value: Optional[str]) -> Optional[List[str]]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+@app.get("/api/filings", response_model=List[Filing])
+async def filings(
+    limit: int = Query(50, ge=1, le=settings.SEC_STORE_SIZE),
+    symbols: Optional[str] = Query(None, description="Comma-separated tickers"),
+    cik: Optional[str] = Query(None, description="Comma-separated CIKs"),
+    form: Optional[str] = Query(None, description="Comma-separated form types, e.g. 8-K,10-Q"),
+    watchlist: Optional[str] = Query(None, description="Only filings for this watchlist's symbols"),
+):
+    """Recent EDGAR filings from the local store, newest first"""
+    await market.get_sec_headlines()  # cached; ingests new feed entries when expired
+    tickers = _csv_param(symbols)
+    if watchlist is not None:
+        tickers = (tickers or []) + [item.symbol for item in watchlists.get(_watchlist_name(watchlist)).symbols]
+    return await market.filings.latest(limit, symbols=tickers, ciks=_csv_param(cik), forms=_csv_param(form))
+
+# ---------- FRED series ----------
+@app.get("/api/fred", response_model=List[FredSeries])
+async def fred_series(
+    series: str = Query(..., description="Comma-separated FRED series ids, e.g. VIXCLS,DGS10"),
+    points: int = Query(0, ge=0, le=settings.FRED_CAPACITY, description="Trailing observations to include"),
+):
+    """Latest values (and optional history) from the local FRED store, synced in one batch"""
+    ids = [s.upper() for s in _csv_param(series) or []]
+    if not ids or len(ids) > settings.FRED_MAX_SERIES:
+        raise HTTPException(status_code=400, detail=f"Provide 1-{settings.FRED_MAX_SERIES} series ids")
+    await market.fred_series.sync(ids, max_age=settings.FRED_SYNC_INTERVAL)
+    out = []
+    for series_id in ids:
+        latest = market.fred_series.latest(series_id) or {"series_id": series_id}
+        history = market.fred_series.history(series_id, points) if points else {}
+        out.append(FredSeries(**latest, **history))
+    return out
+
+# ---------- live posture ----------
+@app.get("/api/posture", response_model=SessionPosture)
+async def live_posture():
+    """Posture from the latest sector/VIX/breadth ticks, without waiting on a summary round"""
+    if shared_table.reader is not None:
+        published = shared_table.reader.posture()
+        if published is not None:
+            return SessionPosture(**published)
+    return market.live_posture.current()
+
+# ---------- posture history / backtests ----------
+def _posture_series(timestamps: List[str], result: Dict[str, Any], thresholds: Dict[str, float]) -> PostureHistorySeries:
+    return PostureHistorySeries(
+        timestamps=timestamps,
+        score=result["score"].tolist(),
+        label=result["label"].tolist(),
+        components={k: result[k].tolist() for k in ("breadth", "dispersion", "vol_overlay")},
+        thresholds=PostureService.thresholds(thresholds),
+    )
+
+def _threshold_overrides(t: PostureThresholds) -> Dict[str, float]:
+    return {k.upper(): v for k, v in t.model_dump().items() if v is not None}
+
+@app.get("/api/posture/history", response_model=PostureHistorySeries)
+async def posture_history(
+    limit: int = Query(1000, ge=1, le=settings.POSTURE_HISTORY_SIZE, description="Most recent snapshots to score"),
+    high_participation: Optional[float] = None,
+    low_participation: Optional[float] = None,
+    low_dispersion: Optional[float] = None,
+    high_dispersion: Optional[float] = None,
+    risk_on: Optional[float] = None,
+    risk_off: Optional[float] = None,
+):
+    """Re-score recorded summary snapshots, optionally with what-if thresholds"""
+    overrides = _threshold_overrides(PostureThresholds(
+        high_participation=high_participation, low_participation=low_participation,
+        low_dispersion=low_dispersion, high_dispersion=high_dispersion,
+        risk_on=risk_on, risk_off=risk_off,
+    ))
+    hist = posture_svc.history.arrays() if posture_svc.history is not None else None
+    if hist is None or not len(hist["timestamps"]):
+        return _posture_series([], PostureService.calculate_batch(np.empty((0, 4)), np.empty((0, 0)), np.empty(0)), overrides)
+    rows = slice(-limit, None)
+    result = PostureService.calculate_batch(hist["breadth"][rows], hist["sectors"][rows], hist["vix_pct"][rows], overrides)
+    stamps = [datetime.utcfromtimestamp(t).isoformat() for t in hist["timestamps"][rows]]
+    return _posture_series(stamps, result, overrides)
+
+@app.post("/api/posture/history", response_model=PostureHistorySeries)
+async def posture_backtest(req: PostureBacktestRequest):
+    """Score caller-supplied historical snapshots in one vectorized pass"""
+    t = len(req.sectors)
+    width = max((len(r) for r in req.sectors), default=0)
+    sectors = np.full((t, width), np.nan)
+    for i, row in enumerate(req.sectors):
+        sectors[i, :len(row)] = [np.nan if x is None else x for x in row]
+    breadth = np.array(req.breadth, dtype=float) if req.breadth else np.full((t, 4), np.nan)
+    vix = np.array(req.vix_pct, dtype=float) if req.vix_pct else np.zeros(t)
+    if breadth.shape != (t, 4) or vix.shape != (t,):
+        raise HTTPException(status_code=400, detail="breadth must be T x 4 and vix_pct length T (T = len(sectors))")
+    overrides = _threshold_overrides(req.thresholds)
+    result = PostureService.calculate_batch(breadth, sectors, vix, overrides)
+    return _posture_series(req.timestamps or [str(i) for i in range(t)], result, overrides)
+
+# ---------- watchlists ----------
+def _watchlist_name(name: str) -> str:
+    try:
+        return WatchlistService.validate_name(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/watchlists", response_model=List[str])
+async def wl_names():
+    return watchlists.names()
+
+@app.get("/api/watchlist", response_model=Watchlist)
+async def wl_get(name: str = Query("default", description="Watchlist name")):
+    return watchlists.get(_watchlist_name(name))
+
+@app.post("/api/watchlist", response_model=Watchlist)
+async def wl_add(items: List[Dict], name: str = Query("default", description="Watchlist name")):
+    return watchlists.add_symbols(items, _watchlist_name(name))
+
+@app.put("/api/watchlist", response_model=Watchlist)
+async def wl_replace(items: List[Dict], name: str = Query("default", description="Watchlist name")):
+    return watchlists.replace(items, _watchlist_name(name))
+
+@app.delete("/api/watchlist/{symbol}", response_model=Watchlist)
+async def wl_delete(symbol: str, name: str = Query("default", description="Watchlist name")):
+    result = watchlists.remove_symbol(symbol, _watchlist_name(name))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Watchlist not found")
+    return result
+
+# ---------- push stream of summary / quote deltas ----------
+async def _stream_summary_state() -> Dict[str, Any]:
+    snap = (await summary_snapshot(True)).model
+    return {
+        "indices": {q.symbol: {"price": q.price, "pct": q.pct} for q in snap.indices},
+        "vix": {"price": snap.vix.price, "pct": snap.vix.pct},
+        "sectors": {s.symbol: {"pct": s.pct} for s in snap.sectors},
+        "posture": snap.session_posture.model_dump(exclude={"notes"}),
+    }
+
+def _stream_quotes_loader(symbols):
+    syms = sorted(symbols)
+    async def load() -> Dict[str, Any]:
+        quotes, _src = await market.fetch_with_fallback(syms)
+        return {s: {"price": q.get("price"), "pct": q.get("pct"), "volume": q.get("volume")} for s, q in quotes.items()}
+    return load
+
+stream_hub = StreamHub(_stream_summary_state, _stream_quotes_loader)
+
+@app.get("/api/stream")
+async def stream(symbols: str = Query("", description="Optional comma-separated symbols for quote deltas")):
+    """Server-sent events: a `snapshot` per topic, then `delta` events (JSON merge patches) as data changes"""
+    syms = frozenset(s.strip().upper() for s in symbols.split(",") if s.strip())
+    if len(syms) > settings.STREAM_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.STREAM_MAX_SYMBOLS} symbols per stream")
+    try:
+        stream_hub.check(syms)
+    except StreamLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return StreamingResponse(
+        stream_hub.events(syms),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 from datetime import datetime
 
 class Quote(BaseModel):
@@ -25,6 +25,7 @@ class SectorData(BaseModel):
     symbol: str
     name: str
     pct: float
+    source: Optional[str] = None  # provider that supplied the quote; None if no provider had it
 
 class Mover(BaseModel):
     symbol: str
@@ -42,6 +43,23 @@ class SECHeadline(BaseModel):
     title: str
     url: str
 
+class Filing(BaseModel):
+    id: str
+    time: str
+    title: str
+    url: str
+    form: Optional[str] = None
+    company: Optional[str] = None
+    cik: Optional[str] = None
+
+class FredSeries(BaseModel):
+    series_id: str
+    date: Optional[str] = None
+    value: Optional[float] = None
+    prev: Optional[float] = None
+    dates: List[str] = Field(default_factory=list)
+    values: List[float] = Field(default_factory=list)
+
 class PostureComponents(BaseModel):
     breadth: float
     dispersion: float
@@ -53,10 +71,32 @@ class SessionPosture(BaseModel):
     components: PostureComponents
     notes: List[str]
 
+class PostureThresholds(BaseModel):
+    high_participation: Optional[float] = None
+    low_participation: Optional[float] = None
+    low_dispersion: Optional[float] = None
+    high_dispersion: Optional[float] = None
+    risk_on: Optional[float] = None
+    risk_off: Optional[float] = None
+
+class PostureBacktestRequest(BaseModel):
+    timestamps: List[str] = Field(default_factory=list)
+    sectors: List[List[Optional[float]]]  # T rows of sector % changes (null = missing)
+    breadth: Optional[List[List[Optional[float]]]] = None  # T rows of [nyse_adv, nyse_dec, nasdaq_adv, nasdaq_dec]
+    vix_pct: Optional[List[float]] = None
+    thresholds: PostureThresholds = Field(default_factory=PostureThresholds)
+
+class PostureHistorySeries(BaseModel):
+    timestamps: List[str]
+    score: List[float]
+    label: List[str]
+    components: Dict[str, List[float]]
+    thresholds: Dict[str, float]
+
 class MarketSummary(BaseModel):
     as_of: str
     sources: Dict[str, str]
-    latency_min: Dict[str, int]
+    latency_min: Dict[str, int]  # measured per-section fetch latency (ms)
     indices: List[Quote]
     vix: VIXData
     breadth: Dict[str, BreadthData]
@@ -65,6 +105,8 @@ class MarketSummary(BaseModel):
     macro: List[MacroEvent]
     sec_headlines: List[SECHeadline]
     session_posture: SessionPosture
+    timed_out: List[str] = Field(default_factory=list)
+    stale: List[str] = Field(default_factory=list)
     notes: List[str]
 
 class WatchlistItem(BaseModel):
@@ -87,3 +129,6 @@ class HealthStatus(BaseModel):
     status: str
     timestamp: str
     sources: Dict[str, bool]
+    quotas: Dict[str, Dict[str, int]] = Field(default_factory=dict)
+    providers: Dict[str, Dict[str, Any]] = Field(default_factory=dict)  # circuit state, latency, error rate
+    shared_table: Optional[Dict[str, Any]] = None  # SHARED_TABLE_MODE publisher/reader status
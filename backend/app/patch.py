@@ -0,0 +1,49 @@
+from typing import Any, Dict
+
+class NullValueError(ValueError):
+    """A changed value is null, which a merge patch would apply as a key removal"""
+
+def _check_no_null_members(value: Any, key: str) -> None:
+    """Patched objects are merged recursively, so nulls nested in them read as removals too"""
+    if value is None:
+        raise NullValueError(key)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            _check_no_null_members(v, f"{key}.{k}")
+
+def merge_diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    JSON Merge Patch (RFC 7396) that turns `old` into `new`: changed keys only,
+    None = removed. Raises NullValueError when a key changes to null, since
+    the patch cannot say so; callers send the full document instead.
+    """
+    patch: Dict[str, Any] = {}
+    for key, value in new.items():
+        if key not in old:
+            _check_no_null_members(value, key)
+            patch[key] = value
+            continue
+        prev = old[key]
+        if isinstance(prev, dict) and isinstance(value, dict):
+            sub = merge_diff(prev, value)
+            if sub:
+                patch[key] = sub
+        elif prev != value:
+            _check_no_null_members(value, key)
+            patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """Apply a JSON Merge Patch (RFC 7396) and return the result (inputs are not modified)"""
+    if not isinstance(patch, dict):
+        return patch
+    out = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            out.pop(key, None)
+        else:
+            out[key] = apply_merge_patch(out.get(key), value)
+    return out
@@ -0,0 +1,57 @@
+"""Headless fetcher for multi-worker deployments.
+
+    cd backend
+    python -m app.publisher &
+    SHARED_TABLE_MODE=reader uvicorn app.main:app --workers 8
+
+Runs the only MarketService that talks to providers and publishes its
+sections, requested quotes and live posture to the shared table that
+SHARED_TABLE_MODE=reader workers serve from.
+"""
+import asyncio
+import os
+import signal
+
+# Workers may share this .env with SHARED_TABLE_MODE=reader; this process always publishes
+os.environ["SHARED_TABLE_MODE"] = "publisher"
+
+from app.config import settings
+from app.cache import disk_cache
+from app.data_sources import open_clients, close_clients
+from app.services import MarketService, RefreshService
+from app.shared_table import SharedTablePublisher
+
+async def main() -> None:
+    market = MarketService()
+    refresher = RefreshService(market)
+    publisher = SharedTablePublisher(market)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # Windows: Ctrl+C raises KeyboardInterrupt instead
+            pass
+
+    open_clients(s.name for s in market.all_sources())
+    await market.fred_series.load()
+    if disk_cache is not None:
+        await disk_cache.start()
+    if settings.CACHE_PREWARM:
+        refresher.start()
+    publisher.start()
+    try:
+        await stop.wait()
+    finally:
+        await publisher.stop()
+        await refresher.stop()
+        await market.fred_series.save()
+        if disk_cache is not None:
+            await disk_cache.stop()
+        await close_clients()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
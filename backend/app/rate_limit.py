@@ -0,0 +1,123 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict
+from app.config import settings
+from app import metrics
+
+class QuotaExceeded(Exception):
+    """Raised when a provider's daily request quota is used up"""
+
+class RateLimiter:
+    """Per-provider token bucket (requests/min), daily quota and concurrency cap.
+
+    `async with limiter:` waits for a free concurrency slot and a token, in
+    FIFO order, so batch callers can fire every request at once and let the
+    limiter queue whatever the quota does not allow yet. A limit of 0 means
+    unlimited.
+    """
+
+    def __init__(self, name: str, per_minute: int = 0, per_day: int = 0, max_concurrency: int = 8):
+        self.name = name
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.max_concurrency = max(1, max_concurrency)
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self._lock = asyncio.Lock()
+        self._tokens = float(per_minute)
+        self._refilled = time.monotonic()
+        self._day = self._today()
+        self._day_used = 0
+        self.waiting = 0
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).date().isoformat()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.per_minute:
+            self._tokens = min(float(self.per_minute), self._tokens + (now - self._refilled) * self.per_minute / 60.0)
+        self._refilled = now
+        today = self._today()
+        if today != self._day:
+            self._day, self._day_used = today, 0
+
+    async def _take_token(self) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.per_day and self._day_used >= self.per_day:
+                    raise QuotaExceeded(f"{self.name} daily quota of {self.per_day} used")
+                if not self.per_minute or self._tokens >= 1:
+                    break
+                await asyncio.sleep((1 - self._tokens) * 60.0 / self.per_minute)
+            if self.per_minute:
+                self._tokens -= 1
+            self._day_used += 1
+
+    async def __aenter__(self):
+        self.waiting += 1
+        try:
+            await self._sem.acquire()
+            try:
+                await self._take_token()
+            except BaseException:
+                self._sem.release()
+                raise
+        finally:
+            self.waiting -= 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self._sem.release()
+        return False
+
+    def delay_for(self, calls: int) -> float:
+        """Seconds until `calls` more requests could all start (inf if the daily quota can't cover them)"""
+        self._refill()
+        if self.per_day and self.per_day - self._day_used < calls:
+            return float("inf")
+        if not self.per_minute:
+            return 0.0
+        return max(0.0, calls - self._tokens) * 60.0 / self.per_minute
+
+    def remaining(self) -> Dict[str, int]:
+        self._refill()
+        return {
+            "minute": int(self._tokens) if self.per_minute else -1,
+            "day": max(0, self.per_day - self._day_used) if self.per_day else -1,
+            "in_flight": self.max_concurrency - self._sem._value,
+            "queued": self.waiting,
+        }
+
+_limiters: Dict[str, RateLimiter] = {}
+
+def get_limiter(name: str) -> RateLimiter:
+    """Return the shared limiter for a provider, configured from RATE_LIMITS"""
+    limiter = _limiters.get(name)
+    if limiter is None:
+        cfg = settings.RATE_LIMITS.get(name, {})
+        limiter = RateLimiter(
+            name,
+            per_minute=cfg.get("per_minute", 0),
+            per_day=cfg.get("per_day", 0),
+            max_concurrency=cfg.get("max_concurrency", 8),
+        )
+        _limiters[name] = limiter
+    return limiter
+
+def quota_snapshot() -> Dict[str, Dict[str, int]]:
+    return {name: limiter.remaining() for name, limiter in _limiters.items()}
+
+def _quota_gauge() -> Dict:
+    out = {}
+    for name, remaining in quota_snapshot().items():
+        for window in ("minute", "day"):
+            if remaining[window] >= 0:
+                out[(name, window)] = remaining[window]
+    return out
+
+metrics.Gauge("rate_limit_remaining", "Requests left in the current window", ("source", "window"), collect=_quota_gauge)
+metrics.Gauge("rate_limit_queued", "Requests waiting on the limiter", ("source",),
+              collect=lambda: {(n,): q["queued"] for n, q in quota_snapshot().items()})
@@ -1,5 +1,9 @@
 from .market_service import MarketService
 from .watchlist_service import WatchlistService
 from .posture_service import PostureService
+from .refresh_service import RefreshService
+from .sparkline_service import SparklineService
+from .stream_service import StreamHub, StreamLimitError
+from .filing_service import FilingService
 
-__all__ = ["MarketService", "WatchlistService", "PostureService"]
+__all__ = ["MarketService", "WatchlistService", "PostureService", "RefreshService", "SparklineService", "StreamHub", "StreamLimitError", "FilingService"]
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from app.config import settings
+from app.data_sources import SECEdgar
+
+class FilingStore:
+    """Bounded, id-deduplicated store of EDGAR filings, oldest evicted first"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._filings: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._filings)
+
+    def ingest(self, filings: List[Dict]) -> int:
+        """Add filings given newest first; returns how many were new"""
+        added = 0
+        for f in reversed(filings):
+            if f["id"] in self._filings:
+                continue
+            self._filings[f["id"]] = f
+            added += 1
+        while len(self._filings) > self.capacity:
+            self._filings.popitem(last=False)
+        return added
+
+    def latest(self, limit: int, ciks: Optional[Iterable[str]] = None, forms: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Newest filings first, optionally only for the given CIKs / form types"""
+        ciks = set(ciks) if ciks is not None else None
+        forms = {f.upper() for f in forms} if forms else None
+        out = []
+        for f in reversed(self._filings.values()):
+            if ciks is not None and f.get("cik") not in ciks:
+                continue
+            if forms is not None and (f.get("form") or "").upper() not in forms:
+                continue
+            out.append(f)
+            if len(out) >= limit:
+                break
+        return out
+
+class FilingService:
+    """
+    Keeps a local store of recent EDGAR filings. Each ingest is a conditional
+    request for the current-events feed, so an unchanged feed costs a 304 and
+    no parsing; new entries are merged by id.
+    """
+
+    def __init__(self, sec: SECEdgar, capacity: Optional[int] = None):
+        self.sec = sec
+        self.store = FilingStore(capacity or settings.SEC_STORE_SIZE)
+        self._tickers: Dict[str, str] = {}
+        self._tickers_loaded = 0.0
+        self.ingested_at: Optional[float] = None
+
+    async def ingest(self) -> int:
+        filings = await self.sec.fetch_filings(count=settings.SEC_FEED_COUNT)
+        self.ingested_at = time.time()
+        if not filings:
+            return 0
+        return self.store.ingest(filings)
+
+    async def ciks_for(self, symbols: Iterable[str]) -> List[str]:
+        """Map tickers to CIKs via SEC's ticker file (refreshed at most every SEC_TICKER_TTL seconds)"""
+        if time.monotonic() - self._tickers_loaded > settings.SEC_TICKER_TTL or not self._tickers:
+            tickers = await self.sec.fetch_ticker_map()
+            if tickers:
+                self._tickers = tickers
+            if self._tickers:
+                self._tickers_loaded = time.monotonic()
+        return [self._tickers[s.upper()] for s in symbols if s.upper() in self._tickers]
+
+    async def latest(self, limit: int, symbols: Optional[Iterable[str]] = None, ciks: Optional[Iterable[str]] = None,
+                     forms: Optional[Iterable[str]] = None) -> List[Dict]:
+        wanted = None
+        if symbols is not None or ciks is not None:
+            wanted = [f"{int(c):010d}" for c in (ciks or []) if str(c).isdigit()]
+            if symbols:
+                wanted += await self.ciks_for(symbols)
+        return self.store.latest(limit, ciks=wanted, forms=forms)
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from app.config import settings
+from app.data_sources import FRED
+from app.timeseries import IntradayStore
+
+DEFAULT_FRED_PATH = Path(__file__).parent.parent.parent / "data" / "fred_series.npz"
+
+# FRED is daily; every series lives under this interval key in the store
+INTERVAL = "1d"
+# Most series are daily/monthly with far fewer rows than FRED_CAPACITY: buffers start here and double as needed
+INITIAL_ROWS = 64
+
+def _date(ts: int) -> str:
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime("%Y-%m-%d")
+
+class FredSeriesService:
+    """
+    Local FRED observation store. Each sync asks FRED only for observations
+    from the last stored date on (that date is re-sent so revisions land), and
+    latest-value lookups read the tail of the in-memory ring buffer in O(1).
+    The store is saved to FRED_STORE_PATH on shutdown and loaded on startup.
+    """
+
+    def __init__(self, fred: FRED, store: Optional[IntradayStore] = None):
+        self.fred = fred
+        self.store = store or IntradayStore(settings.FRED_CAPACITY, settings.FRED_MAX_SERIES, INITIAL_ROWS)
+        self.path = Path(settings.FRED_STORE_PATH) if settings.FRED_STORE_PATH else DEFAULT_FRED_PATH
+        # series_id -> monotonic time of the last successful sync
+        self._synced: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def start_date(self, series_id: str) -> Optional[str]:
+        buf = self.store.get(series_id, INTERVAL)
+        return _date(buf.last_timestamp) if buf is not None and buf.size else None
+
+    async def sync(self, series_ids: Iterable[str], max_age: float = 0.0) -> int:
+        """
+        Fetch new observations for every series not synced within `max_age`
+        seconds, in one batched call. Returns how many new rows were stored.
+        """
+        now = time.monotonic()
+        ids = list(dict.fromkeys(s.upper() for s in series_ids))
+        due = [s for s in ids if s not in self._inflight and now - self._synced.get(s, -1e18) >= max_age]
+        waiting = [self._inflight[s] for s in ids if s in self._inflight]
+        added = 0
+        if due:
+            task = asyncio.ensure_future(self.fred.fetch_observations_many({s: self.start_date(s) for s in due}))
+            for s in due:
+                self._inflight[s] = task
+            try:
+                results = await asyncio.shield(task)
+            finally:
+                for s in due:
+                    self._inflight.pop(s, None)
+            synced_at = time.monotonic()
+            for series_id, bars in results.items():
+                if len(bars[0]):
+                    buf = self.store.get(series_id, INTERVAL)
+                    last = buf.last_timestamp if buf is not None else None
+                    self.store.extend(series_id, INTERVAL, bars)
+                    added += len(bars[0]) if last is None else int(np.count_nonzero(bars[0] > last))
+                self._synced[series_id] = synced_at
+        if waiting:
+            await asyncio.gather(*(asyncio.shield(t) for t in set(waiting)), return_exceptions=True)
+        return added
+
+    def latest(self, series_id: str) -> Optional[Dict]:
+        """Last observation and the one before it, from memory"""
+        tail = self.store.tail(series_id.upper(), INTERVAL, 2)
+        if tail is None or not len(tail[0]):
+            return None
+        t, v, _ = tail
+        return {
+            "series_id": series_id.upper(),
+            "date": _date(t[-1]),
+            "value": float(v[-1]),
+            "prev": float(v[-2]) if len(v) > 1 else None,
+        }
+
+    def history(self, series_id: str, n: Optional[int] = None) -> Dict[str, List]:
+        tail = self.store.tail(series_id.upper(), INTERVAL, n)
+        if tail is None:
+            return {"dates": [], "values": []}
+        t, v, _ = tail
+        return {
+            "dates": np.datetime_as_string(t.astype("datetime64[s]"), unit="D").tolist(),
+            "values": v.tolist(),
+        }
+
+    # ---------- persistence ----------
+    def _save(self) -> None:
+        arrays = {}
+        for series_id in [sym for sym, interval in self.store.keys() if interval == INTERVAL]:
+            t, v, _ = self.store.tail(series_id, INTERVAL)
+            arrays[f"{series_id}__t"] = np.array(t)
+            arrays[f"{series_id}__v"] = np.array(v)
+        if not arrays:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp.npz")
+        np.savez_compressed(tmp, **arrays)
+        tmp.replace(self.path)
+
+    def _load(self) -> int:
+        if not self.path.exists():
+            return 0
+        loaded = 0
+        with np.load(self.path) as data:
+            for key in data.files:
+                if not key.endswith("__t"):
+                    continue
+                series_id = key[:-3]
+                t = data[key].astype(np.int64)
+                v = data[f"{series_id}__v"].astype(float)
+                self.store.extend(series_id, INTERVAL, (t, v, np.zeros(len(t), dtype=np.int64)))
+                loaded += 1
+        return loaded
+
+    async def load(self) -> None:
+        try:
+            n = await asyncio.to_thread(self._load)
+            if n:
+                print(f"[FRED] Loaded {n} series from {self.path}")
+        except Exception as e:
+            print(f"[FRED] Failed to load {self.path}: {e}")
+
+    async def save(self) -> None:
+        try:
+            await asyncio.to_thread(self._save)
+        except Exception as e:
+            print(f"[FRED] Failed to save {self.path}: {e}")
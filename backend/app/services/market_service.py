@@ -1,10 +1,20 @@
-from typing import List, Dict
+import asyncio
+import time
+from typing import Callable, List, Dict, Optional
 from app.data_sources import YahooFinance, AlphaVantage, Finnhub, FRED, SECEdgar
-from app.cache import cached, quote_cache, sector_cache, mover_cache
+from app.cache import cached, quote_cache, sector_cache, breadth_cache, mover_cache, macro_cache, sec_cache
 from datetime import datetime
 import httpx
 import os
 from app.config import settings
+from app.timing import timed
+from app import shared_table
+from app.shared_table import shared
+from app.services.sparkline_service import SparklineService
+from app.services.posture_service import IncrementalPosture
+from app.services.universe_service import UniverseService
+from app.services.filing_service import FilingService
+from app.services.fred_service import FredSeriesService
 
 class MarketService:
     """Main service for fetching market data with multi-source fallback"""
@@ -29,19 +39,108 @@ class MarketService:
     def __init__(self):
         self.sources = [YahooFinance(), AlphaVantage(), Finnhub()]
         self.fred = FRED()
+        self.fred_series = FredSeriesService(self.fred)
         self.sec = SECEdgar()
+        self.filings = FilingService(self.sec)
+        self.sparklines = SparklineService(self.sources[0], self.sources[1])
+        self.live_posture = IncrementalPosture()
+        self.universe = UniverseService(self.fetch_with_fallback)
 
-    async def fetch_with_fallback(self, symbols: List[str]):
-        for source in self.sources:
-            try:
-                quotes = await source.fetch_quotes(symbols)
-                if quotes:
-                    return quotes, source.name
-            except Exception as e:
-                print(f"[{source.name}] Error: {e}")
-                continue
-        return {}, "None"
+    def all_sources(self) -> List:
+        return [*self.sources, self.fred, self.sec]
+
+    @staticmethod
+    def quote_cost(source, symbols: int) -> float:
+        """
+        Expected cost of quoting `symbols` from `source`: its latency/error score
+        per upstream call (a batch provider makes one, per-symbol providers one
+        each) plus any wait for rate-limit tokens. inf when the circuit is open
+        or the daily quota cannot cover the calls.
+        """
+        calls = source.quote_calls(max(1, symbols))
+        return source.stats.score() * calls + source.limiter.delay_for(calls)
+
+    def ranked_sources(self, symbols: int = 1) -> List:
+        """Quote sources cheapest first for a request of `symbols`; ties keep the configured order"""
+        return sorted(self.sources, key=lambda src: self.quote_cost(src, symbols))
+
+    @timed()
+    async def fetch_with_fallback(self, symbols: List[str], budget: Optional[float] = None,
+                                  on_quotes: Optional[Callable[[Dict[str, Dict]], None]] = None):
+        """
+        Merge quotes across providers, cheapest first. Each later provider is
+        asked only for the symbols still missing, until every symbol is covered
+        or the budget (FALLBACK_BUDGET seconds) runs out. Every quote carries its
+        `source` and `fetched_at` (epoch seconds). A provider that has not answered
+        within its even share of the budget no longer holds up the next one, which
+        starts alongside it; with HEDGED_REQUESTS that happens once the current one
+        runs past its p95 latency instead.
+        `on_quotes` is called with each provider's newly merged quotes as they land.
+        Returns (quotes, "SourceA+SourceB") or ({}, "None").
+        In SHARED_TABLE_MODE=reader the quotes come from the shared table.
+        """
+        if shared_table.reader is not None and shared_table.reader.fresh():
+            wait = settings.FALLBACK_BUDGET if budget is None else budget
+            return await shared_table.reader.quotes(symbols, min(settings.SHARED_DEMAND_WAIT, wait))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (settings.FALLBACK_BUDGET if budget is None else budget)
+        wanted = list(dict.fromkeys(symbols))
+        merged: Dict[str, Dict] = {}
+        contributors: List[str] = []
+        # A provider whose daily quota can't cover the request is skipped rather than drained
+        queue = [src for src in self.ranked_sources(len(wanted))
+                 if src.stats.available() and src.limiter.delay_for(src.quote_calls(len(wanted))) != float("inf")]
+        share = (deadline - loop.time()) / max(1, len(queue))
+        pending: Dict[asyncio.Task, object] = {}
+        hedge_due = False
+        launched_at = loop.time()
+        try:
+            while True:
+                missing = [sym for sym in wanted if sym not in merged]
+                remaining = deadline - loop.time()
+                if not missing or remaining <= 0:
+                    break
+                if queue and (not pending or hedge_due):
+                    source = queue.pop(0)
+                    pending[asyncio.ensure_future(source.fetch_quotes(missing))] = source
+                    hedge_due = False
+                    launched_at = loop.time()
+                if not pending:
+                    break
+                timeout = remaining
+                if queue:
+                    delay = max(settings.HEDGE_MIN_DELAY, source.stats.p95()) if settings.HEDGED_REQUESTS else share
+                    timeout = min(timeout, max(0.0, launched_at + delay - loop.time()))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_due = bool(queue)
+                    continue
+                for task in done:
+                    src = pending.pop(task)
+                    try:
+                        quotes = task.result() or {}
+                    except Exception as e:
+                        print(f"[{src.name}] Error: {e}")
+                        continue
+                    fetched_at = time.time()
+                    added: Dict[str, Dict] = {}
+                    for sym in wanted:
+                        q = quotes.get(sym)
+                        if q and sym not in merged:
+                            merged[sym] = added[sym] = {**q, "source": src.name, "fetched_at": fetched_at}
+                    if added:
+                        contributors.append(src.name)
+                        if on_quotes:
+                            on_quotes(added)
+        finally:
+            for task in pending:
+                task.cancel()
+        if len(merged) < len(wanted):
+            print(f"[fallback] Missing {len(wanted) - len(merged)}/{len(wanted)} symbols after {', '.join(contributors) or 'no sources'}")
+        return merged, "+".join(contributors) or "None"
 
+    @timed()
+    @shared
     @cached(quote_cache)
     async def get_indices(self):
         """
@@ -69,6 +168,9 @@ class MarketService:
             source = "None"
             out = []
         return out, source
+    @timed()
+    @shared
+    @cached(quote_cache)
     async def get_vix(self):
         """
         Prefer Finnhub (intraday). If it fails/zeros, fall back to FRED VIXCLS daily.
@@ -86,47 +188,81 @@ class MarketService:
         except Exception:
             source = "FRED"
             try:
-                fred = await self._fred_series_latest("VIXCLS", settings.FRED_API_KEY)
+                fred = await self._fred_series_latest("VIXCLS")
                 v = fred.get("value")
-                if v not in (None, ".", ""):
+                if v is not None:
                     price = float(v)
-                    pct   = 0.0
+                    prev  = fred.get("prev")
+                    pct   = (price / prev - 1.0) * 100.0 if prev else 0.0
                 else:
                     source = "None"
             except Exception:
                 source = "None"
+        if source != "None":
+            self.live_posture.update_vix(pct)
         return {"symbol": "^VIX", "price": price, "pct": pct}, source
+    async def _fred_series_latest(self, series_id: str) -> Dict:
+        """Latest stored observation ({value, prev, date}); syncs new rows at most every FRED_SYNC_INTERVAL"""
+        await self.fred_series.sync([series_id], max_age=settings.FRED_SYNC_INTERVAL)
+        return self.fred_series.latest(series_id) or {}
+
+    @timed()
+    @shared
+    @cached(sector_cache)
     async def get_sectors(self):
         symbols = list(self.SECTORS.keys())
-        quotes, source = await self.fetch_with_fallback(symbols)
+        quotes, source = await self.fetch_with_fallback(symbols, on_quotes=self._tick_sectors)
         sectors = []
         for sym, name in self.SECTORS.items():
             quote = quotes.get(sym, {})
-            sectors.append({'symbol': sym, 'name': name, 'pct': quote.get('pct', 0)})
+            sectors.append({'symbol': sym, 'name': name, 'pct': quote.get('pct', 0), 'source': quote.get('source')})
         return sectors, source
 
+    def _tick_sectors(self, quotes: Dict[str, Dict]) -> None:
+        """Feed sector quotes into the live posture as each provider answers"""
+        for sym, quote in quotes.items():
+            if sym in self.SECTORS:
+                self.live_posture.update_sector(sym, quote.get('pct'))
+
+    @timed()
+    @shared
+    @cached(breadth_cache)
     async def get_breadth(self):
-        breadth = {
-            'nyse': {'advancers': None, 'decliners': None, 'upVol': None, 'downVol': None},
-            'nasdaq': {'advancers': None, 'decliners': None, 'upVol': None, 'downVol': None}
-        }
-        return breadth, "MockData"
+        """Advancers/decliners/up-down volume over the constituent universe (UNIVERSE_PATH)"""
+        empty = {'advancers': None, 'decliners': None, 'upVol': None, 'downVol': None}
+        breadth = {'nyse': dict(empty), 'nasdaq': dict(empty)}
+        updated = await self.universe.refresh(settings.UNIVERSE_REFRESH_INTERVAL)
+        source = "None"
+        if self.universe.breadth.covered:
+            breadth.update(self.universe.breadth.snapshot())
+            source = self.universe.source if updated else "None"
+        for exchange, counts in breadth.items():
+            self.live_posture.update_breadth(exchange, counts.get('advancers'), counts.get('decliners'))
+        return breadth, source
 
+    @timed()
+    @shared
     @cached(mover_cache)
     async def get_movers(self):
-        movers = {'gainers': [], 'losers': [], 'most_active': []}
-        return movers, "MockData"
+        """Top gainers/losers/most active over the constituent universe"""
+        updated = await self.universe.refresh(settings.UNIVERSE_REFRESH_INTERVAL)
+        movers = self.universe.movers.top()
+        source = self.universe.source if updated and any(movers.values()) else "None"
+        return movers, source
 
+    @timed()
+    @shared
+    @cached(macro_cache)
     async def get_macro_calendar(self):
         return await self.fred.fetch_calendar()
 
+    @timed()
+    @cached(sec_cache)
     async def get_sec_headlines(self):
-        return await self.sec.fetch_headlines()
+        """Ingest new filings (conditional fetch) and return the newest few as headlines"""
+        await self.filings.ingest()
+        return [{'time': f['time'], 'title': f['title'], 'url': f['url']}
+                for f in self.filings.store.latest(settings.SEC_SUMMARY_HEADLINES)]
 
     async def get_sparkline(self, symbol: str):
-        yahoo = YahooFinance()
-        sparkline = await yahoo.fetch_sparkline(symbol)
-        if sparkline:
-            return sparkline
-        av = AlphaVantage()
-        return await av.fetch_intraday(symbol)
+        return (await self.sparklines.get_many([symbol]))[symbol]
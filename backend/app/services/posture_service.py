@@ -1,10 +1,70 @@
 import statistics
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional
+import numpy as np
 from app.models import SessionPosture, PostureComponents
 
+class PostureHistory:
+    """Bounded, preallocated record of posture inputs (one row per summary snapshot)"""
+
+    BREADTH_COLUMNS = ("nyse_adv", "nyse_dec", "nasdaq_adv", "nasdaq_dec")
+
+    def __init__(self, sectors: List[str], capacity: int):
+        self.sectors = list(sectors)
+        self._col = {sym: i for i, sym in enumerate(self.sectors)}
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity)
+        self.breadth = np.full((capacity, 4), np.nan)
+        self.sector_pct = np.full((capacity, len(self.sectors)), np.nan)
+        self.vix_pct = np.zeros(capacity)
+        self._next = 0
+        self.size = 0
+
+    def record(self, breadth: Dict, sectors: List[Dict], vix_pct: float, ts: Optional[float] = None) -> None:
+        i = self._next
+        self.timestamps[i] = time.time() if ts is None else ts
+        for j, (exch, field) in enumerate((("nyse", "advancers"), ("nyse", "decliners"), ("nasdaq", "advancers"), ("nasdaq", "decliners"))):
+            value = (breadth.get(exch) or {}).get(field)
+            self.breadth[i, j] = np.nan if value is None else value
+        self.sector_pct[i] = np.nan
+        for s in sectors:
+            col = self._col.get(s.get("symbol"))
+            if col is not None:
+                self.sector_pct[i, col] = float(s.get("pct") or 0.0)
+        self.vix_pct[i] = vix_pct
+        self._next = (i + 1) % self.capacity
+        self.size = min(self.capacity, self.size + 1)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Recorded rows in time order"""
+        order = np.arange(self._next - self.size, self._next) % self.capacity
+        return {
+            "timestamps": self.timestamps[order],
+            "breadth": self.breadth[order],
+            "sectors": self.sector_pct[order],
+            "vix_pct": self.vix_pct[order],
+        }
+
+def _round1(values: np.ndarray) -> np.ndarray:
+    """Python's round(x, 1) per element: np.round scales by 10 first and can land on the other side of a tie"""
+    return np.fromiter((round(x, 1) for x in values.tolist()), dtype=float, count=len(values))
+
 class PostureService:
     """Calculate Session Posture heuristic"""
 
+    # Dispersion thresholds
+    HIGH_PARTICIPATION = 8   # out of ~11 sectors
+    LOW_PARTICIPATION = 3
+    LOW_DISPERSION = 1.5
+    HIGH_DISPERSION = 3.0
+
+    # Label thresholds on the final score
+    RISK_ON = 30
+    RISK_OFF = -30
+
+    def __init__(self, sectors: Optional[List[str]] = None, history_size: int = 0):
+        self.history = PostureHistory(sectors or [], history_size) if history_size else None
+
     @staticmethod
     def calculate(breadth: Dict, sectors: List[Dict], vix_data: Dict) -> SessionPosture:
         """
@@ -14,12 +74,16 @@ class PostureService:
         breadth_score = PostureService._calc_breadth(breadth)
         dispersion_score = PostureService._calc_dispersion(sectors)
         vix_score = PostureService._calc_vix_overlay(vix_data)
+        return PostureService._compose(breadth_score, dispersion_score, vix_score)
 
+    @staticmethod
+    def _compose(breadth_score: float, dispersion_score: float, vix_score: float) -> SessionPosture:
+        """Weight the three components into a labelled SessionPosture"""
         final_score = 0.4 * breadth_score + 0.4 * dispersion_score + 0.2 * vix_score
 
-        if final_score >= 30:
+        if final_score >= PostureService.RISK_ON:
             label = "Risk-On"
-        elif final_score <= -30:
+        elif final_score <= PostureService.RISK_OFF:
             label = "Risk-Off"
         else:
             label = "Neutral"
@@ -86,10 +150,15 @@ class PostureService:
         except Exception:
             dispersion = 0.0
 
-        HIGH_PARTICIPATION = 8   # out of ~11 sectors
-        LOW_PARTICIPATION = 3
-        LOW_DISPERSION = 1.5
-        HIGH_DISPERSION = 3.0
+        return PostureService._dispersion_score(positive_count, dispersion)
+
+    @staticmethod
+    def _dispersion_score(positive_count: int, dispersion: float) -> float:
+        """Map sector participation and return stdev to -100..+100"""
+        HIGH_PARTICIPATION = PostureService.HIGH_PARTICIPATION
+        LOW_PARTICIPATION = PostureService.LOW_PARTICIPATION
+        LOW_DISPERSION = PostureService.LOW_DISPERSION
+        HIGH_DISPERSION = PostureService.HIGH_DISPERSION
 
         if positive_count >= HIGH_PARTICIPATION and dispersion <= LOW_DISPERSION:
             return 100.0
@@ -120,7 +189,11 @@ class PostureService:
         except Exception:
             vix_pct = 0.0
 
-        # Heuristic buckets
+        return PostureService._vix_score(vix_pct)
+
+    @staticmethod
+    def _vix_score(vix_pct: float) -> float:
+        """Heuristic buckets on the VIX % change"""
         if vix_pct <= -5:
             return 100.0
         if -5 < vix_pct <= -2:
@@ -130,3 +203,210 @@ class PostureService:
         if 2 <= vix_pct < 5:
             return -50.0
         return -100.0
+
+    # ---------- vectorized batch scoring (backtests / history) ----------
+    THRESHOLD_NAMES = ("HIGH_PARTICIPATION", "LOW_PARTICIPATION", "LOW_DISPERSION", "HIGH_DISPERSION", "RISK_ON", "RISK_OFF")
+
+    @staticmethod
+    def thresholds(overrides: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Effective thresholds: class defaults with any overrides applied"""
+        th = {name: float(getattr(PostureService, name)) for name in PostureService.THRESHOLD_NAMES}
+        th.update(overrides or {})
+        return th
+
+    @staticmethod
+    def calculate_batch(breadth: np.ndarray, sectors: np.ndarray, vix_pct: np.ndarray,
+                        thresholds: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+        """
+        Same score as `calculate`, over T snapshots at once.
+          breadth: (T, 4) nyse_adv, nyse_dec, nasdaq_adv, nasdaq_dec (nan = missing)
+          sectors: (T, S) sector % changes (nan = sector missing)
+          vix_pct: (T,)
+        `thresholds` overrides any of the class threshold names for what-if runs.
+        Returns score/breadth/dispersion/vol_overlay arrays (rounded like `calculate`) and labels.
+        """
+        th = PostureService.thresholds(thresholds)
+
+        breadth = np.asarray(breadth, dtype=float).reshape(-1, 4)
+        sectors = np.asarray(sectors, dtype=float)
+        if sectors.ndim == 1:
+            sectors = sectors.reshape(len(breadth), -1)
+        vix_pct = np.nan_to_num(np.asarray(vix_pct, dtype=float))
+
+        # Breadth: mean of (adv - dec) / (adv + dec) across exchanges; 0 if any piece missing
+        with np.errstate(invalid="ignore", divide="ignore"):
+            adv, dec = breadth[:, [0, 2]], breadth[:, [1, 3]]
+            total = adv + dec
+            ratios = np.where(total > 0, (adv - dec) / np.where(total > 0, total, 1), 0.0)
+        complete = np.all(~np.isnan(breadth) & (np.nan_to_num(breadth, nan=-1) >= 0), axis=1)
+        breadth_score = np.where(complete, ratios.mean(axis=1) * 100.0, 0.0)
+
+        # Dispersion: participation + sample stdev over the sectors present in each row
+        valid = ~np.isnan(sectors)
+        n = valid.sum(axis=1)
+        vals = np.where(valid, sectors, 0.0)
+        positive = ((vals > 0) & valid).sum(axis=1)
+        mean = vals.sum(axis=1) / np.maximum(n, 1)
+        sq = np.where(valid, (vals - mean[:, None]) ** 2, 0.0).sum(axis=1)
+        stdev = np.where(n > 1, np.sqrt(sq / np.maximum(n - 1, 1)), 0.0)
+
+        hp, lp = th["HIGH_PARTICIPATION"], th["LOW_PARTICIPATION"]
+        ld, hd = th["LOW_DISPERSION"], th["HIGH_DISPERSION"]
+        part = np.clip((positive - lp) / max(1, (hp - lp)) * 100.0, -100.0, 100.0)
+        disp = np.clip((hd - stdev) / max(1e-6, (hd - ld)) * 100.0, -100.0, 100.0)
+        dispersion_score = np.select(
+            [n == 0, (positive >= hp) & (stdev <= ld), (positive <= lp) | (stdev >= hd)],
+            [0.0, 100.0, -100.0],
+            default=(part + disp) / 2.0,
+        )
+
+        # VIX overlay buckets
+        vix_score = np.select(
+            [vix_pct <= -5, vix_pct <= -2, vix_pct < 2, vix_pct < 5],
+            [100.0, 50.0, 0.0, -50.0],
+            default=-100.0,
+        )
+
+        score = 0.4 * breadth_score + 0.4 * dispersion_score + 0.2 * vix_score
+        labels = np.where(score >= th["RISK_ON"], "Risk-On", np.where(score <= th["RISK_OFF"], "Risk-Off", "Neutral"))
+        return {
+            "score": _round1(score),
+            "breadth": _round1(breadth_score),
+            "dispersion": _round1(dispersion_score),
+            "vol_overlay": _round1(vix_score),
+            "label": labels,
+        }
+
+    def record(self, breadth: Dict, sectors: List[Dict], vix_data: Dict) -> None:
+        """Append one snapshot's inputs to the history (no-op when history is disabled)"""
+        if self.history is None:
+            return
+        try:
+            vix_pct = float((vix_data or {}).get("pct", 0.0) or 0.0)
+        except Exception:
+            vix_pct = 0.0
+        self.history.record(breadth, sectors, vix_pct)
+
+
+class IncrementalPosture:
+    """
+    Running posture state updated one tick at a time.
+    Sector dispersion keeps Welford sums (n, mean, M2) plus a positive count, so a
+    sector, VIX or breadth tick is O(1) and `current()` never waits on a full fetch.
+    """
+
+    EXCHANGES = ("nyse", "nasdaq")
+    RESYNC_EVERY = 1000  # exact recompute cadence to shed float drift from add/remove
+
+    def __init__(self):
+        self._pct: Dict[str, float] = {}
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._positive = 0
+        self._ratios: Dict[str, float] = {}
+        self._vix_pct = 0.0
+        self._updates = 0
+        self._posture: Optional[SessionPosture] = None
+        self.updated_at: Optional[float] = None
+
+    # ---------- Welford add/remove ----------
+    def _add(self, x: float) -> None:
+        self._n += 1
+        delta = x - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (x - self._mean)
+        if x > 0:
+            self._positive += 1
+
+    def _remove(self, x: float) -> None:
+        if self._n <= 1:
+            self._n, self._mean, self._m2 = 0, 0.0, 0.0
+        else:
+            mean = (self._n * self._mean - x) / (self._n - 1)
+            self._m2 = max(0.0, self._m2 - (x - self._mean) * (x - mean))
+            self._mean = mean
+            self._n -= 1
+        if x > 0:
+            self._positive -= 1
+
+    def _resync(self) -> None:
+        self._n, self._mean, self._m2, self._positive = 0, 0.0, 0.0, 0
+        for x in self._pct.values():
+            self._add(x)
+
+    def _touch(self) -> None:
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            self._resync()
+        self._posture = None
+        self.updated_at = time.time()
+
+    # ---------- ticks ----------
+    def update_sector(self, symbol: str, pct) -> None:
+        try:
+            x = float(pct or 0.0)
+        except (TypeError, ValueError):
+            x = 0.0
+        old = self._pct.get(symbol)
+        if old == x:
+            return
+        if old is not None:
+            self._remove(old)
+        self._pct[symbol] = x
+        self._add(x)
+        self._touch()
+
+    def remove_sector(self, symbol: str) -> None:
+        old = self._pct.pop(symbol, None)
+        if old is not None:
+            self._remove(old)
+            self._touch()
+
+    def update_breadth(self, exchange: str, advancers: Optional[int], decliners: Optional[int]) -> None:
+        """A None or negative count marks the exchange unavailable (breadth scores 0 until both report)"""
+        if advancers is None or decliners is None or advancers < 0 or decliners < 0:
+            self._ratios.pop(exchange, None)
+        else:
+            total = advancers + decliners
+            self._ratios[exchange] = ((advancers - decliners) / total) if total > 0 else 0.0
+        self._touch()
+
+    def update_vix(self, pct) -> None:
+        try:
+            self._vix_pct = float(pct or 0.0)
+        except (TypeError, ValueError):
+            self._vix_pct = 0.0
+        self._touch()
+
+    # ---------- readout ----------
+    def components(self) -> Dict[str, float]:
+        if all(ex in self._ratios for ex in self.EXCHANGES):
+            breadth = sum(self._ratios[ex] for ex in self.EXCHANGES) / len(self.EXCHANGES) * 100.0
+        else:
+            breadth = 0.0
+        if self._n == 0:
+            dispersion = 0.0
+        else:
+            stdev = (self._m2 / (self._n - 1)) ** 0.5 if self._n > 1 else 0.0
+            dispersion = PostureService._dispersion_score(self._positive, stdev)
+        return {
+            "breadth": breadth,
+            "dispersion": dispersion,
+            "vol_overlay": PostureService._vix_score(self._vix_pct),
+        }
+
+    def current(self) -> SessionPosture:
+        """Posture from the latest ticks; memoized until the next update"""
+        if self._posture is None:
+            c = self.components()
+            self._posture = PostureService._compose(c["breadth"], c["dispersion"], c["vol_overlay"])
+        return self._posture
+
+    def stats(self) -> Dict:
+        return {
+            "sectors": self._n,
+            "exchanges": sorted(self._ratios),
+            "updates": self._updates,
+            "updated_at": self.updated_at,
+        }
@@ -0,0 +1,37 @@
+import asyncio
+from typing import Awaitable, Callable, List, Tuple
+from app.config import settings
+
+class RefreshService:
+    """Background pre-warmer that reloads cached MarketService sections before they expire"""
+
+    SECTIONS = ["get_indices", "get_vix", "get_sectors", "get_breadth", "get_movers", "get_macro_calendar", "get_sec_headlines"]
+
+    def __init__(self, market):
+        self.jobs: List[Tuple[str, Callable[[], Awaitable], float]] = []
+        for name in self.SECTIONS:
+            fn = getattr(type(market), name)
+            interval = max(1.0, fn.cache.ttl * settings.CACHE_PREWARM_FRACTION)
+            self.jobs.append((name, lambda fn=fn: fn.refresh(market), interval))
+        self._tasks: List[asyncio.Task] = []
+
+    async def _run(self, name: str, refresh: Callable[[], Awaitable], interval: float):
+        while True:
+            try:
+                await refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[refresh] {name} failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run(name, refresh, interval)) for name, refresh, interval in self.jobs]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+from app.cache import AsyncTTLCache, cached
+from app.config import settings
+from app.data_sources import YahooFinance, AlphaVantage
+from app.timeseries import IntradayStore, intraday_store
+from app.timing import timed
+
+sparkline_cache = AsyncTTLCache("sparklines", maxsize=settings.SPARKLINE_MAX_SYMBOLS, ttl=settings.SPARKLINE_TTL)
+
+# Yahoo interval -> Alpha Vantage interval
+AV_INTERVALS = {"1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min", "60m": "60min"}
+
+class SparklineService:
+    """Intraday sparklines with batched cold loads and incremental refreshes.
+
+    Bars live in the shared IntradayStore ring buffers. When the cache entry
+    expires only the bars since the last stored timestamp are fetched and
+    appended. Symbols not seen before are loaded in batches through Yahoo's
+    spark endpoint; per-symbol chart/Alpha Vantage calls cover misses.
+    """
+
+    def __init__(self, yahoo: YahooFinance, alpha_vantage: AlphaVantage, store: IntradayStore = intraday_store):
+        self.yahoo = yahoo
+        self.av = alpha_vantage
+        self.store = store
+        # (symbol, interval) -> monotonic time the buffer was last filled
+        self._loaded: Dict[Tuple[str, str], float] = {}
+
+    def _closes(self, symbol: str, interval: str) -> List[float]:
+        bars = self.store.tail(symbol, interval, settings.SPARKLINE_POINTS)
+        return bars[1].tolist() if bars is not None else []
+
+    def _fill(self, symbol: str, interval: str, bars) -> None:
+        self.store.extend(symbol, interval, bars)
+        self._loaded[(symbol, interval)] = time.monotonic()
+        if len(self._loaded) > 2 * self.store.max_symbols:
+            self._loaded = {k: v for k, v in self._loaded.items() if self.store.get(*k) is not None}
+
+    @cached(sparkline_cache)
+    async def _series_for(self, symbol: str, interval: str) -> List[float]:
+        buf = self.store.get(symbol, interval)
+        if buf is not None and buf.size:
+            if time.monotonic() - self._loaded.get((symbol, interval), 0.0) < settings.SPARKLINE_TTL:
+                return self._closes(symbol, interval)
+            last = buf.last_timestamp
+            if time.time() - last < settings.SPARKLINE_INCREMENTAL_WINDOW:
+                self._fill(symbol, interval, await self.yahoo.fetch_chart(symbol, interval=interval, since=last))
+                return self._closes(symbol, interval)
+        bars = await self.yahoo.fetch_chart(symbol, interval=interval)
+        if not len(bars[0]) and interval in AV_INTERVALS:
+            bars = await self.av.fetch_intraday_series(symbol, interval=AV_INTERVALS[interval])
+        if len(bars[0]):
+            self._fill(symbol, interval, bars)
+        return self._closes(symbol, interval)
+
+    async def _prime(self, symbols: List[str], interval: str) -> None:
+        """Cold-load symbols we hold no bars for via batched spark requests"""
+        unseen = [s for s in symbols if self.store.get(s, interval) is None]
+        if not unseen:
+            return
+        size = settings.SPARKLINE_BATCH_SIZE
+        batches = [unseen[i:i + size] for i in range(0, len(unseen), size)]
+        results = await asyncio.gather(*(self.yahoo.fetch_spark(b, interval=interval) for b in batches), return_exceptions=True)
+        for batch in results:
+            if isinstance(batch, Exception):
+                print(f"[sparklines] spark batch failed: {batch}")
+                continue
+            for sym, bars in batch.items():
+                self._fill(sym, interval, bars)
+
+    @timed("sparklines")
+    async def get_many(self, symbols: List[str], interval: Optional[str] = None) -> Dict[str, List[float]]:
+        """Closes per symbol, oldest first (up to SPARKLINE_POINTS); [] when no source had data"""
+        interval = interval or settings.SPARKLINE_INTERVAL
+        symbols = list(dict.fromkeys(symbols))
+        await self._prime(symbols, interval)
+        results = await asyncio.gather(*(self._series_for(s, interval) for s in symbols), return_exceptions=True)
+        out = {}
+        for sym, closes in zip(symbols, results):
+            if isinstance(closes, Exception):
+                print(f"[sparklines] {sym}: {closes}")
+                out[sym] = []
+            else:
+                out[sym] = closes
+        return out
@@ -0,0 +1,184 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Optional, Set
+from app.config import settings
+from app.patch import NullValueError, merge_diff
+
+Loader = Callable[[], Awaitable[Dict[str, Any]]]
+
+class Subscriber:
+    """One streaming client: a bounded queue of pre-encoded events.
+
+    If the client falls behind and its queue fills up, queued deltas are
+    dropped and the affected topics are flagged for a full snapshot instead,
+    so a slow consumer never blocks the refresh loop or grows memory.
+    Queued deltas carry their topic version; ones the last snapshot sent
+    for that topic already includes are skipped.
+    """
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)  # (topic, version, message) or None
+        self.topics: Set[str] = set()
+        self.needs_snapshot: Set[str] = set()
+        self.sent: Dict[str, int] = {}  # topic -> version of the last snapshot sent
+        self.dropped = 0
+
+    def offer(self, topic: str, version: int, message: str) -> None:
+        if topic in self.needs_snapshot:
+            return  # a snapshot is pending anyway
+        try:
+            self.queue.put_nowait((topic, version, message))
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            # Dropped deltas may belong to any topic: resync them all
+            self.needs_snapshot.update(self.topics)
+            self.queue.put_nowait(None)  # wake the reader so it sends the snapshot
+
+    def resync(self, topic: str) -> None:
+        """Send `topic` as a full snapshot next instead of a delta"""
+        if topic in self.needs_snapshot:
+            return
+        self.needs_snapshot.add(topic)
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass  # the reader is already behind and will drain to the snapshot
+
+class Topic:
+    """Shared refresh loop for one data set; publishes only what changed"""
+
+    def __init__(self, name: str, loader: Loader, interval: float):
+        self.name = name
+        self.loader = loader
+        self.interval = interval
+        self.state: Dict[str, Any] = {}
+        self.version = 0
+        self.subscribers: Set[Subscriber] = set()
+        self.task: Optional[asyncio.Task] = None
+
+    def encode(self, kind: str, data: Dict[str, Any]) -> str:
+        body = json.dumps({"topic": self.name, "version": self.version, "data": data}, separators=(",", ":"))
+        return f"event: {kind}\ndata: {body}\n\n"
+
+    async def refresh(self) -> None:
+        try:
+            new = await self.loader()
+        except Exception as e:
+            print(f"[stream:{self.name}] refresh failed: {e}")
+            return
+        try:
+            patch = merge_diff(self.state, new)
+        except NullValueError:
+            # A value became null; a merge patch would delete the key, so resend everything
+            self.state = new
+            self.version += 1
+            for sub in list(self.subscribers):
+                sub.resync(self.name)
+            return
+        if patch:
+            self.state = new
+            self.version += 1
+            # Encoded once, shared by every subscriber
+            message = self.encode("delta", patch)
+            for sub in list(self.subscribers):
+                sub.offer(self.name, self.version, message)
+
+    async def run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+class StreamLimitError(Exception):
+    """A subscription would exceed STREAM_MAX_SYMBOLS or STREAM_MAX_QUOTE_TOPICS"""
+
+class StreamHub:
+    """Fan-out of summary and per-symbol-set quote deltas to SSE subscribers"""
+
+    def __init__(self, summary_loader: Loader, quotes_loader: Callable[[FrozenSet[str]], Loader]):
+        self.summary_loader = summary_loader
+        self.quotes_loader = quotes_loader
+        self.topics: Dict[str, Topic] = {}
+
+    def _topic(self, name: str, loader: Loader) -> Topic:
+        topic = self.topics.get(name)
+        if topic is None:
+            topic = self.topics[name] = Topic(name, loader, settings.STREAM_INTERVAL)
+            topic.task = asyncio.create_task(topic.run())
+        return topic
+
+    @staticmethod
+    def _quotes_name(symbols: FrozenSet[str]) -> str:
+        return "quotes:" + ",".join(sorted(symbols))
+
+    def check(self, symbols: FrozenSet[str]) -> None:
+        """Raise StreamLimitError if subscribing to `symbols` would exceed the caps"""
+        if len(symbols) > settings.STREAM_MAX_SYMBOLS:
+            raise StreamLimitError(f"At most {settings.STREAM_MAX_SYMBOLS} symbols per stream")
+        if symbols and self._quotes_name(symbols) not in self.topics:
+            live = sum(1 for name in self.topics if name.startswith("quotes:"))
+            if live >= settings.STREAM_MAX_QUOTE_TOPICS:
+                raise StreamLimitError("Too many distinct symbol sets are streaming; try again later")
+
+    def subscribe(self, symbols: FrozenSet[str]) -> Subscriber:
+        self.check(symbols)
+        sub = Subscriber(settings.STREAM_QUEUE_SIZE)
+        names = ["summary"]
+        self._topic("summary", self.summary_loader).subscribers.add(sub)
+        if symbols:
+            name = self._quotes_name(symbols)
+            self._topic(name, self.quotes_loader(symbols)).subscribers.add(sub)
+            names.append(name)
+        sub.topics.update(names)
+        sub.needs_snapshot.update(names)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        for name, topic in list(self.topics.items()):
+            topic.subscribers.discard(sub)
+            if not topic.subscribers:
+                topic.task.cancel()
+                del self.topics[name]
+
+    async def events(self, symbols: FrozenSet[str]):
+        """
+        Subscribe and yield SSE frames until the client disconnects. The
+        subscription is made here, once the response is streaming, so a
+        client that leaves before the first frame never leaves one behind.
+        """
+        sub: Optional[Subscriber] = None
+        try:
+            try:
+                sub = self.subscribe(symbols)
+            except StreamLimitError as e:
+                yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+                return
+            while True:
+                for name in list(sub.needs_snapshot):
+                    sub.needs_snapshot.discard(name)
+                    topic = self.topics.get(name)
+                    if topic is not None:
+                        sub.sent[name] = topic.version
+                        yield topic.encode("snapshot", topic.state)
+                try:
+                    item = await asyncio.wait_for(sub.queue.get(), timeout=settings.STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if item is None:
+                    continue
+                name, version, message = item
+                if version <= sub.sent.get(name, -1):
+                    continue  # queued before a snapshot that already includes it
+                yield message
+        finally:
+            if sub is not None:
+                self.unsubscribe(sub)
+
+    async def stop(self) -> None:
+        tasks = [t.task for t in self.topics.values() if t.task]
+        self.topics.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
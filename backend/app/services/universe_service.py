@@ -0,0 +1,288 @@
+import asyncio
+import csv
+import heapq
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+
+DEFAULT_UNIVERSE_PATH = Path(__file__).parent.parent.parent / "data" / "universe.csv"
+
+class Universe:
+    """Constituent list: symbols with their listing exchange (lowercase, e.g. nyse/nasdaq)"""
+
+    def __init__(self, symbols: List[str], exchanges: List[str]):
+        self.symbols = list(symbols)
+        self.index = {sym: i for i, sym in enumerate(self.symbols)}
+        self.exchange_names = sorted(set(exchanges))
+        codes = {name: i for i, name in enumerate(self.exchange_names)}
+        self.exchange = np.array([codes[ex] for ex in exchanges], dtype=np.intp)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @classmethod
+    def load(cls, path: Path) -> "Universe":
+        """
+        Read `symbol,exchange` rows (header and '#' comment lines optional).
+        Rows without an exchange are skipped; duplicate symbols keep the first row.
+        """
+        symbols: List[str] = []
+        exchanges: List[str] = []
+        seen = set()
+        try:
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    if not row or row[0].strip().startswith("#") or len(row) < 2:
+                        continue
+                    sym, ex = row[0].strip().upper(), row[1].strip().lower()
+                    if not sym or not ex or sym == "SYMBOL" or sym in seen:
+                        continue
+                    seen.add(sym)
+                    symbols.append(sym)
+                    exchanges.append(ex)
+        except FileNotFoundError:
+            print(f"[Universe] {path} not found; breadth disabled")
+        except Exception as e:
+            print(f"[Universe] Failed to load {path}: {e}")
+        return cls(symbols, exchanges)
+
+class BreadthEngine:
+    """
+    Advancers/decliners and up/down volume per exchange over the universe.
+    Latest pct/volume per symbol live in flat arrays; applying a batch of quotes
+    subtracts the batch's old contribution and adds the new one, so partial
+    chunks update the totals without rescanning the universe.
+    """
+
+    def __init__(self, universe: Universe):
+        self.universe = universe
+        n, k = len(universe), len(universe.exchange_names)
+        self.pct = np.full(n, np.nan)
+        self.volume = np.zeros(n)
+        self._adv = np.zeros(k)
+        self._dec = np.zeros(k)
+        self._up_vol = np.zeros(k)
+        self._down_vol = np.zeros(k)
+        self.covered = 0
+        self.updated_at: Optional[float] = None
+
+    def _accumulate(self, idx: np.ndarray, sign: float) -> None:
+        pct, vol, ex = self.pct[idx], self.volume[idx], self.universe.exchange[idx]
+        k = len(self.universe.exchange_names)
+        up, down = pct > 0, pct < 0  # nan compares False: unseen symbols count nowhere
+        self._adv += sign * np.bincount(ex, weights=up, minlength=k)
+        self._dec += sign * np.bincount(ex, weights=down, minlength=k)
+        self._up_vol += sign * np.bincount(ex, weights=np.where(up, vol, 0.0), minlength=k)
+        self._down_vol += sign * np.bincount(ex, weights=np.where(down, vol, 0.0), minlength=k)
+        self.covered += int(sign) * int(np.count_nonzero(~np.isnan(pct)))
+
+    def apply(self, quotes: Dict[str, Dict]) -> int:
+        """Fold a batch of quotes into the totals; returns how many universe symbols it touched"""
+        rows = [(self.universe.index[sym], q) for sym, q in quotes.items() if sym in self.universe.index]
+        if not rows:
+            return 0
+        idx = np.fromiter((i for i, _ in rows), dtype=np.intp, count=len(rows))
+        pct = np.array([q.get("pct") for _, q in rows], dtype=float)  # None -> nan
+        vol = np.array([q.get("volume") or 0 for _, q in rows], dtype=float)
+        self._accumulate(idx, -1.0)
+        self.pct[idx] = pct
+        self.volume[idx] = np.nan_to_num(vol)
+        self._accumulate(idx, 1.0)
+        self.updated_at = time.time()
+        return len(rows)
+
+    def snapshot(self) -> Dict[str, Dict[str, Optional[int]]]:
+        out: Dict[str, Dict[str, Optional[int]]] = {}
+        for i, name in enumerate(self.universe.exchange_names):
+            out[name] = {
+                "advancers": int(round(self._adv[i])),
+                "decliners": int(round(self._dec[i])),
+                "upVol": int(round(self._up_vol[i])),
+                "downVol": int(round(self._down_vol[i])),
+            }
+        return out
+
+class MoversEngine:
+    """
+    Top-K gainers, losers and most active over the universe.
+    Each ranking is a lazy-deletion heap: a changed quote pushes a fresh entry
+    tagged with the symbol's version, and superseded entries are discarded
+    when they surface at the top. Reads pop only the K best live entries and
+    push them back, so a refresh never re-sorts the universe.
+    """
+
+    BUCKETS = ("gainers", "losers", "most_active")
+
+    def __init__(self, universe: Universe, k: int = 10):
+        self.universe = universe
+        self.k = k
+        n = len(universe)
+        self.price = np.zeros(n)
+        self.pct = np.full(n, np.nan)
+        self.volume = np.zeros(n)
+        self._version = np.zeros(n, dtype=np.int64)
+        self._heaps: Dict[str, List[Tuple[float, int, int]]] = {b: [] for b in self.BUCKETS}
+        self._top: Optional[Dict[str, List[Dict]]] = None
+        self.updated_at: Optional[float] = None
+
+    def _push(self, i: int) -> None:
+        version = int(self._version[i])
+        pct, vol = self.pct[i], self.volume[i]
+        if pct > 0:
+            heapq.heappush(self._heaps["gainers"], (-pct, i, version))
+        elif pct < 0:
+            heapq.heappush(self._heaps["losers"], (pct, i, version))
+        if vol > 0:
+            heapq.heappush(self._heaps["most_active"], (-vol, i, version))
+
+    def _compact(self) -> None:
+        """Drop superseded entries once a heap outgrows the universe"""
+        limit = 2 * len(self.universe) + 64
+        for bucket, heap in self._heaps.items():
+            if len(heap) > limit:
+                live = [e for e in heap if e[2] == self._version[e[1]]]
+                heapq.heapify(live)
+                self._heaps[bucket] = live
+
+    def apply(self, quotes: Dict[str, Dict]) -> int:
+        """Record changed quotes; returns how many universe symbols the batch touched"""
+        touched = 0
+        for sym, q in quotes.items():
+            i = self.universe.index.get(sym)
+            if i is None:
+                continue
+            touched += 1
+            try:
+                pct = float(q["pct"]) if q.get("pct") is not None else np.nan
+                price = float(q.get("price") or 0.0)
+                vol = float(q.get("volume") or 0)
+            except (TypeError, ValueError):
+                continue
+            if price == self.price[i] and vol == self.volume[i] and (pct == self.pct[i] or (np.isnan(pct) and np.isnan(self.pct[i]))):
+                continue
+            self.price[i], self.pct[i], self.volume[i] = price, pct, vol
+            self._version[i] += 1
+            self._push(i)
+            self._top = None
+        if touched:
+            self._compact()
+            self.updated_at = time.time()
+        return touched
+
+    def _best(self, bucket: str) -> List[int]:
+        heap = self._heaps[bucket]
+        taken: List[Tuple[float, int, int]] = []
+        while heap and len(taken) < self.k:
+            entry = heapq.heappop(heap)
+            if entry[2] == self._version[entry[1]]:
+                taken.append(entry)
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return [i for _, i, _ in taken]
+
+    def _mover(self, i: int) -> Dict:
+        return {
+            "symbol": self.universe.symbols[i],
+            "price": float(self.price[i]),
+            "pct": float(self.pct[i]) if not np.isnan(self.pct[i]) else 0.0,
+            "vol": int(self.volume[i]),
+        }
+
+    def top(self) -> Dict[str, List[Dict]]:
+        """Current top-K per bucket; memoized until the next changed quote"""
+        if self._top is None:
+            self._top = {b: [self._mover(i) for i in self._best(b)] for b in self.BUCKETS}
+        return self._top
+
+Fetcher = Callable[[List[str]], Awaitable[Tuple[Dict[str, Dict], str]]]
+
+class UniverseService:
+    """
+    Refreshes quotes for the whole constituent universe in chunks through
+    `fetch` (MarketService.fetch_with_fallback: ranked providers, breakers and
+    per-symbol fallback). Chunks are requested concurrently (the providers'
+    rate limiters pace them) and each one is applied to the engines as it lands.
+    """
+
+    def __init__(self, fetch: Fetcher, universe: Optional[Universe] = None):
+        self.fetch = fetch
+        self.source = "None"  # providers that answered the last refresh, "A+B"
+        self.universe = universe if universe is not None else Universe.load(
+            Path(settings.UNIVERSE_PATH) if settings.UNIVERSE_PATH else DEFAULT_UNIVERSE_PATH
+        )
+        self.breadth = BreadthEngine(self.universe)
+        self.movers = MoversEngine(self.universe, settings.MOVERS_TOP_K)
+        self.engines = [self.breadth, self.movers]
+        self.last_refresh: Dict = {}
+        self.refreshed_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+    def chunks(self) -> List[List[str]]:
+        size = max(1, settings.UNIVERSE_CHUNK_SIZE)
+        syms = self.universe.symbols
+        return [syms[i:i + size] for i in range(0, len(syms), size)]
+
+    def apply(self, quotes: Dict[str, Dict]) -> int:
+        touched = 0
+        for engine in self.engines:
+            touched = max(touched, engine.apply(quotes))
+        return touched
+
+    async def refresh(self, max_age: float = 0.0) -> int:
+        """
+        Bring the engines up to date; returns how many symbols the refresh updated.
+        Callers share one in-flight refresh, and one finished within `max_age`
+        seconds is reused (breadth and movers read the same quotes).
+        """
+        if not len(self.universe):
+            return 0
+        if self._inflight is None:
+            if max_age and time.monotonic() - self.refreshed_at < max_age:
+                return self.last_refresh.get("updated", 0)
+            self._inflight = asyncio.ensure_future(self._refresh())
+            self._inflight.add_done_callback(self._refresh_done)
+        return await asyncio.shield(self._inflight)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._inflight = None
+        if not task.cancelled() and task.exception() is None:
+            self.refreshed_at = time.monotonic()
+
+    async def _refresh(self) -> int:
+        started = time.monotonic()
+        updated = 0
+        failed = 0
+        sources: Dict[str, None] = {}
+        tasks = [asyncio.ensure_future(self.fetch(chunk)) for chunk in self.chunks()]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                try:
+                    quotes, source = await fut
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    failed += 1
+                    print(f"[Universe] Chunk failed: {e}")
+                    continue
+                if not quotes:
+                    failed += 1
+                    continue
+                sources.update(dict.fromkeys(source.split("+")))
+                updated += self.apply(quotes)
+        finally:
+            for t in tasks:
+                t.cancel()
+        self.source = "+".join(sources) or "None"
+        self.last_refresh = {
+            "symbols": len(self.universe),
+            "updated": updated,
+            "chunks": len(tasks),
+            "failed_chunks": failed,
+            "sources": list(sources),
+            "seconds": round(time.monotonic() - started, 3),
+        }
+        if len(self.universe) and updated < len(self.universe):
+            print(f"[Universe] Updated {updated}/{len(self.universe)} symbols ({failed} failed chunks)")
+        return updated
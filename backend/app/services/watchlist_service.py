@@ -1,37 +1,136 @@
+import asyncio
 import json
+import os
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
 
+from app.config import settings
 from app.models import Watchlist, WatchlistItem
 
 WATCHLIST_PATH = Path(__file__).parent.parent.parent / "data" / "watchlist.json"
+WATCHLIST_DIR = WATCHLIST_PATH.parent / "watchlists"
 WATCHLIST_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+DEFAULT_LIST = "default"
+_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+class _List:
+    """In-memory state of one named watchlist (symbol -> item, insertion ordered)"""
+
+    __slots__ = ("items", "updated_at", "mtime")
+
+    def __init__(self, items: Dict[str, WatchlistItem], updated_at: str, mtime: Optional[int]):
+        self.items = items
+        self.updated_at = updated_at
+        self.mtime = mtime  # st_mtime_ns of the file this state was read from / last wrote
+
 class WatchlistService:
-    """Local JSON-backed watchlist storage with simple dedupe."""
+    """Named watchlists held in memory, persisted with coalesced atomic write-behind.
+
+    After a list's first load, reads only stat its file and reparse it when
+    another process (e.g. a second uvicorn worker) has replaced it. Mutations
+    mark the list dirty; a delayed flush (WATCHLIST_FLUSH_DELAY) writes every
+    dirty list to a temp file and renames it over the old one, so readers of
+    the file never see a torn write. Workers do not merge edits: when two of
+    them change the same list within one flush delay, the later write wins.
+    The default list keeps the legacy data/watchlist.json path; others live
+    in data/watchlists/<name>.json.
+    """
+
+    def __init__(self):
+        self._lists: Dict[str, _List] = {}
+        self._dirty: Set[str] = set()
+        self._writing: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
 
     @staticmethod
     def _now_iso() -> str:
         return datetime.now().isoformat()
 
-    def get(self) -> Watchlist:
-        if WATCHLIST_PATH.exists():
-            try:
-                data = json.loads(WATCHLIST_PATH.read_text(encoding="utf-8"))
-                return Watchlist(**data)
-            except Exception:
-                pass
-        return Watchlist(symbols=[], updated_at=self._now_iso())
-
-    def save(self, wl: Watchlist) -> Watchlist:
-        wl.updated_at = self._now_iso()
-        WATCHLIST_PATH.write_text(json.dumps(wl.model_dump(), ensure_ascii=False, indent=2), encoding="utf-8")
-        return wl
-
-    def add_symbols(self, symbols: List[Dict]) -> Watchlist:
-        wl = self.get()
-        existing = {item.symbol.upper(): item for item in wl.symbols}
+    @staticmethod
+    def _path(name: str) -> Path:
+        return WATCHLIST_PATH if name == DEFAULT_LIST else WATCHLIST_DIR / f"{name}.json"
+
+    @staticmethod
+    def validate_name(name: str) -> str:
+        if not _NAME_RE.match(name or ""):
+            raise ValueError("Watchlist name must be 1-64 letters, digits, '_' or '-'")
+        return name
+
+    @staticmethod
+    def _mtime(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self, name: str, create: bool = False) -> _List:
+        """
+        Current state of a list. A list with no file and no unsaved edits is
+        returned empty without being kept, unless `create` (a mutation) asks
+        for it, so reads of arbitrary names never accumulate.
+        """
+        state = self._lists.get(name)
+        if state is not None and (name in self._dirty or name in self._writing):
+            return state  # unsaved local edits win over the file
+        if state is None:
+            self.validate_name(name)
+        path = self._path(name)
+        mtime = self._mtime(path)
+        if state is not None and state.mtime == mtime:
+            return state
+        items: Dict[str, WatchlistItem] = {}
+        updated_at = self._now_iso()
+        if mtime is None:
+            self._lists.pop(name, None)  # gone from disk (or never written)
+            state = _List(items, updated_at, None)
+            if create:
+                self._lists[name] = state
+            return state
+        try:
+            wl = Watchlist(**json.loads(path.read_text(encoding="utf-8")))
+            items = {it.symbol.upper(): it for it in wl.symbols}
+            updated_at = wl.updated_at
+        except Exception as e:
+            print(f"[watchlist] Could not read {path.name}: {e}")
+            if state is not None:
+                return state
+        state = self._lists[name] = _List(items, updated_at, mtime)
+        return state
+
+    def exists(self, name: str) -> bool:
+        """The default list always exists; others once created here or on disk"""
+        if name == DEFAULT_LIST or name in self._lists:
+            return True
+        return self._mtime(self._path(self.validate_name(name))) is not None
+
+    def names(self) -> List[str]:
+        on_disk = {p.stem for p in WATCHLIST_DIR.glob("*.json")} if WATCHLIST_DIR.exists() else set()
+        return sorted({DEFAULT_LIST} | on_disk | set(self._lists))
+
+    def get(self, name: str = DEFAULT_LIST) -> Watchlist:
+        state = self._load(name)
+        return Watchlist(symbols=list(state.items.values()), updated_at=state.updated_at)
+
+    def contains(self, symbol: str, name: str = DEFAULT_LIST) -> bool:
+        return symbol.upper() in self._load(name).items
+
+    def _touch(self, name: str) -> Watchlist:
+        state = self._lists[name]
+        state.updated_at = self._now_iso()
+        self._dirty.add(name)
+        self._schedule_flush()
+        return self.get(name)
+
+    def save(self, wl: Watchlist, name: str = DEFAULT_LIST) -> Watchlist:
+        state = self._load(name, create=True)
+        state.items = {it.symbol.upper(): it for it in wl.symbols}
+        return self._touch(name)
+
+    def add_symbols(self, symbols: List[Dict], name: str = DEFAULT_LIST) -> Watchlist:
+        existing = self._load(name, create=True).items
         for entry in symbols:
             sym = entry.get("symbol", "").upper()
             if not sym:
@@ -42,23 +141,90 @@ class WatchlistService:
                     existing[sym].notes = notes
             else:
                 existing[sym] = WatchlistItem(symbol=sym, notes=notes, added_at=self._now_iso())
-        wl.symbols = list(existing.values())
-        return self.save(wl)
-
-    def remove_symbol(self, symbol: str) -> Watchlist:
-        wl = self.get()
-        symbol = symbol.upper()
-        wl.symbols = [it for it in wl.symbols if it.symbol.upper() != symbol]
-        return self.save(wl)
-
-    def replace(self, items: List[Dict]) -> Watchlist:
-        cleaned = []
-        seen = set()
+        return self._touch(name)
+
+    def remove_symbol(self, symbol: str, name: str = DEFAULT_LIST) -> Optional[Watchlist]:
+        """None if the list does not exist"""
+        if not self.exists(name):
+            return None
+        self._load(name, create=True).items.pop(symbol.upper(), None)
+        return self._touch(name)
+
+    def replace(self, items: List[Dict], name: str = DEFAULT_LIST) -> Watchlist:
+        state = self._load(name, create=True)
+        cleaned: Dict[str, WatchlistItem] = {}
         for entry in items:
             sym = entry.get("symbol", "").upper()
-            if not sym or sym in seen:
+            if not sym or sym in cleaned:
                 continue
-            seen.add(sym)
-            cleaned.append(WatchlistItem(symbol=sym, notes=entry.get("notes"), added_at=self._now_iso()))
-        wl = Watchlist(symbols=cleaned, updated_at=self._now_iso())
-        return self.save(wl)
+            cleaned[sym] = WatchlistItem(symbol=sym, notes=entry.get("notes"), added_at=self._now_iso())
+        state.items = cleaned
+        return self._touch(name)
+
+    # ---------- write-behind ----------
+    def _schedule_flush(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()  # no event loop (scripts/tests): write through
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        # Edits made while a write is in flight (and failed writes) are picked up by the next round
+        while self._dirty:
+            await asyncio.sleep(settings.WATCHLIST_FLUSH_DELAY)
+            await self.flush()
+
+    def _pending_writes(self) -> Dict[str, str]:
+        writes = {}
+        for name in self._dirty:
+            wl = self.get(name)
+            writes[name] = json.dumps(wl.model_dump(), ensure_ascii=False, separators=(",", ":"))
+        self._dirty.clear()
+        return writes
+
+    def _write_atomic(self, writes: Dict[str, str]) -> Dict[str, Optional[int]]:
+        """Write each list and return the new file mtimes"""
+        mtimes = {}
+        for name, payload in writes.items():
+            path = self._path(name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(payload)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, path)
+            mtimes[name] = self._mtime(path)
+        return mtimes
+
+    def _written(self, mtimes: Dict[str, Optional[int]]) -> None:
+        for name, mtime in mtimes.items():
+            state = self._lists.get(name)
+            if state is not None:
+                state.mtime = mtime
+
+    async def flush(self) -> None:
+        writes = self._pending_writes()  # snapshot on the loop; disk I/O off it
+        if writes:
+            self._writing.update(writes)
+            try:
+                self._written(await asyncio.to_thread(self._write_atomic, writes))
+            except Exception as e:
+                print(f"[watchlist] Flush failed: {e}")
+                self._dirty.update(writes)  # retried by the running _delayed_flush loop
+            finally:
+                self._writing.difference_update(writes)
+
+    def flush_sync(self) -> None:
+        writes = self._pending_writes()
+        if writes:
+            self._written(self._write_atomic(writes))
+
+    async def stop(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush()
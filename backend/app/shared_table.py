@@ -0,0 +1,392 @@
+import asyncio
+import json
+import mmap
+import os
+import socket
+import struct
+import tempfile
+import time
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app import metrics
+
+# Table file layout: header, then one JSON document of `length` bytes.
+# `seq` is a seqlock: odd while the publisher is writing, bumped to the next
+# even value when the document is complete. Readers copy the document and
+# keep it only if `seq` was even and unchanged across the copy.
+MAGIC = b"MKTTBL01"
+HEADER = struct.Struct("<8sQQd")  # magic, seq, length, published_at
+_SEQ = struct.Struct("<Q")
+_SEQ_OFFSET = 8
+_BODY_OFFSET = 16
+_READ_ATTEMPTS = 8
+_MISSING = object()
+
+# Sections published for readers (MarketService method names). SEC headlines stay
+# per worker: they come from a conditional poll that also fills the local filings store.
+SECTIONS = ("get_indices", "get_vix", "get_sectors", "get_breadth", "get_movers", "get_macro_calendar")
+
+def table_path() -> Path:
+    if settings.SHARED_TABLE_PATH:
+        return Path(settings.SHARED_TABLE_PATH)
+    base = Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir())
+    return base / "market-aggregator.table"
+
+def demand_path() -> Path:
+    path = table_path()
+    return path.with_name(path.name + ".sock")
+
+class SharedTableWriter:
+    """Publisher side of the table file (memory-mapped; on tmpfs under /dev/shm by default)"""
+
+    def __init__(self, path: Path, size: int):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Never shrink: readers may have the current size mapped
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, 0)
+        finally:
+            os.close(fd)
+        magic, seq, _length, _published = HEADER.unpack_from(self._mm, 0)
+        # Continue the sequence across restarts so readers never mistake a new document for one they hold
+        self.seq = seq + (seq & 1) if magic == MAGIC else 0
+        if magic != MAGIC:
+            HEADER.pack_into(self._mm, 0, MAGIC, 0, 0, 0.0)
+        self.published = 0
+        self.published_at = 0.0
+        self.size = 0
+
+    def publish(self, doc: Dict[str, Any]) -> bool:
+        payload = json.dumps(doc, separators=(",", ":")).encode()
+        if HEADER.size + len(payload) > len(self._mm):
+            print(f"[shared] Table document is {len(payload)} bytes; SHARED_TABLE_SIZE is {len(self._mm)}")
+            return False
+        mm = self._mm
+        _SEQ.pack_into(mm, _SEQ_OFFSET, self.seq + 1)
+        mm[HEADER.size:HEADER.size + len(payload)] = payload
+        self.published_at = time.time()
+        struct.pack_into("<Qd", mm, _BODY_OFFSET, len(payload), self.published_at)
+        self.seq += 2
+        _SEQ.pack_into(mm, _SEQ_OFFSET, self.seq)
+        self.published += 1
+        self.size = len(payload)
+        return True
+
+    def close(self) -> None:
+        self._mm.close()
+
+class SharedTableReader:
+    """
+    Worker side: maps the table read-only and decodes the document only when
+    its sequence number changes. Symbols missing from the quote table are
+    announced to the publisher over a Unix datagram socket (fire and forget).
+    """
+
+    def __init__(self, path: Path, max_age: float):
+        self.path = path
+        self.max_age = max_age
+        self.seq = -1
+        self.published_at = 0.0
+        self.doc: Dict[str, Any] = {}
+        self.torn_reads = 0
+        self._mm: Optional[mmap.mmap] = None
+        self._inode: Optional[int] = None
+        self._next_open = 0.0
+        self._sock: Optional[socket.socket] = None
+        self._announced: Dict[str, float] = {}
+        self._warned_stale = False
+
+    def _open(self) -> bool:
+        now = time.monotonic()
+        if now < self._next_open:
+            return self._mm is not None
+        self._next_open = now + 1.0
+        try:
+            fd = os.open(str(self.path), os.O_RDONLY)
+        except FileNotFoundError:
+            return self._mm is not None
+        try:
+            inode = os.fstat(fd).st_ino
+            if self._mm is not None and inode == self._inode and len(self._mm) == os.fstat(fd).st_size:
+                return True
+            mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # empty file: the publisher has not sized it yet
+            return self._mm is not None
+        finally:
+            os.close(fd)
+        if self._mm is not None:
+            self._mm.close()
+        self._mm, self._inode = mm, inode
+        return True
+
+    def read(self) -> Dict[str, Any]:
+        """Latest consistent document (the previous one if the publisher is mid-write)"""
+        if (self._mm is None or self.stale()) and not self._open():
+            return self.doc
+        mm = self._mm
+        for _ in range(_READ_ATTEMPTS):
+            magic, seq, length, published_at = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or seq == 0:
+                return self.doc
+            if seq == self.seq:
+                return self.doc
+            if seq & 1:
+                continue
+            if HEADER.size + length > len(mm):
+                self._next_open = 0.0  # the file grew; remap
+                if not self._open():
+                    return self.doc
+                mm = self._mm
+                continue
+            payload = mm[HEADER.size:HEADER.size + length]
+            if _SEQ.unpack_from(mm, _SEQ_OFFSET)[0] != seq:
+                self.torn_reads += 1
+                continue
+            try:
+                doc = json.loads(payload)
+            except ValueError:
+                self.torn_reads += 1
+                continue
+            self.seq, self.doc, self.published_at = seq, doc, published_at
+            self._warned_stale = False
+            break
+        return self.doc
+
+    def age(self) -> float:
+        return time.time() - self.published_at if self.published_at else float("inf")
+
+    def stale(self) -> bool:
+        return bool(self.max_age) and self.age() > self.max_age
+
+    def fresh(self) -> bool:
+        """True when the table can be served; otherwise callers use their own upstream path"""
+        self.read()
+        if self.stale():
+            if not self._warned_stale:
+                print(f"[shared] Table at {self.path} is missing or stale; fetching locally")
+                self._warned_stale = True
+            return False
+        return True
+
+    # ---------- lookups ----------
+    def section(self, name: str) -> Any:
+        """The section's published return value (tuples arrive as lists), or _MISSING"""
+        if not self.fresh():
+            return _MISSING
+        return self.doc.get("sections", {}).get(name, _MISSING)
+
+    def posture(self) -> Optional[Dict[str, Any]]:
+        return self.doc.get("posture") if self.fresh() else None
+
+    async def quotes(self, symbols: List[str], wait: float) -> Tuple[Dict[str, Dict], str]:
+        """Quotes from the table; symbols it lacks are requested and waited for up to `wait` seconds"""
+        wanted = list(dict.fromkeys(symbols))
+        self.want(wanted)
+        deadline = time.monotonic() + wait
+        while True:
+            table = self.read().get("quotes", {})
+            found = {s: table[s] for s in wanted if s in table}
+            if len(found) == len(wanted) or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(0.05)
+        sources = dict.fromkeys(q.get("source") for q in found.values() if q.get("source"))
+        return found, "+".join(sources) or "None"
+
+    def want(self, symbols: Iterable[str]) -> None:
+        """Tell the publisher which quotes are in use; each symbol is re-announced every third of SHARED_DEMAND_TTL"""
+        if not hasattr(socket, "AF_UNIX"):
+            return
+        now = time.monotonic()
+        refresh = settings.SHARED_DEMAND_TTL / 3
+        due = [s for s in symbols if now - self._announced.get(s, float("-inf")) >= refresh]
+        if not due:
+            return
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.setblocking(False)
+        for i in range(0, len(due), 500):
+            chunk = due[i:i + 500]
+            try:
+                self._sock.sendto(",".join(chunk).encode(), str(demand_path()))
+            except OSError:
+                return  # publisher not listening (yet); retried on the next request
+            for s in chunk:
+                self._announced[s] = now
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "reader",
+            "path": str(self.path),
+            "seq": self.seq,
+            "age": round(self.age(), 3) if self.published_at else None,
+            "quotes": len(self.doc.get("quotes", {})),
+            "torn_reads": self.torn_reads,
+        }
+
+class SharedTablePublisher:
+    """
+    Owns provider access for every worker: every SHARED_TABLE_INTERVAL seconds
+    it loads the summary sections (through the regular caches), quotes for all
+    symbols readers asked for within SHARED_DEMAND_TTL, and the live posture,
+    then publishes them as one document. New demand triggers an early round.
+    """
+
+    def __init__(self, market, path: Optional[Path] = None):
+        self.market = market
+        self.path = path or table_path()
+        self.writer: Optional[SharedTableWriter] = None
+        self.demand: Dict[str, float] = {}
+        self.quotes: Dict[str, Dict] = {}
+        self._wake = asyncio.Event()
+        self._sock: Optional[socket.socket] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _bind(self) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            print("[shared] Unix sockets unavailable; readers only get published sections and sector quotes")
+            return
+        path = demand_path()
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(path))
+        sock.setblocking(False)
+        self._sock = sock
+
+    async def _listen(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            data = await loop.sock_recv(self._sock, 65536)
+            now = time.monotonic()
+            new = False
+            for sym in data.decode(errors="ignore").split(","):
+                sym = sym.strip().upper()
+                if not sym or len(sym) > 20:
+                    continue
+                if sym not in self.demand and len(self.demand) >= settings.SHARED_MAX_SYMBOLS:
+                    continue
+                new = new or sym not in self.quotes
+                self.demand[sym] = now
+            if new:
+                self._wake.set()
+
+    async def _load_quotes(self) -> None:
+        cutoff = time.monotonic() - settings.SHARED_DEMAND_TTL
+        self.demand = {s: t for s, t in self.demand.items() if t >= cutoff}
+        self.quotes = {s: q for s, q in self.quotes.items() if s in self.demand}
+        if self.demand:
+            quotes, _source = await self.market.fetch_with_fallback(sorted(self.demand))
+            self.quotes.update(quotes)
+
+    async def _load_sections(self) -> Dict[str, Any]:
+        names = list(SECTIONS)
+        results = await asyncio.gather(*(getattr(self.market, name)() for name in names), return_exceptions=True)
+        sections = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                print(f"[shared] {name} failed: {result}")
+                continue
+            sections[name] = result
+        return sections
+
+    async def publish_once(self) -> bool:
+        sections, _ = await asyncio.gather(self._load_sections(), self._load_quotes())
+        doc = {
+            "published_at": time.time(),
+            "sections": sections,
+            "quotes": self.quotes,
+            "posture": self.market.live_posture.current().model_dump(),
+        }
+        return self.writer.publish(doc)
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                await self.publish_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[shared] Publish failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.SHARED_TABLE_INTERVAL)
+                await asyncio.sleep(0.05)  # batch demand that arrives together
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self.writer = SharedTableWriter(self.path, settings.SHARED_TABLE_SIZE)
+        self._bind()
+        self._tasks = [asyncio.create_task(self._run())]
+        if self._sock is not None:
+            self._tasks.append(asyncio.create_task(self._listen()))
+        print(f"[shared] Publishing to {self.path} every {settings.SHARED_TABLE_INTERVAL}s")
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            try:
+                demand_path().unlink()
+            except FileNotFoundError:
+                pass
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def stats(self) -> Dict[str, Any]:
+        writer = self.writer
+        return {
+            "mode": "publisher",
+            "path": str(self.path),
+            "seq": writer.seq if writer else None,
+            "age": round(time.time() - writer.published_at, 3) if writer and writer.published_at else None,
+            "bytes": writer.size if writer else 0,
+            "quotes": len(self.quotes),
+            "demand": len(self.demand),
+        }
+
+# One reader per worker process when SHARED_TABLE_MODE=reader
+reader: Optional[SharedTableReader] = None
+if settings.SHARED_TABLE_MODE == "reader":
+    reader = SharedTableReader(table_path(), settings.SHARED_TABLE_MAX_AGE)
+
+def shared(func: Callable) -> Callable:
+    """Serve a no-argument MarketService section from the shared table in reader mode"""
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if reader is not None and not args and not kwargs:
+            hit = reader.section(func.__name__)
+            if hit is not _MISSING:
+                return hit
+        return await func(self, *args, **kwargs)
+    return wrapper
+
+def _table_age() -> Dict[Tuple, float]:
+    if reader is not None and reader.published_at:
+        return {(): reader.age()}
+    return {}
+
+metrics.Gauge("shared_table_age_seconds", "Age of the shared quote table this worker reads", collect=_table_age)
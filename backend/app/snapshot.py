@@ -0,0 +1,107 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from pydantic import BaseModel
+from app.patch import NullValueError, merge_diff
+from app import timing
+
+class Snapshot:
+    """A built response model plus its serialized bytes and ETag"""
+
+    __slots__ = ("version", "fingerprint", "model", "body", "digest", "etag")
+
+    def __init__(self, version: int, fingerprint: Any, model: BaseModel, body: bytes):
+        self.version = version
+        self.fingerprint = fingerprint
+        self.model = model
+        self.body = body
+        self.digest = hashlib.sha1(body).hexdigest()[:16]
+        self.etag = f'"{version}-{self.digest}"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header value covers this snapshot"""
+        if not if_none_match:
+            return False
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or self.etag in tags or f"W/{self.etag}" in tags
+
+def parse_since(value: str) -> Tuple[int, Optional[str]]:
+    """`?since=` value -> (version, digest): a bare version, or an ETag `"<version>-<digest>"`"""
+    value = value.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    version, _, digest = value.strip('"').partition("-")
+    return int(version), digest or None
+
+class SnapshotStore:
+    """Rebuilds and re-serializes a response only when its input fingerprint changes.
+
+    The JSON documents of the last `history` versions are kept so clients can
+    ask for a merge patch since the version they hold (see `delta_since`).
+    Version numbers are local to the process; `require_digest` makes deltas
+    depend on the client also naming the content digest of its base.
+    """
+
+    def __init__(self, history: int = 0, require_digest: bool = False):
+        self.current: Optional[Snapshot] = None
+        self.version = 0
+        self.builds = 0
+        self.reuses = 0
+        self.history_size = history
+        self.require_digest = require_digest
+        self.history: "OrderedDict[int, Tuple[str, Dict[str, Any]]]" = OrderedDict()  # version -> (digest, doc)
+        self._deltas: Dict[int, bytes] = {}  # base version -> encoded delta to current
+
+    def get_or_build(self, fingerprint: Any, build: Callable[[], BaseModel]) -> Snapshot:
+        current = self.current
+        if current is not None and current.fingerprint == fingerprint:
+            self.reuses += 1
+            return current
+        with timing.span("snapshot.build"):
+            model = build()
+        # pydantic-core serializes straight to JSON bytes, skipping the dict round-trip
+        with timing.span("snapshot.serialize"):
+            body = model.__pydantic_serializer__.to_json(model)
+        self.version += 1
+        self.builds += 1
+        self.current = Snapshot(self.version, fingerprint, model, body)
+        if self.history_size:
+            self.history[self.version] = (self.current.digest, json.loads(body))
+            while len(self.history) > self.history_size:
+                self.history.popitem(last=False)
+            self._deltas.clear()
+        return self.current
+
+    def delta_since(self, base: int, digest: Optional[str] = None) -> bytes:
+        """
+        Encoded {"version", "etag", "base", "patch"} turning version `base`
+        into the current one, or {"version", "etag", "base": null, "full"} when
+        `base` is not in the history, `digest` does not match its content, or
+        a field became null (which a merge patch would read as a removal).
+        """
+        encoded = self._deltas.get(base)
+        current = self.current
+        old = self.history.get(base)
+        if old is not None and (digest or self.require_digest) and digest != old[0]:
+            old = None  # same number, different document (another process, or a restart)
+        patch = None
+        if old is not None and current is not None and encoded is None:
+            try:
+                patch = merge_diff(old[1], self.history[current.version][1])
+            except NullValueError:
+                old = None
+        if old is None or current is None:
+            full = None
+            if current is not None:
+                kept = self.history.get(current.version)
+                full = kept[1] if kept else json.loads(current.body)
+            doc = {"version": self.version, "etag": current.etag if current else None, "base": None, "full": full}
+            # Not memoized: unknown bases are unbounded
+            return json.dumps(doc, separators=(",", ":")).encode()
+        if encoded is not None:
+            return encoded
+        encoded = json.dumps({"version": current.version, "etag": current.etag, "base": base, "patch": patch},
+                             separators=(",", ":")).encode()
+        self._deltas[base] = encoded
+        return encoded
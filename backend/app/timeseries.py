@@ -0,0 +1,148 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+
+Bars = Tuple[np.ndarray, np.ndarray, np.ndarray]  # (timestamps int64, closes float64, volumes int64)
+
+def as_bars(timestamps, closes, volumes=None) -> Bars:
+    """Build aligned arrays from raw provider columns, dropping rows with a missing close"""
+    t = np.asarray(timestamps, dtype=float)
+    c = np.asarray(closes, dtype=float)  # None -> nan
+    n = min(len(t), len(c))
+    t, c = t[:n], c[:n]
+    v = np.zeros(n)
+    if volumes is not None:
+        raw = np.asarray(volumes[:n], dtype=float)
+        v[:len(raw)] = raw
+    ok = ~(np.isnan(t) | np.isnan(c))
+    return t[ok].astype(np.int64), c[ok], np.nan_to_num(v[ok]).astype(np.int64)
+
+class RingBuffer:
+    """Bounded timestamp/close/volume columns for one symbol.
+
+    Every row is written twice (at i and i + rows), so the latest n rows
+    always form one contiguous slice and reads are zero-copy views. Views are
+    read-only and reflect later writes; copy them if they must outlive one.
+    With `initial`, only that many rows are allocated up front and the
+    columns double as rows arrive, up to `capacity`.
+    """
+
+    def __init__(self, capacity: int, initial: Optional[int] = None):
+        self.capacity = capacity
+        self._rows = capacity if initial is None else max(1, min(initial, capacity))  # allocated rows
+        self._t = np.zeros(2 * self._rows, dtype=np.int64)
+        self._c = np.zeros(2 * self._rows, dtype=np.float64)
+        self._v = np.zeros(2 * self._rows, dtype=np.int64)
+        self._head = 0  # next write position in [0, rows)
+        self.size = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._t.nbytes + self._c.nbytes + self._v.nbytes
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self._t[self._head + self._rows - 1]) if self.size else None
+
+    def _grow(self, rows: int) -> None:
+        """Reallocate to `rows` rows, keeping the stored ones in order at the start"""
+        cols = []
+        for col in (self._t, self._c, self._v):
+            kept = col[self._head + self._rows - self.size:self._head + self._rows]
+            new = np.zeros(2 * rows, dtype=col.dtype)
+            new[:self.size] = kept
+            new[rows:rows + self.size] = kept
+            cols.append(new)
+        self._t, self._c, self._v = cols
+        self._rows = rows
+        self._head = self.size
+
+    def _write(self, t: np.ndarray, c: np.ndarray, v: np.ndarray) -> None:
+        n = len(t)
+        if n > self.capacity:
+            t, c, v = t[-self.capacity:], c[-self.capacity:], v[-self.capacity:]
+            n = self.capacity
+        if self.size + n > self._rows and self._rows < self.capacity:
+            self._grow(min(self.capacity, max(self.size + n, 2 * self._rows)))
+        rows = self._rows
+        idx = (self._head + np.arange(n)) % rows
+        for col, src in ((self._t, t), (self._c, c), (self._v, v)):
+            col[idx] = src
+            col[idx + rows] = src
+        self._head = (self._head + n) % rows
+        self.size = min(rows, self.size + n)
+
+    def extend(self, bars: Bars) -> int:
+        """Append bars newer than the last stored one; a bar at the last timestamp revises it"""
+        t, c, v = bars
+        if not len(t):
+            return 0
+        last = self.last_timestamp
+        if last is not None:
+            if t[0] <= last:
+                # Revise the stored last bar in place if the provider re-sent it
+                same = np.nonzero(t == last)[0]
+                if len(same):
+                    i = same[-1]
+                    pos = (self._head - 1) % self._rows
+                    for col, src in ((self._c, c), (self._v, v)):
+                        col[pos] = src[i]
+                        col[pos + self._rows] = src[i]
+            newer = t > last
+            t, c, v = t[newer], c[newer], v[newer]
+        self._write(t, c, v)
+        return len(t)
+
+    def tail(self, n: Optional[int] = None) -> Bars:
+        """Zero-copy read-only views over the latest n rows (oldest first)"""
+        n = self.size if n is None else max(0, min(n, self.size))
+        end = self._head + self._rows
+        views = []
+        for col in (self._t, self._c, self._v):
+            view = col[end - n:end]
+            view.flags.writeable = False
+            views.append(view)
+        return tuple(views)
+
+class IntradayStore:
+    """Per-(symbol, interval) ring buffers with a bounded symbol count (LRU)"""
+
+    def __init__(self, capacity: int, max_symbols: int, initial: Optional[int] = None):
+        self.capacity = capacity
+        self.initial = initial  # None: preallocate `capacity` rows; else start this small and grow
+        self.max_symbols = max_symbols
+        self._buffers: "OrderedDict[Tuple[str, str], RingBuffer]" = OrderedDict()
+
+    def get(self, symbol: str, interval: str) -> Optional[RingBuffer]:
+        buf = self._buffers.get((symbol, interval))
+        if buf is not None:
+            self._buffers.move_to_end((symbol, interval))
+        return buf
+
+    def extend(self, symbol: str, interval: str, bars: Bars) -> RingBuffer:
+        key = (symbol, interval)
+        buf = self._buffers.get(key)
+        if buf is None:
+            buf = self._buffers[key] = RingBuffer(self.capacity, self.initial)
+            while len(self._buffers) > self.max_symbols:
+                self._buffers.popitem(last=False)
+        self._buffers.move_to_end(key)
+        buf.extend(bars)
+        return buf
+
+    def tail(self, symbol: str, interval: str, n: Optional[int] = None) -> Optional[Bars]:
+        buf = self.get(symbol, interval)
+        return buf.tail(n) if buf is not None else None
+
+    def keys(self) -> List[Tuple[str, str]]:
+        return list(self._buffers)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "symbols": len(self._buffers),
+            "capacity": self.capacity,
+            "bytes": sum(b.nbytes for b in self._buffers.values()),
+        }
+
+intraday_store = IntradayStore(settings.INTRADAY_CAPACITY, settings.INTRADAY_MAX_SYMBOLS)
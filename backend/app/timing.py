@@ -0,0 +1,254 @@
+import functools
+import itertools
+import json
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from app.config import settings
+
+# Spans kept per request; further ones are counted but not stored
+MAX_SPANS = 500
+
+class RequestTiming:
+    """Spans recorded while one request is in flight (shared by every task it spawns)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float, float, Optional[str]]] = []  # (name, start, duration, detail)
+        self.dropped = 0
+        self.closed = False
+
+    def add(self, name: str, start: float, duration: float, detail: Optional[str] = None) -> None:
+        # Background tasks started by a request inherit its context; stop recording once it has finished
+        if self.closed:
+            return
+        if len(self.spans) >= MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append((name, start, duration, detail))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def totals(self) -> Dict[str, Tuple[float, int]]:
+        """name -> (summed seconds, count), in first-seen order"""
+        out: Dict[str, Tuple[float, int]] = {}
+        for name, _start, duration, _detail in self.spans:
+            total, count = out.get(name, (0.0, 0))
+            out[name] = (total + duration, count + 1)
+        return out
+
+    def server_timing(self) -> str:
+        parts = []
+        for name, (total, count) in self.totals().items():
+            desc = f';desc="x{count}"' if count > 1 else ""
+            parts.append(f"{name};dur={total * 1000:.1f}{desc}")
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round(self.elapsed() * 1000, 2),
+            "spans": [
+                {"name": name, "start_ms": round((start - self.started) * 1000, 2),
+                 "duration_ms": round(duration * 1000, 2), **({"detail": detail} if detail else {})}
+                for name, start, duration, detail in self.spans
+            ],
+            "dropped": self.dropped,
+        }
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+def current() -> Optional[RequestTiming]:
+    return _current.get()
+
+def record(name: str, start: float, detail: Optional[str] = None) -> None:
+    """Record a span that began at `start` (perf_counter) and ends now; no-op outside a request"""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(name, start, time.perf_counter() - start, detail)
+
+@contextmanager
+def span(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, start)
+
+def timed(name: Optional[str] = None):
+    """Record each call of an async function as a span (named after the function by default)"""
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                record(label, start)
+        return wrapper
+    return decorator
+
+# ---------- sampling profiler ----------
+class StackSampler:
+    """
+    Samples the event-loop thread's Python stack every `interval` seconds from
+    a helper thread and counts collapsed stacks (`outer;...;inner count`, the
+    input format of flamegraph.pl and speedscope). The loop thread is shared,
+    so samples include whatever else the loop ran while the request was open.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.counts.most_common())
+
+class Profiler:
+    """Attaches a StackSampler to the next `n` requests once armed; keeps the last few results"""
+
+    def __init__(self, keep: int):
+        self.remaining = 0
+        self.interval = settings.PROFILE_INTERVAL
+        self.results: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+
+    def arm(self, requests: int, interval: Optional[float] = None) -> None:
+        self.remaining = requests
+        if interval:
+            self.interval = interval
+
+    def begin(self, path: str) -> Optional[StackSampler]:
+        if self.remaining <= 0 or path.startswith("/api/debug/"):
+            return None
+        self.remaining -= 1
+        return StackSampler(threading.get_ident(), self.interval).start()
+
+    def finish(self, sampler: StackSampler, method: str, path: str, duration: float) -> None:
+        sampler.stop()
+        self.results.append({
+            "id": next(self._ids),
+            "method": method,
+            "path": path,
+            "duration_ms": round(duration * 1000, 2),
+            "samples": sum(sampler.counts.values()),
+            "interval_ms": round(sampler.interval * 1000, 3),
+            "stacks": sampler.collapsed(),
+        })
+
+    def get(self, profile_id: int) -> Optional[Dict[str, Any]]:
+        return next((p for p in self.results if p["id"] == profile_id), None)
+
+    def listing(self) -> Dict[str, Any]:
+        return {
+            "remaining": self.remaining,
+            "profiles": [{k: v for k, v in p.items() if k != "stacks"} for p in self.results],
+        }
+
+profiler = Profiler(settings.PROFILE_KEEP)
+
+def admin_allowed(token: Optional[str]) -> bool:
+    """Admin endpoints are off unless ADMIN_TOKEN is set, then need a matching X-Admin-Token"""
+    return bool(settings.ADMIN_TOKEN) and token is not None and secrets.compare_digest(token, settings.ADMIN_TOKEN)
+
+# ---------- ASGI middleware ----------
+def _wants_debug(scope) -> bool:
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("debug", [])
+    return "timing" in values
+
+def _with_debug(body: bytes, timing: RequestTiming) -> Optional[bytes]:
+    """Adds a `_debug` block to a JSON object body; other JSON is wrapped as {data, _debug}"""
+    try:
+        doc = json.loads(body)
+    except ValueError:
+        return None
+    debug = {"timing": timing.report()}
+    doc = {**doc, "_debug": debug} if isinstance(doc, dict) else {"data": doc, "_debug": debug}
+    return json.dumps(doc, separators=(",", ":")).encode()
+
+class TimingMiddleware:
+    """
+    Opens a RequestTiming for every HTTP request and reports it as a
+    Server-Timing header. `?debug=timing` also puts the span list into JSON
+    responses. Requests picked by an armed `profiler` are sampled while open.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.REQUEST_TIMING:
+            await self.app(scope, receive, send)
+            return
+        timing = RequestTiming()
+        token = _current.set(timing)
+        sampler = profiler.begin(scope["path"])
+        debug = _wants_debug(scope)
+        held: Dict[str, Any] = {}  # debug mode: the response start message and body parts
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"server-timing"]
+                content_type = dict(headers).get(b"content-type", b"")
+                if debug and content_type.startswith(b"application/json"):
+                    held["start"], held["body"] = {**message, "headers": headers}, []
+                    return
+                headers.append((b"server-timing", timing.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body" and "start" in held:
+                held["body"].append(message.get("body", b""))
+                if message.get("more_body"):
+                    return
+                await self._send_debug(send, held["start"], b"".join(held["body"]), timing)
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            timing.closed = True
+            _current.reset(token)
+            if sampler is not None:
+                profiler.finish(sampler, scope["method"], scope["path"], timing.elapsed())
+
+    @staticmethod
+    async def _send_debug(send, start, body: bytes, timing: RequestTiming) -> None:
+        body = _with_debug(body, timing) or body
+        headers = [(k, v) for k, v in start["headers"] if k.lower() != b"content-length"]
+        headers.append((b"content-length", str(len(body)).encode()))
+        headers.append((b"server-timing", timing.server_timing().encode("latin-1")))
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,187 @@
+"""Offline stand-ins for the upstream providers, served through httpx.MockTransport.
+
+Every provider client in app.data_sources is swapped for one routed to
+MockFarm.handle, so the app runs its real fetch/parse/fallback code with no
+network. Latency, error rate and throttling (429) are configurable per farm,
+and all randomness comes from one seeded generator so runs are repeatable.
+"""
+import asyncio
+import hashlib
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+# Request host -> DataSource.name (the key of its pooled client)
+HOSTS = {
+    "query1.finance.yahoo.com": "YahooFinance",
+    "www.alphavantage.co": "AlphaVantage",
+    "finnhub.io": "Finnhub",
+    "api.stlouisfed.org": "FRED",
+    "www.sec.gov": "SECEdgar",
+}
+
+def _unit(symbol: str) -> float:
+    """Stable per-symbol value in [0, 1)"""
+    return int(hashlib.md5(symbol.encode()).hexdigest()[:8], 16) / 0x100000000
+
+class MockFarm:
+    def __init__(self, latency_ms: float = 50.0, jitter: float = 0.5, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, seed: int = 0, bars: int = 78):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.bars = bars
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.tick = 0  # advances quotes so repeated fetches see changes
+
+    # ---------- shared helpers ----------
+    def reset_counters(self) -> None:
+        self.calls.clear()
+        self.statuses.clear()
+
+    def _delay(self) -> float:
+        base = self.latency_ms / 1000.0
+        return max(0.0, self.rng.gauss(base, base * self.jitter)) if base else 0.0
+
+    def _quote(self, symbol: str) -> Dict:
+        u = _unit(symbol)
+        drift = ((self.tick + int(u * 1000)) % 200 - 100) / 100.0
+        price = round(10 + 490 * u, 2)
+        pct = round((u - 0.5) * 6 + drift * 0.5, 2)
+        return {
+            "symbol": symbol,
+            "price": price,
+            "pct": pct,
+            "prev": round(price / (1 + pct / 100.0), 4),
+            "high": round(price * 1.01, 2),
+            "low": round(price * 0.99, 2),
+            "volume": int(1_000_000 * (0.1 + u * 10)),
+        }
+
+    def _bars(self, symbol: str, period1: Optional[int] = None):
+        end = int(time.time()) // 300 * 300
+        start = end - 300 * (self.bars - 1)
+        if period1:
+            start = max(start, int(period1) // 300 * 300)
+        stamps = list(range(start, end + 1, 300))
+        base = self._quote(symbol)["price"]
+        closes = [round(base * (1 + 0.002 * ((t // 300 + int(_unit(symbol) * 97)) % 11 - 5)), 4) for t in stamps]
+        return stamps, closes, [1000 + (t // 300) % 500 for t in stamps]
+
+    # ---------- providers ----------
+    def _yahoo(self, request: httpx.Request) -> httpx.Response:
+        path, params = request.url.path, request.url.params
+        if path.endswith("/v7/finance/quote"):
+            result = []
+            for sym in filter(None, params.get("symbols", "").split(",")):
+                q = self._quote(sym)
+                result.append({
+                    "symbol": sym,
+                    "regularMarketPrice": q["price"],
+                    "regularMarketChangePercent": q["pct"],
+                    "regularMarketDayHigh": q["high"],
+                    "regularMarketDayLow": q["low"],
+                    "regularMarketVolume": q["volume"],
+                })
+            return httpx.Response(200, json={"quoteResponse": {"result": result, "error": None}})
+        if path.endswith("/v8/finance/spark"):
+            result = []
+            for sym in filter(None, params.get("symbols", "").split(",")):
+                t, c, v = self._bars(sym)
+                result.append({"symbol": sym, "response": [{"timestamp": t, "indicators": {"quote": [{"close": c, "volume": v}]}}]})
+            return httpx.Response(200, json={"spark": {"result": result, "error": None}})
+        if "/v8/finance/chart/" in path:
+            sym = path.rsplit("/", 1)[-1]
+            t, c, v = self._bars(sym, params.get("period1"))
+            chart = {"meta": {"symbol": sym}, "timestamp": t, "indicators": {"quote": [{"close": c, "volume": v}]}}
+            return httpx.Response(200, json={"chart": {"result": [chart], "error": None}})
+        return httpx.Response(404)
+
+    def _alpha_vantage(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        sym = params.get("symbol", "")
+        if params.get("function") == "GLOBAL_QUOTE":
+            q = self._quote(sym)
+            return httpx.Response(200, json={"Global Quote": {
+                "01. symbol": sym, "03. high": str(q["high"]), "04. low": str(q["low"]),
+                "05. price": str(q["price"]), "06. volume": str(q["volume"]),
+                "10. change percent": f"{q['pct']}%",
+            }})
+        if params.get("function") == "TIME_SERIES_INTRADAY":
+            interval = params.get("interval", "5min")
+            t, c, v = self._bars(sym)
+            series = {time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts)): {"4. close": str(cl), "5. volume": str(vo)}
+                      for ts, cl, vo in zip(t, c, v)}
+            return httpx.Response(200, json={"Meta Data": {"6. Time Zone": "UTC"}, f"Time Series ({interval})": series})
+        return httpx.Response(200, json={})
+
+    def _finnhub(self, request: httpx.Request) -> httpx.Response:
+        q = self._quote(request.url.params.get("symbol", ""))
+        return httpx.Response(200, json={"c": q["price"], "pc": q["prev"], "h": q["high"], "l": q["low"]})
+
+    def _fred(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        start = params.get("observation_start") or "2026-01-01"
+        base = 10 + 20 * _unit(params.get("series_id", ""))
+        days = [f"2026-{m:02d}-{d:02d}" for m in range(1, 13) for d in (1, 8, 15, 22)]
+        obs = [{"date": day, "value": f"{base + (i % 7) * 0.3:.2f}"} for i, day in enumerate(days) if day >= start]
+        return httpx.Response(200, json={"observations": obs})
+
+    def _sec(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("company_tickers.json"):
+            return httpx.Response(200, json={"0": {"cik_str": 320193, "ticker": "AAPL", "title": "Apple Inc."}})
+        etag = f'"feed-{self.tick // 10}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304)
+        count = int(request.url.params.get("count", 10))
+        first = self.tick // 10 * count
+        entries = "".join(
+            f"<entry><title>8-K - COMPANY {n} ({n:010d}) (Filer)</title>"
+            f'<link rel="alternate" type="text/html" href="https://www.sec.gov/{n}"/>'
+            f'<updated>2026-01-01T00:00:00-05:00</updated><category term="8-K"/>'
+            f"<id>urn:tag:sec.gov,2008:accession-number={n}</id></entry>"
+            for n in range(first + count, first, -1)
+        )
+        body = f'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>'
+        return httpx.Response(200, content=body.encode(), headers={"ETag": etag})
+
+    # ---------- transport entry point ----------
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        source = HOSTS.get(request.url.host, request.url.host)
+        self.calls[source] += 1
+        self.tick += 1
+        await asyncio.sleep(self._delay())
+        roll = self.rng.random()
+        if roll < self.throttle_rate:
+            response = httpx.Response(429, headers={"Retry-After": "1"})
+        elif roll < self.throttle_rate + self.error_rate:
+            response = httpx.Response(503)
+        else:
+            handler = {
+                "YahooFinance": self._yahoo,
+                "AlphaVantage": self._alpha_vantage,
+                "Finnhub": self._finnhub,
+                "FRED": self._fred,
+                "SECEdgar": self._sec,
+            }.get(source)
+            response = handler(request) if handler else httpx.Response(404)
+        self.statuses[f"{source}:{response.status_code}"] += 1
+        return response
+
+    def install(self) -> None:
+        """Point every provider's pooled client at this farm"""
+        from app.data_sources import base
+        for name in HOSTS.values():
+            base._clients[name] = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+def universe_csv(n: int) -> str:
+    """A synthetic `symbol,exchange` universe of n symbols for breadth/movers"""
+    rows: List[str] = ["symbol,exchange"]
+    rows += [f"SYM{i:05d},{'nyse' if i % 2 else 'nasdaq'}" for i in range(n)]
+    return "\n".join(rows) + "\n"
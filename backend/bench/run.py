@@ -0,0 +1,199 @@
+"""End-to-end load benchmark against the offline mock provider farm.
+
+    cd backend
+    python -m bench.run --scenario summary,miniquotes,watchlist --concurrency 16 --requests 400
+
+Drives the FastAPI app in-process (httpx ASGITransport, lifespan included)
+with every upstream provider served by bench.mock_farm. Prints a JSON report
+per scenario: latency p50/p95/p99, throughput, status codes and upstream
+calls per client request. `--out` saves it and `--compare` diffs against a
+previous report, so runs on two commits can be compared.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+SCENARIOS = ("summary", "miniquotes", "watchlist")
+
+def parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument("--scenario", default=",".join(SCENARIOS), help="Comma-separated: " + ", ".join(SCENARIOS))
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--requests", type=int, default=400, help="Measured requests per scenario")
+    p.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per scenario before timing")
+    p.add_argument("--latency-ms", type=float, default=50.0, help="Mean upstream latency")
+    p.add_argument("--jitter", type=float, default=0.5, help="Upstream latency stdev as a fraction of the mean")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream calls answered 503")
+    p.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of upstream calls answered 429")
+    p.add_argument("--symbols", type=int, default=8, help="Symbols per miniquotes request")
+    p.add_argument("--universe", type=int, default=2000, help="Breadth/movers universe size (0 disables)")
+    p.add_argument("--real-limits", action="store_true", help="Keep the configured RATE_LIMITS instead of unthrottled ones")
+    p.add_argument("--prewarm", action="store_true", help="Run the background cache pre-warmer during the run")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", help="Write the JSON report here")
+    p.add_argument("--compare", help="Previous JSON report to diff against")
+    return p.parse_args(argv)
+
+def configure_env(args: argparse.Namespace, workdir: Path) -> None:
+    """Settings are read at import, so this must run before anything imports app"""
+    os.environ.update({
+        "ALPHA_VANTAGE_KEY": "bench",
+        "FINNHUB_KEY": "bench",
+        "FRED_API_KEY": "bench",
+        "CACHE_PREWARM": "true" if args.prewarm else "false",
+        "CACHE_DISK_ENABLED": "false",
+        "FRED_STORE_PATH": str(workdir / "fred_series.npz"),
+        "UNIVERSE_PATH": str(workdir / "universe.csv") if args.universe else str(workdir / "none.csv"),
+        "HTTP_RETRIES": os.environ.get("HTTP_RETRIES", "1"),
+    })
+    if not args.real_limits:
+        names = ("YahooFinance", "AlphaVantage", "Finnhub", "FRED", "SECEdgar")
+        os.environ["RATE_LIMITS"] = json.dumps({n: {"per_minute": 0, "per_day": 0, "max_concurrency": 1000} for n in names})
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+def summarize(latencies: List[float], statuses: Dict[int, int], elapsed: float, upstream: Dict[str, int]) -> Dict:
+    lat = np.array(latencies) * 1000.0
+    n = len(latencies)
+    calls = sum(upstream.values())
+    return {
+        "requests": n,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(n / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(float(np.percentile(lat, 50)), 2) if n else None,
+            "p95": round(float(np.percentile(lat, 95)), 2) if n else None,
+            "p99": round(float(np.percentile(lat, 99)), 2) if n else None,
+            "max": round(float(lat.max()), 2) if n else None,
+        },
+        "status": {str(k): v for k, v in sorted(statuses.items())},
+        "upstream_calls": calls,
+        "upstream_calls_per_request": round(calls / n, 3) if n else 0.0,
+        "upstream_by_source": dict(sorted(upstream.items())),
+    }
+
+def request_factory(scenario: str, args: argparse.Namespace) -> Callable:
+    rng = random.Random(args.seed)
+    pool = [f"SYM{i:05d}" for i in range(max(args.universe, 200))]
+
+    if scenario == "summary":
+        return lambda i: ("GET", "/api/summary?live=1", None)
+    if scenario == "miniquotes":
+        return lambda i: ("GET", "/api/miniquotes?symbols=" + ",".join(rng.sample(pool, args.symbols)), None)
+    if scenario == "watchlist":
+        def make(i):
+            kind = i % 4
+            sym = pool[i % len(pool)]
+            if kind == 0:
+                return ("POST", "/api/watchlist?name=bench", [{"symbol": sym}])
+            if kind == 1:
+                return ("DELETE", f"/api/watchlist/{pool[(i - 1) % len(pool)]}?name=bench", None)
+            return ("GET", "/api/watchlist?name=bench", None)
+        return make
+    raise SystemExit(f"Unknown scenario: {scenario}")
+
+async def drive(client, farm, scenario: str, args: argparse.Namespace) -> Dict:
+    make = request_factory(scenario, args)
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+
+    async def worker(indices, measure: bool):
+        for i in indices:
+            method, url, body = make(i)
+            t0 = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            if measure:
+                latencies.append(time.perf_counter() - t0)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    workers = max(1, args.concurrency)
+    warmup = iter(range(args.warmup))  # shared iterators: workers pull the next request index
+    await asyncio.gather(*(worker(warmup, False) for _ in range(workers)))
+    measured = iter(range(args.warmup, args.warmup + args.requests))
+    farm.reset_counters()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(measured, True) for _ in range(workers)))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, statuses, elapsed, dict(farm.calls))
+
+async def run(args: argparse.Namespace, workdir: Path) -> Dict:
+    import httpx
+    from bench.mock_farm import MockFarm, universe_csv
+    from app.services import watchlist_service
+
+    (workdir / "universe.csv").write_text(universe_csv(args.universe))
+    # Keep benchmark watchlists out of the real data directory
+    watchlist_service.WATCHLIST_PATH = workdir / "watchlist.json"
+    watchlist_service.WATCHLIST_DIR = workdir / "watchlists"
+
+    from app.main import app
+
+    farm = MockFarm(latency_ms=args.latency_ms, jitter=args.jitter, error_rate=args.error_rate,
+                    throttle_rate=args.throttle_rate, seed=args.seed)
+    farm.install()
+    results: Dict[str, Dict] = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for scenario in [s.strip() for s in args.scenario.split(",") if s.strip()]:
+                results[scenario] = await drive(client, farm, scenario, args)
+    return results
+
+def compare(current: Dict, baseline: Dict) -> Dict:
+    """Relative change (%) of the headline numbers per scenario"""
+    out = {}
+    for name, cur in current.get("scenarios", {}).items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        row = {}
+        for key in ("p50", "p95", "p99"):
+            b, c = base["latency_ms"].get(key), cur["latency_ms"].get(key)
+            if b and c is not None:
+                row[f"{key}_pct"] = round((c / b - 1) * 100, 1)
+        if base.get("throughput_rps"):
+            row["throughput_pct"] = round((cur["throughput_rps"] / base["throughput_rps"] - 1) * 100, 1)
+        row["upstream_calls_per_request"] = [base["upstream_calls_per_request"], cur["upstream_calls_per_request"]]
+        out[name] = row
+    return out
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        workdir = Path(tmp)
+        configure_env(args, workdir)
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+        # App logs go to stderr so stdout carries only the report
+        with contextlib.redirect_stdout(sys.stderr):
+            scenarios = asyncio.run(run(args, workdir))
+    report = {
+        "revision": git_revision(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "scenarios": scenarios,
+    }
+    if args.compare:
+        report["compare"] = {"baseline": args.compare, **compare(report, json.loads(Path(args.compare).read_text()))}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
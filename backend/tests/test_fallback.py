@@ -0,0 +1,107 @@
+import asyncio
+import itertools
+import pytest
+from app.config import settings
+from app.data_sources.base import DataSource
+from app.rate_limit import RateLimiter
+from app.services.market_service import MarketService
+from app.services.universe_service import Universe, UniverseService
+
+SYMBOLS = ["XLY", "XLP", "XLE", "XLF", "XLV", "XLI", "XLB", "XLK", "XLU", "XLRE", "XLC"]
+_names = itertools.count()
+
+class FakeSource(DataSource):
+    """Quotes every symbol after `latency`; batch sources make one upstream call per fetch"""
+
+    def __init__(self, label, batch=False, latency=0.01, answers=True, **limits):
+        super().__init__(f"{label}-{next(_names)}")
+        self.label = label
+        self.batch = batch
+        self.latency = latency
+        self.answers = answers
+        self.limiter = RateLimiter(self.name, **limits)
+        self.calls = 0
+
+    def quote_calls(self, symbols):
+        return 1 if self.batch else symbols
+
+    async def _get(self, symbols):
+        async with self.limiter:
+            self.calls += 1
+            await asyncio.sleep(self.latency)
+        self.stats.record_success(self.latency)
+        return {s: {"symbol": s, "price": 1.0, "pct": 0.5} for s in symbols} if self.answers else {}
+
+    async def fetch_quote(self, symbol):
+        return (await self._get([symbol])).get(symbol)
+
+    async def fetch_quotes(self, symbols):
+        if self.batch:
+            return await self._get(symbols)
+        return await self.fetch_quotes_concurrently(symbols)
+
+def market(*sources):
+    svc = MarketService.__new__(MarketService)
+    svc.sources = list(sources)
+    return svc
+
+async def test_batch_provider_stays_first_across_requests():
+    yahoo = FakeSource("yahoo", batch=True, latency=0.05, per_minute=120)
+    alpha = FakeSource("alpha", per_minute=5, per_day=25, max_concurrency=1)
+    finnhub = FakeSource("finnhub", per_minute=60)
+    svc = market(yahoo, alpha, finnhub)
+    for run in range(2):
+        quotes, source = await svc.fetch_with_fallback(SYMBOLS, budget=2.0)
+        assert set(quotes) == set(SYMBOLS)
+        assert source == yahoo.name
+        assert svc.ranked_sources(len(SYMBOLS))[0] is yahoo
+    assert (yahoo.calls, alpha.calls, finnhub.calls) == (2, 0, 0)
+
+def test_unmeasured_sources_keep_configured_order():
+    a, b, c = FakeSource("a", batch=True), FakeSource("b", batch=True), FakeSource("c", batch=True)
+    assert market(b, a, c).ranked_sources(5) == [b, a, c]
+
+def test_per_symbol_provider_pays_per_call():
+    yahoo = FakeSource("yahoo", batch=True)
+    finnhub = FakeSource("finnhub", per_minute=60)
+    yahoo.stats.record_success(0.3)
+    finnhub.stats.record_success(0.1)
+    svc = market(yahoo, finnhub)
+    assert svc.ranked_sources(1) == [finnhub, yahoo]
+    assert svc.ranked_sources(len(SYMBOLS)) == [yahoo, finnhub]
+
+def test_quota_limited_provider_goes_last():
+    yahoo = FakeSource("yahoo", batch=True)
+    alpha = FakeSource("alpha", per_minute=5, per_day=25, max_concurrency=1)
+    yahoo.stats.record_success(2.0)
+    alpha.stats.record_success(0.05)
+    svc = market(alpha, yahoo)
+    assert svc.ranked_sources(len(SYMBOLS)) == [yahoo, alpha]  # 6 calls past the minute bucket
+    alpha.limiter._day_used = 20
+    assert MarketService.quote_cost(alpha, 6) == float("inf")
+
+async def test_fallback_fills_symbols_the_first_provider_missed():
+    yahoo = FakeSource("yahoo", batch=True, answers=False)
+    finnhub = FakeSource("finnhub", per_minute=60)
+    quotes, source = await market(yahoo, finnhub).fetch_with_fallback(SYMBOLS[:3], budget=2.0)
+    assert set(quotes) == set(SYMBOLS[:3])
+    assert source == finnhub.name
+    assert all(q["source"] == finnhub.name for q in quotes.values())
+
+async def test_source_without_daily_quota_for_the_request_is_skipped():
+    yahoo = FakeSource("yahoo", batch=True, answers=False)
+    alpha = FakeSource("alpha", per_day=5)
+    quotes, source = await market(yahoo, alpha).fetch_with_fallback(SYMBOLS, budget=1.0)
+    assert (quotes, source) == ({}, "None")
+    assert alpha.calls == 0
+
+async def test_universe_falls_back_when_the_batch_provider_fails(monkeypatch):
+    monkeypatch.setattr(settings, "UNIVERSE_CHUNK_SIZE", 4)
+    yahoo = FakeSource("yahoo", batch=True, answers=False)
+    finnhub = FakeSource("finnhub", per_minute=600)
+    svc = market(yahoo, finnhub)
+    svc.universe = UniverseService(svc.fetch_with_fallback, Universe(SYMBOLS, ["nyse"] * len(SYMBOLS)))
+    assert await svc.universe.refresh() == len(SYMBOLS)
+    assert svc.universe.source == finnhub.name
+    assert svc.universe.breadth.snapshot()["nyse"]["advancers"] == len(SYMBOLS)
+    assert yahoo.calls == 3  # one batch per chunk, tried first
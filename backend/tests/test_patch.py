@@ -0,0 +1,46 @@
+import copy
+import random
+import pytest
+from app.patch import NullValueError, apply_merge_patch, merge_diff
+
+def random_doc(rng, depth=0):
+    doc = {}
+    for key in rng.sample("abcdefgh", rng.randint(0, 5)):
+        kind = rng.random()
+        if kind < 0.25 and depth < 3:
+            doc[key] = random_doc(rng, depth + 1)
+        elif kind < 0.4:
+            doc[key] = [rng.randint(0, 3), None]  # nulls inside lists are plain values
+        else:
+            doc[key] = rng.choice([0, 1, 2.5, "x", "y", True, False])
+    return doc
+
+def test_round_trip():
+    rng = random.Random(3)
+    for _ in range(2000):
+        old, new = random_doc(rng), random_doc(rng)
+        before = copy.deepcopy(old)
+        assert apply_merge_patch(old, merge_diff(old, new)) == new
+        assert old == before
+
+def test_unchanged_document_gives_empty_patch():
+    doc = {"a": 1, "b": {"c": [1, 2]}}
+    assert merge_diff(doc, copy.deepcopy(doc)) == {}
+
+def test_removed_key_is_null_and_nested_change_is_minimal():
+    patch = merge_diff({"a": 1, "b": {"c": 1, "d": 2}}, {"b": {"c": 1, "d": 3}})
+    assert patch == {"a": None, "b": {"d": 3}}
+
+@pytest.mark.parametrize("old,new", [
+    ({"a": 1}, {"a": None}),
+    ({}, {"a": None}),
+    ({"a": 1}, {"a": {"b": None}}),
+    ({}, {"a": {"b": {"c": None}}}),
+])
+def test_value_becoming_null_raises(old, new):
+    with pytest.raises(NullValueError):
+        merge_diff(old, new)
+
+def test_apply_replaces_non_object_target():
+    assert apply_merge_patch([1, 2], {"a": 1}) == {"a": 1}
+    assert apply_merge_patch({"a": 1}, [3]) == [3]
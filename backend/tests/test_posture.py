@@ -0,0 +1,94 @@
+import random
+import numpy as np
+import pytest
+from app.services.posture_service import IncrementalPosture, PostureService
+
+SECTORS = [f"XL{c}" for c in "BCEFIKPUVYR"]
+
+def breadth_dict(b):
+    return {"nyse": {"advancers": b[0], "decliners": b[1]}, "nasdaq": {"advancers": b[2], "decliners": b[3]}}
+
+def as_tuple(p):
+    c = p.components
+    return p.score, c.breadth, c.dispersion, c.vol_overlay, p.label
+
+def test_batch_matches_calculate():
+    rng = random.Random(7)
+    rows_b, rows_s, rows_v, expected = [], [], [], []
+    for _ in range(20000):
+        b = [rng.randint(0, 40) for _ in range(4)]
+        k = rng.randint(0, len(SECTORS))
+        s = [round(rng.uniform(-3, 3), 2) for _ in range(k)]
+        v = round(rng.uniform(-7, 7), 2)
+        rows_b.append(b)
+        rows_s.append(s + [np.nan] * (len(SECTORS) - k))
+        rows_v.append(v)
+        sectors = [{"symbol": SECTORS[i], "pct": s[i]} for i in range(k)]
+        expected.append(as_tuple(PostureService.calculate(breadth_dict(b), sectors, {"pct": v})))
+    r = PostureService.calculate_batch(np.array(rows_b, dtype=float), np.array(rows_s), np.array(rows_v))
+    got = list(zip(r["score"], r["breadth"], r["dispersion"], r["vol_overlay"], r["label"]))
+    assert [tuple(x) for x in got] == expected
+
+@pytest.mark.parametrize("b,s,v", [
+    ([19, 13, 13, 37], [-1.6, -2.58, -0.56, -1.07, 1.14, -2.68], 4.86),
+    ([9, 23, 27, 23], [1.09, 0.89, -0.04, 1.33, 2.18, 1.27], -3.06),
+    ([29, 3, 12, 38], [0.95, 0.45, -2.4, 1.09], 4.63),
+])
+def test_batch_rounds_ties_like_calculate(b, s, v):
+    sectors = [{"symbol": SECTORS[i], "pct": x} for i, x in enumerate(s)]
+    expected = PostureService.calculate(breadth_dict(b), sectors, {"pct": v})
+    row = np.array([s + [np.nan] * (len(SECTORS) - len(s))])
+    r = PostureService.calculate_batch(np.array([b], dtype=float), row, np.array([v]))
+    assert r["score"][0] == expected.score
+
+def test_batch_treats_missing_breadth_as_zero():
+    r = PostureService.calculate_batch(np.array([[10, 5, np.nan, 3]]), np.full((1, 2), np.nan), np.array([0.0]))
+    assert r["breadth"][0] == 0.0
+    assert r["dispersion"][0] == 0.0
+
+def test_batch_threshold_override_changes_label():
+    b, s, v = np.array([[20, 10, 20, 10]]), np.full((1, 1), np.nan), np.array([0.0])
+    assert PostureService.calculate_batch(b, s, v)["label"][0] == "Neutral"
+    assert PostureService.calculate_batch(b, s, v, thresholds={"RISK_ON": 5})["label"][0] == "Risk-On"
+
+def test_incremental_matches_full_recompute():
+    rng = random.Random(11)
+    inc = IncrementalPosture()
+    pct = {}
+    breadth = {"nyse": {"advancers": None, "decliners": None}, "nasdaq": {"advancers": None, "decliners": None}}
+    vix = 0.0
+    for step in range(3000):
+        roll = rng.random()
+        if roll < 0.6:
+            sym = rng.choice(SECTORS)
+            pct[sym] = round(rng.uniform(-4, 4), 2)
+            inc.update_sector(sym, pct[sym])
+        elif roll < 0.7 and pct:
+            sym = rng.choice(sorted(pct))
+            del pct[sym]
+            inc.remove_sector(sym)
+        elif roll < 0.9:
+            ex = rng.choice(IncrementalPosture.EXCHANGES)
+            adv, dec = rng.randint(0, 50), rng.randint(0, 50)
+            breadth[ex] = {"advancers": adv, "decliners": dec}
+            inc.update_breadth(ex, adv, dec)
+        else:
+            vix = round(rng.uniform(-7, 7), 2)
+            inc.update_vix(vix)
+        sectors = [{"symbol": s, "pct": p} for s, p in pct.items()]
+        full = PostureService.calculate(breadth, sectors, {"pct": vix})
+        got = inc.current()
+        assert got.label == full.label, step
+        assert got.score == pytest.approx(full.score, abs=0.11), step
+        assert got.components.dispersion == pytest.approx(full.components.dispersion, abs=0.11), step
+
+def test_incremental_breadth_unavailable_until_both_exchanges_report():
+    inc = IncrementalPosture()
+    inc.update_breadth("nyse", 30, 10)
+    assert inc.components()["breadth"] == 0.0
+    inc.update_breadth("nasdaq", 10, 30)
+    assert inc.components()["breadth"] == 0.0  # +50% and -50% average out
+    inc.update_breadth("nasdaq", 30, 10)
+    assert inc.components()["breadth"] == pytest.approx(50.0)
+    inc.update_breadth("nasdaq", None, 10)
+    assert inc.components()["breadth"] == 0.0
@@ -0,0 +1,64 @@
+import asyncio
+import time
+import pytest
+from app.rate_limit import QuotaExceeded, RateLimiter
+
+async def test_concurrency_cap():
+    limiter = RateLimiter("test", max_concurrency=2)
+    in_flight = peak = 0
+
+    async def call():
+        nonlocal in_flight, peak
+        async with limiter:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await asyncio.gather(*(call() for _ in range(8)))
+    assert peak == 2
+    assert limiter.remaining()["in_flight"] == 0
+
+async def test_daily_quota_raises_and_releases_slot():
+    limiter = RateLimiter("test", per_day=2, max_concurrency=1)
+    for _ in range(2):
+        async with limiter:
+            pass
+    with pytest.raises(QuotaExceeded):
+        async with limiter:
+            pass
+    assert limiter.remaining() == {"minute": -1, "day": 0, "in_flight": 0, "queued": 0}
+
+async def test_daily_quota_resets_on_a_new_day():
+    limiter = RateLimiter("test", per_day=1)
+    async with limiter:
+        pass
+    limiter._day = "1970-01-01"
+    async with limiter:
+        pass
+    assert limiter.remaining()["day"] == 0
+
+async def test_waits_for_a_token_when_bucket_is_empty():
+    limiter = RateLimiter("test", per_minute=600)  # one token per 0.1 s
+    limiter._tokens, limiter._refilled = 0.0, time.monotonic()
+    started = time.monotonic()
+    async with limiter:
+        pass
+    assert time.monotonic() - started >= 0.09
+
+async def test_burst_up_to_bucket_size_is_immediate():
+    limiter = RateLimiter("test", per_minute=5)
+    started = time.monotonic()
+    for _ in range(5):
+        async with limiter:
+            pass
+    assert time.monotonic() - started < 0.05
+    assert limiter.remaining()["minute"] == 0
+
+def test_delay_for():
+    limiter = RateLimiter("test", per_minute=60, per_day=10)
+    assert limiter.delay_for(10) == 0.0
+    assert limiter.delay_for(11) == float("inf")
+    limiter._tokens, limiter._refilled = 2.0, time.monotonic()
+    assert limiter.delay_for(5) == pytest.approx(3.0, abs=0.05)
+    assert RateLimiter("free").delay_for(1000) == 0.0
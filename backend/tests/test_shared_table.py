@@ -0,0 +1,78 @@
+import struct
+import pytest
+from app.shared_table import HEADER, SharedTableReader, SharedTableWriter
+
+@pytest.fixture
+def table(tmp_path):
+    path = tmp_path / "table"
+    writer = SharedTableWriter(path, 4096)
+    reader = SharedTableReader(path, max_age=0)
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+def test_round_trip(table):
+    writer, reader = table
+    assert reader.read() == {}
+    assert writer.publish({"sections": {"get_vix": [{"pct": 1.5}, "yahoo"]}})
+    assert reader.read() == {"sections": {"get_vix": [{"pct": 1.5}, "yahoo"]}}
+    writer.publish({"n": 2})
+    assert reader.read() == {"n": 2}
+    assert reader.seq == writer.seq
+    assert reader.torn_reads == 0
+
+def test_unchanged_sequence_skips_decoding(table):
+    writer, reader = table
+    writer.publish({"n": 1})
+    first = reader.read()
+    assert reader.read() is first
+
+def test_odd_sequence_keeps_previous_document(table):
+    writer, reader = table
+    writer.publish({"n": 1})
+    assert reader.read() == {"n": 1}
+    # Publisher mid-write: seq is odd and the payload is half replaced
+    struct.pack_into("<Q", writer._mm, 8, writer.seq + 1)
+    writer._mm[HEADER.size:HEADER.size + 4] = b'{"n"'
+    assert reader.read() == {"n": 1}
+    assert reader.seq == writer.seq
+
+def test_torn_payload_is_counted_and_discarded(table):
+    writer, reader = table
+    writer.publish({"n": 1})
+    reader.read()
+    # Even sequence but the payload does not decode: treated as a torn read
+    writer._mm[HEADER.size:HEADER.size + 8] = b"\xff" * 8
+    struct.pack_into("<Q", writer._mm, 8, writer.seq + 2)
+    assert reader.read() == {"n": 1}
+    assert reader.torn_reads > 0
+
+def test_oversized_document_is_refused(table):
+    writer, reader = table
+    assert not writer.publish({"blob": "x" * 5000})
+    assert reader.read() == {}
+
+def test_writer_restart_continues_sequence(tmp_path):
+    path = tmp_path / "table"
+    first = SharedTableWriter(path, 4096)
+    first.publish({"n": 1})
+    seq = first.seq
+    first.close()
+    second = SharedTableWriter(path, 4096)
+    assert second.seq == seq
+    second.publish({"n": 2})
+    reader = SharedTableReader(path, max_age=0)
+    assert reader.read() == {"n": 2}
+    reader.close()
+    second.close()
+
+def test_stale_table(table):
+    writer, _ = table
+    reader = SharedTableReader(writer.path, max_age=5)
+    assert not reader.fresh()
+    writer.publish({"n": 1})
+    reader._next_open = 0.0
+    assert reader.fresh()
+    reader.published_at -= 10
+    assert reader.stale()
+    reader.close()
@@ -0,0 +1,88 @@
+import json
+from typing import Dict, Optional
+import pytest
+from pydantic import BaseModel
+from app.patch import apply_merge_patch
+from app.snapshot import SnapshotStore, parse_since
+
+class Doc(BaseModel):
+    a: int
+    b: Dict[str, int] = {}
+    c: Optional[str] = "x"
+
+def build(store, **fields):
+    return store.get_or_build(tuple(sorted(fields.items(), key=str)), lambda: Doc(**fields))
+
+def test_reuses_snapshot_for_same_fingerprint():
+    store = SnapshotStore()
+    first = build(store, a=1)
+    assert build(store, a=1) is first
+    assert build(store, a=2).version == 2
+    assert (store.builds, store.reuses) == (2, 1)
+
+def test_etag_matching():
+    snap = build(SnapshotStore(), a=1)
+    assert snap.matches(snap.etag)
+    assert snap.matches(f'"0-x", W/{snap.etag}')
+    assert snap.matches("*")
+    assert not snap.matches('"0-x"')
+    assert not snap.matches(None)
+
+@pytest.mark.parametrize("value,expected", [
+    ("3", (3, None)),
+    ('"3-abc"', (3, "abc")),
+    ('W/"3-abc"', (3, "abc")),
+])
+def test_parse_since(value, expected):
+    assert parse_since(value) == expected
+
+def test_parse_since_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_since("abc")
+
+def test_delta_patches_base_into_current():
+    store = SnapshotStore(history=4)
+    base = build(store, a=1, b={"x": 1, "y": 2})
+    current = build(store, a=1, b={"x": 1, "y": 3})
+    delta = json.loads(store.delta_since(base.version, base.digest))
+    assert delta["base"] == base.version
+    assert delta["etag"] == current.etag
+    assert delta["patch"] == {"b": {"y": 3}}
+    assert apply_merge_patch(json.loads(base.body), delta["patch"]) == json.loads(current.body)
+    assert store.delta_since(base.version, base.digest) is store.delta_since(base.version, base.digest)
+
+def test_expired_base_gets_full_document():
+    store = SnapshotStore(history=2)
+    for a in range(4):
+        current = build(store, a=a)
+    delta = json.loads(store.delta_since(1))
+    assert delta["base"] is None
+    assert delta["full"] == json.loads(current.body)
+    assert delta["version"] == current.version
+
+def test_digest_mismatch_gets_full_document():
+    store = SnapshotStore(history=4)
+    base = build(store, a=1)
+    build(store, a=2)
+    assert json.loads(store.delta_since(base.version, "0000"))["base"] is None
+    assert json.loads(store.delta_since(base.version, base.digest))["base"] == base.version
+
+def test_require_digest():
+    store = SnapshotStore(history=4, require_digest=True)
+    base = build(store, a=1)
+    build(store, a=2)
+    assert json.loads(store.delta_since(base.version))["base"] is None
+    assert json.loads(store.delta_since(base.version, base.digest))["patch"] == {"a": 2}
+
+def test_value_becoming_null_gets_full_document():
+    store = SnapshotStore(history=4)
+    base = build(store, a=1, c="x")
+    current = build(store, a=1, c=None)
+    delta = json.loads(store.delta_since(base.version))
+    assert delta["base"] is None
+    assert delta["full"]["c"] is None
+    assert delta["etag"] == current.etag
+
+def test_delta_without_any_snapshot():
+    delta = json.loads(SnapshotStore(history=2).delta_since(1))
+    assert delta == {"version": 0, "etag": None, "base": None, "full": None}
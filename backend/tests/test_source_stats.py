@@ -0,0 +1,92 @@
+import pytest
+from app.config import settings
+from app.data_sources import stats as stats_module
+from app.data_sources.stats import SourceStats
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(stats_module.time, "monotonic", lambda: now[0])
+    return now
+
+@pytest.fixture
+def source(clock):
+    s = SourceStats("test")
+    s.failure_threshold = 3
+    s.reset_timeout = 30.0
+    return s
+
+def test_opens_after_consecutive_failures(source):
+    source.record_failure(0.1)
+    source.record_success(0.1)  # resets the streak
+    for _ in range(2):
+        source.record_failure(0.1)
+    assert source.state == SourceStats.CLOSED and source.allow()
+    source.record_failure(0.1)
+    assert source.state == SourceStats.OPEN
+    assert not source.allow()
+    assert not source.available()
+    assert source.score() == float("inf")
+
+def test_half_open_lets_one_probe_through(source, clock):
+    for _ in range(3):
+        source.record_failure(0.1)
+    clock[0] += 30.0
+    assert source.available()
+    assert source.allow()
+    assert source.state == SourceStats.HALF_OPEN
+    assert not source.allow()
+    assert not source.available()
+
+def test_probe_success_closes(source, clock):
+    for _ in range(3):
+        source.record_failure(0.1)
+    clock[0] += 30.0
+    assert source.allow()
+    source.record_success(0.2)
+    assert source.state == SourceStats.CLOSED
+    assert source.consecutive_failures == 0
+    assert source.allow() and source.allow()
+
+def test_probe_failure_reopens(source, clock):
+    for _ in range(3):
+        source.record_failure(0.1)
+    clock[0] += 30.0
+    assert source.allow()
+    source.record_failure(0.1)
+    assert source.state == SourceStats.OPEN
+    clock[0] += 29.0
+    assert not source.allow()
+    clock[0] += 1.0
+    assert source.allow()
+
+def test_stuck_probe_frees_up_after_timeout(source, clock):
+    for _ in range(3):
+        source.record_failure(0.1)
+    clock[0] += 30.0
+    assert source.allow()
+    clock[0] += 30.0
+    assert source.allow()
+
+def test_abandoned_probe_frees_the_slot(source, clock):
+    for _ in range(3):
+        source.record_failure(0.1)
+    clock[0] += 30.0
+    assert source.allow()
+    source.record_abandoned(0.5)
+    assert source.state == SourceStats.HALF_OPEN
+    assert source.allow()
+
+def test_p95_and_score_rank_slower_sources_lower(clock):
+    fast, slow = SourceStats("fast"), SourceStats("slow")
+    for i in range(100):
+        fast.record_success(0.01 * (i % 10 + 1))
+        slow.record_success(0.5)
+    assert fast.p95() == pytest.approx(0.1)
+    assert fast.score() < slow.score()
+
+def test_unmeasured_source_scores_the_request_timeout(clock):
+    fresh, measured = SourceStats("fresh"), SourceStats("measured")
+    measured.record_success(0.5)
+    assert fresh.score() == float(settings.HTTP_TIMEOUT)
+    assert measured.score() < fresh.score()
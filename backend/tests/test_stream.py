@@ -0,0 +1,71 @@
+import asyncio
+import json
+import pytest
+from app.config import settings
+from app.services.stream_service import StreamHub, Subscriber
+
+@pytest.fixture(autouse=True)
+def slow_refresh(monkeypatch):
+    # Refreshes are driven by hand; the background loop only does the first one
+    monkeypatch.setattr(settings, "STREAM_INTERVAL", 3600)
+    monkeypatch.setattr(settings, "STREAM_HEARTBEAT", 0.5)
+
+def frame(raw):
+    kind, data = raw.split("\n")[:2]
+    doc = json.loads(data[len("data: "):])
+    return kind[len("event: "):], doc["version"], doc["data"]
+
+async def next_frame(gen):
+    return frame(await asyncio.wait_for(gen.__anext__(), 1))
+
+def hub_for(states):
+    states = iter(states)
+
+    async def load():
+        return next(states)
+
+    return StreamHub(load, lambda symbols: load)
+
+async def test_snapshot_then_deltas():
+    hub = hub_for([{"a": 1, "b": {"c": 1}}, {"a": 1, "b": {"c": 2}}])
+    gen = hub.events(frozenset())
+    assert await next_frame(gen) == ("snapshot", 0, {})
+    await asyncio.sleep(0.01)
+    assert await next_frame(gen) == ("delta", 1, {"a": 1, "b": {"c": 1}})
+    await hub.topics["summary"].refresh()
+    assert await next_frame(gen) == ("delta", 2, {"b": {"c": 2}})
+    await gen.aclose()
+    assert hub.topics == {}
+
+async def test_delta_queued_before_resync_is_skipped():
+    hub = hub_for([{"a": 1, "b": 1}, {"a": 2, "b": 1}, {"a": 2, "b": None}, {"a": 3, "b": None}])
+    gen = hub.events(frozenset())
+    assert await next_frame(gen) == ("snapshot", 0, {})
+    await asyncio.sleep(0.01)  # v1 delta queued
+    topic = hub.topics["summary"]
+    await topic.refresh()  # v2 delta queued
+    await topic.refresh()  # b became null: v3 goes out as a snapshot
+    assert await next_frame(gen) == ("delta", 1, {"a": 1, "b": 1})
+    assert await next_frame(gen) == ("snapshot", 3, {"a": 2, "b": None})
+    await topic.refresh()  # the queued v2 delta must not follow the v3 snapshot
+    assert await next_frame(gen) == ("delta", 4, {"a": 3})
+    await gen.aclose()
+
+async def test_overflow_drops_deltas_and_flags_snapshot():
+    sub = Subscriber(maxsize=2)
+    sub.topics.update({"summary", "quotes:A"})
+    for version in (1, 2, 3):
+        sub.offer("summary", version, f"d{version}")
+    assert sub.needs_snapshot == {"summary", "quotes:A"}
+    assert sub.dropped == 2
+    assert sub.queue.get_nowait() is None
+    sub.offer("summary", 4, "d4")  # snapshot pending: not queued
+    assert sub.queue.empty()
+
+async def test_symbol_cap(monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_MAX_SYMBOLS", 2)
+    gen = hub_for([{}]).events(frozenset({"A", "B", "C"}))
+    raw = await asyncio.wait_for(gen.__anext__(), 1)
+    assert raw.startswith("event: error")
+    with pytest.raises(StopAsyncIteration):
+        await gen.__anext__()
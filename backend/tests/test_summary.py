@@ -0,0 +1,26 @@
+import pytest
+from app import main
+from app.config import settings
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(main.time, "time", lambda: now[0])
+    monkeypatch.setattr(settings, "SUMMARY_STATIC_TTL", 60.0)
+    return now
+
+async def test_static_summary_is_rebuilt_each_window(clock):
+    first = await main.summary_snapshot(False)
+    clock[0] += 10
+    assert await main.summary_snapshot(False) is first
+    clock[0] += 60
+    second = await main.summary_snapshot(False)
+    assert second.version == first.version + 1
+    assert second.etag != first.etag
+    assert second.model.as_of != first.model.as_of
+
+async def test_static_summary_ttl_off(clock, monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_STATIC_TTL", 0)
+    first = await main.summary_snapshot(False)
+    clock[0] += 3600
+    assert await main.summary_snapshot(False) is first
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from app.timeseries import RingBuffer, as_bars
+
+def bars(start, n):
+    t = np.arange(start, start + n, dtype=np.int64)
+    return t, t.astype(float) * 1.5, t * 10
+
+def test_tail_before_wrap():
+    buf = RingBuffer(5)
+    assert buf.extend(bars(0, 3)) == 3
+    t, c, v = buf.tail()
+    assert t.tolist() == [0, 1, 2]
+    assert c.tolist() == [0.0, 1.5, 3.0]
+    assert buf.last_timestamp == 2
+
+def test_wraparound_keeps_latest_rows_in_order():
+    buf = RingBuffer(4)
+    for start in range(0, 11, 3):
+        buf.extend(bars(start, 3))
+    t, c, v = buf.tail()
+    assert buf.size == 4
+    assert t.tolist() == [8, 9, 10, 11]
+    assert v.tolist() == [80, 90, 100, 110]
+    assert buf.tail(2)[0].tolist() == [10, 11]
+
+def test_batch_larger_than_capacity():
+    buf = RingBuffer(3)
+    buf.extend(bars(0, 10))
+    assert buf.tail()[0].tolist() == [7, 8, 9]
+
+def test_grows_from_initial_allocation_keeping_order():
+    buf = RingBuffer(100, initial=4)
+    small = buf.nbytes
+    buf.extend(bars(0, 3))
+    assert buf.nbytes == small
+    for start in range(3, 20, 3):
+        buf.extend(bars(start, 3))
+    assert buf.size == 21
+    assert buf.tail()[0].tolist() == list(range(21))
+    assert buf.last_timestamp == 20
+    assert buf.nbytes < RingBuffer(100).nbytes
+
+def test_growth_stops_at_capacity_then_wraps():
+    buf = RingBuffer(6, initial=2)
+    buf.extend(bars(0, 1))
+    buf.extend(bars(1, 4))
+    buf.extend(bars(5, 4))
+    assert buf.size == 6
+    assert buf.nbytes == RingBuffer(6).nbytes
+    assert buf.tail()[0].tolist() == [3, 4, 5, 6, 7, 8]
+    buf.extend((np.array([8]), np.array([99.0]), np.array([1])))
+    assert buf.tail(1)[1].tolist() == [99.0]
+
+def test_resent_last_bar_is_revised_and_older_bars_ignored():
+    buf = RingBuffer(4)
+    buf.extend(bars(0, 4))
+    t = np.array([2, 3, 4], dtype=np.int64)
+    added = buf.extend((t, np.array([0.0, 99.0, 100.0]), np.array([1, 2, 3], dtype=np.int64)))
+    assert added == 1
+    t, c, v = buf.tail()
+    assert t.tolist() == [1, 2, 3, 4]
+    assert c.tolist() == [1.5, 3.0, 99.0, 100.0]
+    assert v.tolist() == [10, 20, 2, 3]
+
+def test_tail_views_are_read_only():
+    buf = RingBuffer(2)
+    buf.extend(bars(0, 2))
+    with pytest.raises(ValueError):
+        buf.tail()[1][0] = 1.0
+
+def test_as_bars_drops_missing_closes():
+    t, c, v = as_bars([1, 2, 3], [1.0, None, 3.0], [5, 6])
+    assert t.tolist() == [1, 3]
+    assert c.tolist() == [1.0, 3.0]
+    assert v.tolist() == [5, 0]
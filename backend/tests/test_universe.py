@@ -0,0 +1,81 @@
+import random
+import numpy as np
+import pytest
+from app.services.universe_service import BreadthEngine, MoversEngine, Universe
+
+SYMBOLS = [f"S{i:03d}" for i in range(200)]
+
+@pytest.fixture
+def universe():
+    rng = random.Random(5)
+    return Universe(SYMBOLS, [rng.choice(["nyse", "nasdaq"]) for _ in SYMBOLS])
+
+def random_batch(rng, symbols):
+    batch = {}
+    for sym in rng.sample(symbols, rng.randint(1, 40)):
+        pct = None if rng.random() < 0.05 else round(rng.uniform(-5, 5), 1)
+        batch[sym] = {"pct": pct, "price": round(rng.uniform(1, 500), 2), "volume": rng.randint(0, 10_000)}
+    batch["NOT_IN_UNIVERSE"] = {"pct": 1.0, "price": 1.0, "volume": 1}
+    return batch
+
+def brute_breadth(universe, latest):
+    out = {name: {"advancers": 0, "decliners": 0, "upVol": 0, "downVol": 0} for name in universe.exchange_names}
+    for sym, q in latest.items():
+        ex = universe.exchange_names[universe.exchange[universe.index[sym]]]
+        pct, vol = q["pct"], q["volume"]
+        if pct is None or pct == 0:
+            continue
+        side = ("advancers", "upVol") if pct > 0 else ("decliners", "downVol")
+        out[ex][side[0]] += 1
+        out[ex][side[1]] += vol
+    return out
+
+def test_breadth_matches_brute_force(universe):
+    rng = random.Random(1)
+    engine = BreadthEngine(universe)
+    latest = {}
+    for _ in range(300):
+        batch = random_batch(rng, SYMBOLS)
+        assert engine.apply(batch) == len(batch) - 1
+        latest.update({s: q for s, q in batch.items() if s in universe.index})
+        assert engine.snapshot() == brute_breadth(universe, latest)
+    assert engine.covered == sum(1 for q in latest.values() if q["pct"] is not None)
+
+def brute_top(latest, k):
+    rows = [(s, q) for s, q in latest.items()]
+    gainers = sorted((r for r in rows if r[1]["pct"] is not None and r[1]["pct"] > 0), key=lambda r: (-r[1]["pct"], r[0]))
+    losers = sorted((r for r in rows if r[1]["pct"] is not None and r[1]["pct"] < 0), key=lambda r: (r[1]["pct"], r[0]))
+    active = sorted((r for r in rows if r[1]["volume"] > 0), key=lambda r: (-r[1]["volume"], r[0]))
+    return {
+        "gainers": [s for s, _ in gainers[:k]],
+        "losers": [s for s, _ in losers[:k]],
+        "most_active": [s for s, _ in active[:k]],
+    }
+
+def test_movers_match_full_sort(universe):
+    rng = random.Random(2)
+    engine = MoversEngine(universe, k=10)
+    latest = {}
+    for _ in range(300):
+        batch = random_batch(rng, SYMBOLS)
+        engine.apply(batch)
+        latest.update({s: q for s, q in batch.items() if s in universe.index})
+        top = engine.top()
+        got = {bucket: [m["symbol"] for m in movers] for bucket, movers in top.items()}
+        assert got == brute_top(latest, 10)
+
+def test_movers_heaps_stay_bounded(universe):
+    engine = MoversEngine(universe, k=5)
+    for step in range(50):
+        engine.apply({sym: {"pct": step % 7 - 3 or 1, "price": step + 1, "volume": step + 1} for sym in SYMBOLS})
+    for heap in engine._heaps.values():
+        assert len(heap) <= 2 * len(universe) + 64
+
+def test_movers_top_is_memoized_until_a_quote_changes(universe):
+    engine = MoversEngine(universe, k=3)
+    engine.apply({"S001": {"pct": 2.0, "price": 10.0, "volume": 5}})
+    first = engine.top()
+    engine.apply({"S001": {"pct": 2.0, "price": 10.0, "volume": 5}})
+    assert engine.top() is first
+    engine.apply({"S002": {"pct": 3.0, "price": 10.0, "volume": 5}})
+    assert [m["symbol"] for m in engine.top()["gainers"]] == ["S002", "S001"]
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+import threading
+import pytest
+from app.config import settings
+from app.services import watchlist_service
+from app.services.watchlist_service import WatchlistService
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(watchlist_service, "WATCHLIST_PATH", tmp_path / "watchlist.json")
+    monkeypatch.setattr(watchlist_service, "WATCHLIST_DIR", tmp_path / "watchlists")
+    monkeypatch.setattr(settings, "WATCHLIST_FLUSH_DELAY", 0.01)
+    return WatchlistService()
+
+def on_disk(path):
+    return [it["symbol"] for it in json.loads(path.read_text())["symbols"]]
+
+def test_writes_through_without_event_loop(service, tmp_path):
+    service.add_symbols([{"symbol": "aapl"}, {"symbol": "msft"}])
+    assert on_disk(tmp_path / "watchlist.json") == ["AAPL", "MSFT"]
+
+async def test_edits_are_coalesced_into_one_write(service, tmp_path, monkeypatch):
+    calls = []
+    write = service._write_atomic
+    monkeypatch.setattr(service, "_write_atomic", lambda writes: calls.append(set(writes)) or write(writes))
+    service.add_symbols([{"symbol": "AAPL"}])
+    service.add_symbols([{"symbol": "MSFT"}], name="tech")
+    service.remove_symbol("AAPL")
+    assert not (tmp_path / "watchlist.json").exists()
+    await asyncio.sleep(0.1)
+    assert calls == [{"default", "tech"}]
+    assert on_disk(tmp_path / "watchlist.json") == []
+    assert on_disk(tmp_path / "watchlists" / "tech.json") == ["MSFT"]
+
+async def test_edit_during_write_is_flushed_next_round(service, tmp_path, monkeypatch):
+    write = service._write_atomic
+    started, release = threading.Event(), threading.Event()
+
+    def slow_write(writes):
+        started.set()
+        release.wait(5)
+        return write(writes)
+
+    monkeypatch.setattr(service, "_write_atomic", slow_write)
+    service.add_symbols([{"symbol": "AAPL"}])
+    assert await asyncio.to_thread(started.wait, 5)
+    service.add_symbols([{"symbol": "LATE"}])  # lands while the first write is in flight
+    release.set()
+    await asyncio.sleep(0.1)
+    assert on_disk(tmp_path / "watchlist.json") == ["AAPL", "LATE"]
+
+async def test_failed_write_is_retried(service, tmp_path, monkeypatch):
+    write = service._write_atomic
+    attempts = []
+
+    def flaky(writes):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+        return write(writes)
+
+    monkeypatch.setattr(service, "_write_atomic", flaky)
+    service.add_symbols([{"symbol": "AAPL"}])
+    await asyncio.sleep(0.1)
+    assert len(attempts) == 2
+    assert on_disk(tmp_path / "watchlist.json") == ["AAPL"]
+
+async def test_stop_flushes_pending_edits(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "WATCHLIST_FLUSH_DELAY", 60)
+    service.add_symbols([{"symbol": "AAPL"}])
+    await service.stop()
+    assert on_disk(tmp_path / "watchlist.json") == ["AAPL"]
+
+def test_reloads_when_another_process_replaces_the_file(service, tmp_path):
+    service.add_symbols([{"symbol": "AAPL"}])
+    path = tmp_path / "watchlist.json"
+    other = WatchlistService()
+    other.add_symbols([{"symbol": "MSFT"}])
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert [it.symbol for it in service.get().symbols] == ["AAPL", "MSFT"]
+
+def test_rejects_bad_names(service):
+    with pytest.raises(ValueError):
+        service.get("../etc")
+
+def test_reading_unknown_lists_creates_nothing(service, tmp_path):
+    for i in range(50):
+        assert service.get(f"probe{i}").symbols == []
+        assert not service.contains("AAPL", f"probe{i}")
+    assert service.names() == ["default"]
+    assert service._lists == {}
+    assert not (tmp_path / "watchlists").exists()
+
+def test_remove_from_unknown_list(service, tmp_path):
+    assert service.remove_symbol("AAPL", "nope") is None
+    assert service.names() == ["default"]
+    assert service.remove_symbol("AAPL") is not None  # the default list always exists
+    service.add_symbols([{"symbol": "MSFT"}], name="tech")
+    assert [it.symbol for it in service.remove_symbol("AAPL", "tech").symbols] == ["MSFT"]
+
+def test_list_deleted_on_disk_is_forgotten(service, tmp_path):
+    service.add_symbols([{"symbol": "MSFT"}], name="tech")
+    assert service.names() == ["default", "tech"]
+    (tmp_path / "watchlists" / "tech.json").unlink()
+    assert service.get("tech").symbols == []
+    assert service.names() == ["default"]